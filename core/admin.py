@@ -58,12 +58,10 @@ class GuessPoolAdmin(admin.ModelAdmin):
         "number_of_guessers",
         "number_of_matches",
         "private",
-        "new_matches",
-        "updated_matches",
         "created",
         "modified",
     )
-    list_editable = ("private", "new_matches", "updated_matches")
+    list_editable = ("private",)
     prepopulated_fields = {"slug": ("name",)}
     filter_horizontal = ["competitions", "teams", "guessers", "guesses"]
 
@@ -72,3 +70,16 @@ class GuessPoolAdmin(admin.ModelAdmin):
 class RankingEntryAdmin(admin.ModelAdmin):
     list_display = ("__str__", "score")
     list_filter = ["guesser", "pool", "year", "month", "week"]
+
+
+@admin.register(models.EmailDelivery)
+class EmailDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("to", "subject", "status", "attempts", "created", "sent_at")
+    list_filter = ["status", "subject"]
+    search_fields = ["to"]
+
+
+@admin.register(models.PushDelivery)
+class PushDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("heading", "status", "attempts", "created", "sent_at")
+    list_filter = ["status", "heading"]
@@ -0,0 +1,296 @@
+import json
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from io import StringIO
+from itertools import batched, islice
+from math import ceil
+from pathlib import Path
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from core.management.commands import sync_matches_sfi
+from core.models import (
+    Competition,
+    Guess,
+    Guesser,
+    GuessPool,
+    Match,
+    RankingDeltas,
+    RankingEntry,
+    Team,
+)
+from core.services.sfi import SFIMatch, SFIService
+
+# SFI pages hold up to 25 matches
+SFI_PAGE_SIZE = 25
+
+# Slower steps are only regressions when they are also slower by more than this (in seconds),
+# so that fast steps don't fail on timing noise
+MIN_TIME_REGRESSION = 0.05
+
+BENCHMARK_CACHE = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "benchmark_ingestion"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the ingestion path (match sync, scoring and rankings) over synthetic pools, guessers, guesses "
+        "and SFI payloads generated at the given scale, reporting wall time and query counts of each step and "
+        "failing when they regress from the stored baseline. Everything runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--guesses", type=int, default=1000, help="Number of guesses to generate (default: 1000).")
+        parser.add_argument("--matches", type=int, default=50, help="Number of matches to generate (default: 50).")
+        parser.add_argument("--pools", type=int, default=10, help="Number of pools to generate (default: 10).")
+        parser.add_argument(
+            "--baseline",
+            type=Path,
+            default=settings.BASE_DIR / "benchmarks" / "ingestion.json",
+            help="JSON file with the baseline results, by scale (default: benchmarks/ingestion.json).",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Store the results as the baseline of this scale instead of comparing them.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Fraction of the baseline time a step can take above it before it is a regression (default: 0.25).",
+        )
+
+    def handle(self, *args, **options):
+        scale = f"{options['guesses']} guesses, {options['matches']} matches, {options['pools']} pools"
+        self.stdout.write(f"Benchmarking ingestion with {scale}...")
+
+        # Rolling back doesn't undo cache writes, so rankings are cached in a throwaway cache
+        with override_settings(CACHES={**settings.CACHES, "default": BENCHMARK_CACHE}), transaction.atomic():
+            results = self._run(options["guesses"], options["matches"], options["pools"])
+            transaction.set_rollback(True)
+            caches["default"].clear()
+
+        baselines = self._load_baselines(options["baseline"])
+
+        if options["save_baseline"]:
+            baselines[scale] = results
+            options["baseline"].parent.mkdir(parents=True, exist_ok=True)
+            options["baseline"].write_text(json.dumps(baselines, indent=2), encoding="utf-8")
+            self._report(results, {}, options["tolerance"])
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {options['baseline']}."))
+            return
+
+        regressions = self._report(results, baselines.get(scale, {}), options["tolerance"])
+        if regressions:
+            raise CommandError(f"{regressions} of {len(results)} steps regressed from the baseline.")
+
+        if scale not in baselines:
+            self.stdout.write("No baseline for this scale yet, use --save-baseline to store one.")
+        else:
+            self.stdout.write(self.style.SUCCESS("No regressions from the baseline."))
+
+    def _run(self, guesses: int, matches: int, pools: int) -> dict[str, dict]:
+        """Generates the data and runs the timed steps, returning the results of each one"""
+
+        results = {}
+        rng = random.Random(0)
+        sync_command = sync_matches_sfi.Command(stdout=StringIO(), stderr=StringIO())
+        competition, teams, guessers, pool_list = self._generate_base_data(ceil(guesses / matches), pools)
+        sfi_matches = self._generate_sfi_matches(competition, teams, matches)
+        competitions_by_sfi_id = {competition.sfi_id: competition}
+
+        with self._measure("sync_matches_sfi: new matches", results):
+            sync_command._preload_teams()
+            for page in self._paginate(sfi_matches):
+                sync_command._process_matches(page, competitions_by_sfi_id, stats=Counter())
+
+        match_list = list(Match.objects.filter(competition=competition))
+        self._generate_guesses(match_list, guessers, pool_list, guesses, rng)
+
+        for sfi_match in sfi_matches:
+            sfi_match["status"] = SFIService.SFI_ENDED_STATUS
+            sfi_match["teamA"]["score"]["2h"] = rng.randint(0, 4)
+            sfi_match["teamB"]["score"]["2h"] = rng.randint(0, 4)
+
+        with self._measure("sync_matches_sfi: results", results):
+            sync_command._preload_teams()
+            for page in self._paginate(sfi_matches):
+                sync_command._process_matches(page, competitions_by_sfi_id, stats=Counter())
+
+        # Results are corrected (swapped) so that all guesses are scored again
+        Match.objects.filter(competition=competition).update(home_goals=F("away_goals"), away_goals=F("home_goals"))
+        match_list = list(Match.objects.filter(competition=competition))
+
+        with self._measure("Match.evaluate_and_consolidate_guesses", results):
+            ranking_deltas = RankingDeltas()
+            for match in match_list:
+                match.evaluate_and_consolidate_guesses(ranking_deltas)
+            RankingEntry.apply_score_deltas(ranking_deltas)
+
+        pool_ids = [pool.id for pool in pool_list]
+        with self._measure("update_ranking_entries", results):
+            call_command("update_ranking_entries", pool_ids=pool_ids, stdout=StringIO())
+
+        GuessPool.bump_ranking_cache_version(pool_ids)
+        with self._measure("GuessPool.get_ranking_for_period", results):
+            for pool in pool_list:
+                pool.get_ranking_for_period(0, 0, 0)
+
+        return results
+
+    def _generate_base_data(
+        self, guessers_count: int, pools_count: int
+    ) -> tuple[Competition, list[Team], list[Guesser], list[GuessPool]]:
+        """Creates a competition with its teams, the guessers and the pools of the
+        competition, each guesser being a member of two pools"""
+
+        tag = uuid4().hex[:8]
+        next_data_source_id = (Competition.objects.aggregate(max_id=Max("data_source_id"))["max_id"] or 0) + 1
+        competition = Competition.objects.create(
+            name=f"Benchmark {tag}", data_source_id=next_data_source_id, sfi_id=f"benchmark-{tag}"
+        )
+        teams = Team.objects.bulk_create(
+            Team(name=f"Team {i} {tag}", sfi_id=f"benchmark-{tag}-team-{i}") for i in range(20)
+        )
+        competition.teams.add(*teams)
+
+        User = get_user_model()
+        users = User.objects.bulk_create(
+            User(username=f"benchmark-{tag}-{i}", email=f"benchmark-{tag}-{i}@example.com")
+            for i in range(guessers_count)
+        )
+        guessers = Guesser.objects.bulk_create(Guesser(user=user) for user in users)
+
+        # Pools must be older than their matches, which are dated in the last weeks
+        pools = [
+            GuessPool.objects.create(name=f"Benchmark {tag} {i}", slug=f"benchmark-{tag}-{i}", owner=guessers[0])
+            for i in range(pools_count)
+        ]
+        GuessPool.objects.filter(id__in=[pool.id for pool in pools]).update(
+            created=timezone.now() - timezone.timedelta(days=60)
+        )
+        for pool in pools:
+            pool.competitions.add(competition)
+
+        GuessPool.guessers.through.objects.bulk_create(
+            [
+                GuessPool.guessers.through(guesspool_id=pools[(i + offset) % pools_count].id, guesser_id=guesser.id)
+                for i, guesser in enumerate(guessers)
+                for offset in range(min(2, pools_count))
+            ],
+            ignore_conflicts=True,
+        )
+
+        return competition, teams, guessers, pools
+
+    def _generate_sfi_matches(self, competition: Competition, teams: list[Team], count: int) -> list[SFIMatch]:
+        """Returns SFI payloads of NOT_STARTED matches spread over the last four weeks"""
+
+        start = timezone.now() - timezone.timedelta(days=28)
+        step = timezone.timedelta(days=28) / count
+        sfi_matches = []
+
+        for i in range(count):
+            # Pairs of teams only repeat after every team has faced all the others
+            home_team = teams[i % len(teams)]
+            away_team = teams[(i + 1 + (i // len(teams)) % (len(teams) - 1)) % len(teams)]
+            kickoff = start + step * i  # in UTC, like the SFI dates
+            sfi_matches.append(
+                {
+                    "id": f"{competition.sfi_id}-match-{i}",
+                    "date": kickoff.strftime("%Y-%m-%d %H:%M:%S"),
+                    "status": SFIService.SFI_NOT_STARTED_STATUS,
+                    "championship": {"id": competition.sfi_id, "name": competition.name, "s_name": competition.name},
+                    "teamA": {"id": home_team.sfi_id, "name": home_team.name, "score": {"2h": None}},
+                    "teamB": {"id": away_team.sfi_id, "name": away_team.name, "score": {"2h": None}},
+                }
+            )
+
+        return sfi_matches
+
+    def _generate_guesses(
+        self, matches: list[Match], guessers: list[Guesser], pools: list[GuessPool], count: int, rng: random.Random
+    ) -> None:
+        """Creates count guesses, one per guesser and match, added to the pools of their guessers"""
+
+        guesses = Guess.objects.bulk_create(
+            islice(
+                (
+                    Guess(guesser=guesser, match=match, home_goals=rng.randint(0, 4), away_goals=rng.randint(0, 4))
+                    for guesser in guessers
+                    for match in matches
+                ),
+                count,
+            ),
+            batch_size=5000,
+        )
+
+        pool_ids_by_guesser = {}
+        for pool_id, guesser_id in GuessPool.guessers.through.objects.filter(guesspool__in=pools).values_list(
+            "guesspool_id", "guesser_id"
+        ):
+            pool_ids_by_guesser.setdefault(guesser_id, []).append(pool_id)
+
+        GuessPool.guesses.through.objects.bulk_create(
+            (
+                GuessPool.guesses.through(guesspool_id=pool_id, guess_id=guess.id)
+                for guess in guesses
+                for pool_id in pool_ids_by_guesser.get(guess.guesser_id, [])
+            ),
+            batch_size=5000,
+        )
+
+    @staticmethod
+    def _paginate(sfi_matches: list[SFIMatch]) -> list[list[SFIMatch]]:
+        return [list(page) for page in batched(sfi_matches, SFI_PAGE_SIZE)]
+
+    @contextmanager
+    def _measure(self, name: str, results: dict[str, dict]):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            yield
+            seconds = time.perf_counter() - start
+
+        results[name] = {"seconds": round(seconds, 4), "queries": len(queries)}
+
+    def _report(self, results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> int:
+        """Writes the results of each step next to its baseline, if any, and
+        returns the number of steps that regressed"""
+
+        regressions = 0
+        for name, result in results.items():
+            line = f"{name}: {result['seconds']:.3f}s, {result['queries']} queries"
+            expected = baseline.get(name)
+            if expected is None:
+                self.stdout.write(line)
+                continue
+
+            line += f" (baseline: {expected['seconds']:.3f}s, {expected['queries']} queries)"
+            max_seconds = max(expected["seconds"] * (1 + tolerance), expected["seconds"] + MIN_TIME_REGRESSION)
+            if result["queries"] > expected["queries"] or result["seconds"] > max_seconds:
+                regressions += 1
+                self.stdout.write(self.style.WARNING(f"{line} REGRESSION"))
+            else:
+                self.stdout.write(line)
+
+        return regressions
+
+    @staticmethod
+    def _load_baselines(path: Path) -> dict[str, dict]:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError as exc:
+            raise CommandError(f"Invalid baseline file {path}: {exc}") from exc
@@ -1,4 +1,5 @@
 from datetime import date
+from pathlib import Path
 from time import sleep
 
 from django.conf import settings
@@ -9,6 +10,7 @@ from django.utils import timezone
 from core.management.commands import create_or_update_teams_for_competitions
 from core.models import Competition, Match, Team
 from core.services.football import FootballApi
+from core.services.payloads import PayloadArchive
 
 
 class Command(BaseCommand):
@@ -27,6 +29,29 @@ class Command(BaseCommand):
             help="End date for searching matches (YYYY-MM-DD)",
             default=(timezone.now() + timezone.timedelta(days=3)).date(),
         )
+        parser.add_argument(
+            "--competition",
+            type=int,
+            action="append",
+            dest="competition_ids",
+            help="Id of a competition to update. Can be repeated. Defaults to all competitions in progress.",
+        )
+        payloads = parser.add_mutually_exclusive_group()
+        payloads.add_argument(
+            "--record-payloads",
+            type=Path,
+            metavar="DIRECTORY",
+            help="Save the matches returned by the API into DIRECTORY, one JSON file per competition.",
+        )
+        payloads.add_argument(
+            "--replay-payloads",
+            type=Path,
+            metavar="DIRECTORY",
+            help=(
+                "Process the matches recorded in DIRECTORY instead of calling the API, without "
+                "waiting between competitions. Matches of unregistered teams are skipped."
+            ),
+        )
 
     def handle(self, *args, **options):
         start_date = options.get("start_date")
@@ -37,75 +62,132 @@ class Command(BaseCommand):
         )
 
         competitions = Competition.objects.filter(in_progress=True)
+        if options.get("competition_ids"):
+            competitions = competitions.filter(id__in=options["competition_ids"])
         if not competitions.exists():
             self.stdout.write("There are no registered competitions in progress")
             return
 
-        for comp in competitions:
-            created, updated = [], []
+        record_archive = self._get_archive(options.get("record_payloads"))
+        replay_archive = self._get_archive(options.get("replay_payloads"))
 
+        for comp in competitions:
             try:
-                matches = FootballApi.get_matches_of_league_by_season_and_date_period(
-                    comp.data_source_id, comp.current_season, start_date, end_date
-                )
-                sleep(settings.FOOTBALL_API_REQUESTS_INTERVAL)
-
-                for match in matches:
-                    home_team = Team.objects.filter(
-                        data_source_id=match["teams"]["home"]["id"]
-                    ).first()
-                    away_team = Team.objects.filter(
-                        data_source_id=match["teams"]["away"]["id"]
-                    ).first()
-                    if home_team is None or away_team is None:
-                        self.stdout.write(
-                            f"Unregistered teams for match {match['fixture']['id']} in {comp}, "
-                            "Updating teams for this competition"
-                        )
-                        management.call_command(
-                            create_or_update_teams_for_competitions.Command(),
-                            comp.current_season,
-                            comp.data_source_id,
-                        )
-
-                        home_team = Team.objects.filter(
-                            data_source_id=match["teams"]["home"]["id"]
-                        ).first()
-                        away_team = Team.objects.filter(
-                            data_source_id=match["teams"]["away"]["id"]
-                        ).first()
-                        if home_team is None or away_team is None:
-                            self.stderr.write(
-                                f"Teams not found for match {match['fixture']['id']} in {comp}, "
-                                "skipping match creation"
-                            )
-                            continue
-
-                    match_data = parse_match_data(match)
-                    match_data["competition"] = comp
-                    match_data["home_team"] = home_team
-                    match_data["away_team"] = away_team
-
-                    match_instance, created_instance = Match.objects.update_or_create(
-                        data_source_id=match_data["data_source_id"],
-                        defaults=match_data,
-                    )
-
-                    if created_instance:
-                        created.append(match_instance)
-
-                    else:
-                        updated.append(match_instance)
-
-                self.stdout.write(
-                    f"{len(created)} matches created and {len(updated)} updated matches for {comp}"
+                matches = self._get_matches(
+                    comp, start_date, end_date, record_archive, replay_archive
                 )
+                # Teams can't be fetched from the API when replaying
+                self._update_matches(comp, matches, fetch_missing=replay_archive is None)
 
             except Exception as e:
                 self.stderr.write(f"Error when updating {comp}: {e}")
 
         self.stdout.write("Competitions update done")
 
+    def _update_matches(
+        self, comp: Competition, matches: list[dict], fetch_missing: bool
+    ) -> None:
+        """Creates the matches of comp that aren't registered yet and saves the
+        registered ones that changed"""
+
+        created, updated, unchanged = [], [], []
+        existing_matches = {
+            match.data_source_id: match
+            for match in Match.objects.filter(
+                data_source_id__in=[match["fixture"]["id"] for match in matches]
+            )
+        }
+
+        for match in matches:
+            home_team, away_team = self._get_teams(match, comp, fetch_missing)
+            if home_team is None or away_team is None:
+                self.stderr.write(
+                    f"Teams not found for match {match['fixture']['id']} in {comp}, "
+                    "skipping match creation"
+                )
+                continue
+
+            match_data = parse_match_data(match)
+            match_data["competition_id"] = comp.id
+            match_data["home_team_id"] = home_team.id
+            match_data["away_team_id"] = away_team.id
+
+            # Existing matches are only saved (and so rescored and
+            # flagged as updated) when some field actually changed
+            match_instance = existing_matches.get(match_data["data_source_id"])
+            if match_instance is None:
+                created.append(Match.objects.create(**match_data))
+
+            elif changed_fields := match_instance.update_fields_from(match_data):
+                match_instance.save(update_fields=changed_fields)
+                updated.append(match_instance)
+
+            else:
+                unchanged.append(match_instance)
+
+        self.stdout.write(
+            f"{len(created)} matches created, {len(updated)} updated and "
+            f"{len(unchanged)} unchanged matches for {comp}"
+        )
+
+    def _get_teams(
+        self, match: dict, comp: Competition, fetch_missing: bool
+    ) -> tuple[Team | None, Team | None]:
+        """Returns the registered home and away teams of match. When some is
+        missing and fetch_missing is set, updates the teams of comp from the
+        Football API and looks them up again"""
+
+        home_team = Team.objects.filter(data_source_id=match["teams"]["home"]["id"]).first()
+        away_team = Team.objects.filter(data_source_id=match["teams"]["away"]["id"]).first()
+        if (home_team is not None and away_team is not None) or not fetch_missing:
+            return home_team, away_team
+
+        self.stdout.write(
+            f"Unregistered teams for match {match['fixture']['id']} in {comp}, "
+            "Updating teams for this competition"
+        )
+        management.call_command(
+            create_or_update_teams_for_competitions.Command(),
+            comp.current_season,
+            comp.data_source_id,
+        )
+
+        return (
+            Team.objects.filter(data_source_id=match["teams"]["home"]["id"]).first(),
+            Team.objects.filter(data_source_id=match["teams"]["away"]["id"]).first(),
+        )
+
+    @staticmethod
+    def _get_archive(directory: Path | None) -> PayloadArchive | None:
+        return PayloadArchive(directory) if directory else None
+
+    def _get_matches(
+        self,
+        comp: Competition,
+        start_date: date,
+        end_date: date,
+        record_archive: PayloadArchive | None,
+        replay_archive: PayloadArchive | None,
+    ) -> list[dict]:
+        """Fetches the matches of comp in the period from the Football API, or
+        loads the ones recorded in replay_archive when given"""
+
+        name = PayloadArchive.get_football_fixtures_name(
+            comp.data_source_id, comp.current_season, start_date, end_date
+        )
+        if replay_archive is not None:
+            return replay_archive.load(name)
+
+        matches = FootballApi.get_matches_of_league_by_season_and_date_period(
+            comp.data_source_id, comp.current_season, start_date, end_date
+        )
+        sleep(settings.FOOTBALL_API_REQUESTS_INTERVAL)
+
+        if record_archive is not None:
+            record_archive.save(name, matches)
+
+        return matches
+
 
 # TODO: mover para arquivo utils do service
 def parse_match_data(match_raw_data: dict) -> dict:
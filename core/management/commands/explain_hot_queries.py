@@ -0,0 +1,119 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from core.models import (
+    Guess,
+    Guesser,
+    GuessPool,
+    Match,
+    NotificationEvent,
+    RankingEntry,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs EXPLAIN on the canonical queries of the app and reports the ones planned with sequential "
+        "scans, to check that the hot filters are covered by indexes as data grows."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--prefer-indexes",
+            action="store_true",
+            help=(
+                "Discourage sequential scans in the planner (enable_seqscan = off), so a reported seq scan "
+                "means no index can serve the query. Useful on small databases, where seq scans are cheaper."
+            ),
+        )
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Run EXPLAIN ANALYZE, which executes the queries and reports the actual timings.",
+        )
+        parser.add_argument(
+            "--fail-on-seq-scan",
+            action="store_true",
+            help="Exit with an error when any query is planned with a sequential scan.",
+        )
+
+    def handle(self, *args, **options):
+        queries = self._get_canonical_queries()
+        queries_with_seq_scan = 0
+
+        for name, queryset in queries.items():
+            plan = self._explain(queryset, options["prefer_indexes"], options["analyze"])
+            seq_scans = sorted(self._find_seq_scans(plan))
+            timing = f" ({plan['Execution Time']:.2f} ms)" if options["analyze"] else ""
+
+            if seq_scans:
+                queries_with_seq_scan += 1
+                self.stdout.write(self.style.WARNING(f"{name}{timing}: seq scan on {', '.join(seq_scans)}"))
+            else:
+                self.stdout.write(f"{name}{timing}: OK")
+
+        summary = f"{queries_with_seq_scan} of {len(queries)} queries planned with sequential scans."
+        if queries_with_seq_scan and options["fail_on_seq_scan"]:
+            raise CommandError(summary)
+
+        self.stdout.write(self.style.SUCCESS(summary) if not queries_with_seq_scan else summary)
+
+    def _get_canonical_queries(self) -> dict[str, QuerySet]:
+        """Returns the hot queries of the app, built with the same model methods
+        used by views and commands. Existing rows are used as parameters when
+        available, since values affect the chosen plans"""
+
+        pool = GuessPool.objects.order_by("-id").first() or GuessPool(id=0)
+        guesser = Guesser.objects.order_by("-id").first() or Guesser(id=0)
+        match = Match.objects.order_by("-id").first() or Match(id=0, competition_id=0)
+        today = timezone.localdate()
+
+        return {
+            "Open matches of a pool": pool.get_open_matches(),
+            "Closed recent matches of a pool": pool.get_closed_recent_matches(),
+            "Played matches of a pool in a period": pool.get_finished_or_in_progress_matches_on_period(
+                today - timezone.timedelta(days=7), today
+            ),
+            "Pools of a match": match.get_pools(),
+            "Matches of a competition in a period": Match.objects.filter(
+                competition_id=match.competition_id,
+                date_time__gte=timezone.now() - timezone.timedelta(days=1),
+                date_time__lt=timezone.now() + timezone.timedelta(days=1),
+            ),
+            "Guesses of a guesser for a match": Guess.objects.filter(match=match, guesser=guesser),
+            "Pools of a guesser with pending flag": guesser.get_involved_pools_with_pending_flag(),
+            "Ranking entries of a pool period": RankingEntry.objects.filter(
+                pool=pool, year=today.year, month=today.month, week=0
+            ).order_by("-score"),
+            "Ranking of a pool period": pool.get_ranking_queryset(today.year, today.month, 0),
+            "Notification events after a cursor": NotificationEvent.objects.filter(
+                type=NotificationEvent.NEW_MATCH, id__gt=0
+            ),
+        }
+
+    def _explain(self, queryset: QuerySet, prefer_indexes: bool, analyze: bool) -> dict:
+        with transaction.atomic():
+            if prefer_indexes:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            result = queryset.explain(format="json", analyze=analyze)
+
+        return json.loads(result)[0]
+
+    def _find_seq_scans(self, plan: dict) -> set[str]:
+        """Returns the relations read with sequential scans anywhere in plan"""
+
+        seq_scans = set()
+        nodes = [plan["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            if node["Node Type"] == "Seq Scan":
+                seq_scans.add(node["Relation Name"])
+            nodes.extend(node.get("Plans", []))
+
+        return seq_scans
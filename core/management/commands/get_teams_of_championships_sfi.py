@@ -6,17 +6,23 @@ Soccer Football Info (SFI) API and writes a merged JSON output file.
 The command keeps the same merge semantics as the original standalone script:
 if a championship ID is already present in the output, its entry is replaced;
 otherwise a new entry is appended.
+
+Championships are fetched concurrently within the SFI rate limit.
 """
 
+import asyncio
 import json
 import logging
+from collections import Counter
 from pathlib import Path
-from time import sleep
+from typing import Iterable
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError, CommandParser
 
-from core.services.sfi import SFIChampionshipTeamsResponse, SFIService
+from core.services.rate_limiter import TokenBucket
+from core.services.response_cache import ResponseCache
+from core.services.sfi import AsyncSFIService, SFIChampionshipTeamsResponse
 
 logger = logging.getLogger(__name__)
 
@@ -53,8 +59,12 @@ class Command(BaseCommand):
         parser.add_argument(
             "--sleep-seconds",
             type=float,
-            default=5,
-            help="Seconds to wait between championship requests (default: 5).",
+            default=settings.SFI_API_REQUESTS_INTERVAL,
+            help=(
+                "Average seconds between championship requests, allowing bursts of "
+                "SFI_API_REQUESTS_BURST requests; 0 disables the rate limit "
+                f"(default: {settings.SFI_API_REQUESTS_INTERVAL})."
+            ),
         )
 
     def handle(self, *args, **options) -> None:
@@ -68,71 +78,108 @@ class Command(BaseCommand):
         output = self._load_output_file(output_path)
         output_index = {entry["id"]: i for i, entry in enumerate(output) if "id" in entry}
 
-        service = SFIService(api_key=settings.SFI_API_KEY, api_host=settings.SFI_API_HOST)
-
-        processed = 0
-        appended = 0
-        replaced = 0
-        failed = 0
+        response_cache = ResponseCache()
+        service = self._build_service(sleep_seconds, response_cache)
+        stats = Counter()
 
         self.stdout.write(
             f"get_teams_of_championships_sfi: processing {len(championships)} championship(s) " f"for season {year}."
         )
 
+        valid_championships = []
         for championship in championships:
-            champ_id = championship.get("id")
-            champ_name = championship.get("name", "")
-
-            if not champ_id:
+            if not championship.get("id"):
                 logger.warning("Skipping championship without 'id': %s", championship)
-                failed += 1
+                stats["failed"] += 1
                 continue
+            valid_championships.append(championship)
 
-            try:
-                logger.info("Buscando times do championship %r (%s)", champ_name, champ_id)
-
-                response = service.get_teams_of_championship(championship_id=champ_id, year=year)
-                teams = self._extract_teams(response, year)
-
-                if not teams:
-                    logger.warning(
-                        "Nenhum time encontrado para a temporada %s em %r",
-                        year,
-                        champ_name,
-                    )
-
-                entry = {
-                    "id": champ_id,
-                    "name": champ_name,
-                    "teams": teams,
-                }
-
-                if champ_id in output_index:
-                    output[output_index[champ_id]] = entry
-                    replaced += 1
-                    logger.info("Sobrescrevendo entrada existente para %r", champ_name)
-                else:
-                    output_index[champ_id] = len(output)
-                    output.append(entry)
-                    appended += 1
-
-                processed += 1
-
-            except Exception as exc:  # noqa: BLE001 - keep script parity: log and continue.
-                failed += 1
-                logger.warning("Erro ao processar championship %r: %s", champ_name, exc)
-            finally:
-                if sleep_seconds > 0:
-                    sleep(sleep_seconds)
+        # Responses (or the errors raised) come in input order, so the merge keeps it
+        responses = asyncio.run(self._fetch_teams(service, valid_championships, year))
+        self._merge_responses(output, output_index, zip(valid_championships, responses), year, stats)
 
         self._save_output_file(output_path, output)
 
         self.stdout.write(
-            f"Concluido: {processed} processado(s), {appended} adicionado(s), "
-            f"{replaced} sobrescrito(s), {failed} falha(s)."
+            f"Concluido: {stats['processed']} processado(s), {stats['appended']} adicionado(s), "
+            f"{stats['replaced']} sobrescrito(s), {stats['failed']} falha(s) ({response_cache.get_summary()})."
         )
         self.stdout.write(f"Arquivo salvo em: {output_path}")
 
+    @staticmethod
+    def _build_service(sleep_seconds: float, response_cache: ResponseCache) -> AsyncSFIService:
+        """Build the SFI client, rate limited to one request every sleep_seconds on average (unlimited when 0)."""
+        rate_limiter = None
+        if sleep_seconds > 0:
+            rate_limiter = TokenBucket(rate=1 / sleep_seconds, capacity=settings.SFI_API_REQUESTS_BURST)
+
+        return AsyncSFIService(
+            api_key=settings.SFI_API_KEY,
+            api_host=settings.SFI_API_HOST,
+            rate_limiter=rate_limiter,
+            max_concurrency=settings.SFI_API_MAX_WORKERS,
+            response_cache=response_cache,
+        )
+
+    def _merge_responses(
+        self,
+        output: list[dict],
+        output_index: dict[str, int],
+        results: Iterable[tuple[dict, SFIChampionshipTeamsResponse | Exception]],
+        year: int,
+        stats: Counter,
+    ) -> None:
+        """Merge the teams of each fetched championship into output, replacing its entry when present."""
+        for championship, response in results:
+            champ_id = championship["id"]
+            champ_name = championship.get("name", "")
+
+            if isinstance(response, Exception):
+                stats["failed"] += 1
+                logger.warning("Erro ao processar championship %r: %s", champ_name, response)
+                continue
+
+            teams = self._extract_teams(response, year)
+
+            if not teams:
+                logger.warning(
+                    "Nenhum time encontrado para a temporada %s em %r",
+                    year,
+                    champ_name,
+                )
+
+            entry = {
+                "id": champ_id,
+                "name": champ_name,
+                "teams": teams,
+            }
+
+            if champ_id in output_index:
+                output[output_index[champ_id]] = entry
+                stats["replaced"] += 1
+                logger.info("Sobrescrevendo entrada existente para %r", champ_name)
+            else:
+                output_index[champ_id] = len(output)
+                output.append(entry)
+                stats["appended"] += 1
+
+            stats["processed"] += 1
+
+    @staticmethod
+    async def _fetch_teams(
+        service: AsyncSFIService,
+        championships: list[dict],
+        year: int,
+    ) -> list[SFIChampionshipTeamsResponse | Exception]:
+        """Fetch the teams of all championships concurrently, returning the
+        response or the raised error of each one, in the same order."""
+
+        async def fetch(championship: dict) -> SFIChampionshipTeamsResponse:
+            logger.info("Buscando times do championship %r (%s)", championship.get("name", ""), championship["id"])
+            return await service.get_teams_of_championship(championship_id=championship["id"], year=year)
+
+        return await asyncio.gather(*(fetch(championship) for championship in championships), return_exceptions=True)
+
     @staticmethod
     def _load_input_file(input_path: Path) -> list[dict]:
         """Load the input championships list or raise a command error."""
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+
+from core.models import Match
+
+LAST_POLL_CACHE_KEY = "live_polling:last_poll"
+
+# Ticks are not perfectly aligned, so a poll due in less than this is
+# anticipated instead of being delayed until the next tick
+POLLING_TOLERANCE = timezone.timedelta(seconds=30)
+
+
+class Command(BaseCommand):
+    help = (
+        "Updates the matches in play with the Football API, polling more often as they approach full time. "
+        "Meant to run every minute: it makes no API calls while no tracked match is live."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Poll the live matches even if the last poll is more recent than the polling interval.",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        live_matches = list(Match.get_live(now))
+
+        if not live_matches:
+            self.stdout.write("No tracked matches in play")
+            return
+
+        interval = min(match.get_live_polling_interval(now) for match in live_matches)
+        last_poll = cache.get(LAST_POLL_CACHE_KEY)
+
+        if not options["force"] and last_poll is not None and now - last_poll < interval - POLLING_TOLERANCE:
+            self.stdout.write(f"{len(live_matches)} matches in play, next poll in {interval - (now - last_poll)}")
+            return
+
+        cache.set(LAST_POLL_CACHE_KEY, now, timeout=Match.LIVE_POLLING_WINDOW_MINUTES * 60)
+
+        # Football API fixtures are requested by dates of the local timezone
+        match_dates = [timezone.localdate(match.date_time) for match in live_matches]
+        competition_ids = sorted({match.competition_id for match in live_matches})
+
+        self.stdout.write(f"Polling {len(live_matches)} matches in play (interval: {interval})")
+        call_command(
+            "create_and_update_matches",
+            start_date=min(match_dates),
+            end_date=max(match_dates),
+            competition_ids=competition_ids,
+            stdout=self.stdout,
+            stderr=self.stderr,
+        )
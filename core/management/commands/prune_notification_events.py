@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import NotificationEvent
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the notification events already consumed by every notifier, and the ones older "
+        "than NOTIFICATION_EVENTS_RETENTION_DAYS."
+    )
+
+    def handle(self, *args, **options):
+        deleted = NotificationEvent.prune(timezone.timedelta(days=settings.NOTIFICATION_EVENTS_RETENTION_DAYS))
+        self.stdout.write(f"{deleted} notification events pruned.")
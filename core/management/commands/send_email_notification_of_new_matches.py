@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 
-from core.models import Guesser, GuessPool
+from core.models import Guesser
 from core.notifiers import NewMatchesEmailNotifier
 
 
@@ -13,7 +13,6 @@ class Command(BaseCommand):
         if guessers.exists():
             notifier = NewMatchesEmailNotifier(guessers)
             if notifier.prepare_and_send_notifications():
-                GuessPool.toggle_flag_value("new_matches")
                 self.stdout.write("Email notifications of new matches have been sent.")
 
             else:
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 
-from core.models import Guesser, GuessPool
+from core.models import Guesser
 from core.notifiers import UpdatedMatchesEmailNotifier
 
 
@@ -13,7 +13,6 @@ class Command(BaseCommand):
         if guessers.exists():
             notifier = UpdatedMatchesEmailNotifier(guessers)
             if notifier.prepare_and_send_notifications():
-                GuessPool.toggle_flag_value("updated_matches")
                 self.stdout.write(
                     "Email notifications of updated matches have been sent."
                 )
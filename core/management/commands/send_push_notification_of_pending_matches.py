@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Guesser
+from core.notifiers import PendingMatchesPushNotifier
+from core.services.push import PushService
+
+
+class Command(BaseCommand):
+    help = "Send a push notification informing all guessers that there are pending matches in pools they are involved with."
+
+    def handle(self, *args, **options):
+        service = PushService.from_settings()
+        if service is None:
+            self.stdout.write("Push notifications are not configured.")
+            return
+
+        guessers = Guesser.get_who_should_be_notified_by_push()
+
+        if guessers.exists():
+            notifier = PendingMatchesPushNotifier(guessers, service)
+            if notifier.prepare_and_send_notifications():
+                self.stdout.write("Push notifications of pending matches have been sent.")
+
+            else:
+                self.stdout.write("No pools with pending matches to notificate.")
+
+        else:
+            self.stdout.write("No guessers to notificate.")
@@ -4,22 +4,37 @@ Fetches matches from the Soccer Football Info (SFI) API for a configurable
 date range and upserts them into the database.
 
 Default window: yesterday through the two days after today (4 dates total).
+Days and pages are fetched concurrently within the SFI rate limit and each
+page is processed as soon as it arrives.
 Matches from competitions not registered with an SFI ID are silently skipped.
 Teams not found for a tracked competition are created and linked automatically.
+Each page is written with a few bulk statements.
+Responses of settled days are cached, so re-running over past dates makes no API calls.
 """
 
+import asyncio
 import logging
+from collections import Counter
 from datetime import date, datetime, timedelta, timezone
 from enum import StrEnum
 from math import ceil
-from time import sleep
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Iterator
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
 from django.utils import timezone as django_timezone
 
 from core.models import Competition, Match, Team
-from core.services.sfi import SFIMatch, SFIService
+from core.services.payloads import (
+    PayloadArchive,
+    RecordingSFIService,
+    ReplayedSFIService,
+)
+from core.services.rate_limiter import TokenBucket
+from core.services.response_cache import ResponseCache
+from core.services.sfi import AsyncSFIService, SFIMatch, SFIMatchesResponse, SFIService
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +42,7 @@ logger = logging.getLogger(__name__)
 class ProcessMatchResult(StrEnum):
     created = "created"
     updated = "updated"
+    unchanged = "unchanged"
     skipped = "skipped"
 
 
@@ -58,6 +74,22 @@ class Command(BaseCommand):
             help="End of the date range to process (YYYY-MM-DD). Defaults to 2 days from now.",
             default=None,
         )
+        payloads = parser.add_mutually_exclusive_group()
+        payloads.add_argument(
+            "--record-payloads",
+            type=Path,
+            metavar="DIRECTORY",
+            help="Save the raw API responses into DIRECTORY, one JSON file per date and page.",
+        )
+        payloads.add_argument(
+            "--replay-payloads",
+            type=Path,
+            metavar="DIRECTORY",
+            help=(
+                "Process the responses recorded in DIRECTORY instead of calling the API, with no rate limit. "
+                "Pages that were not recorded are reported as failed."
+            ),
+        )
 
     def handle(self, *args, **options) -> None:
         """Entry point; orchestrates date iteration and match processing."""
@@ -76,12 +108,52 @@ class Command(BaseCommand):
 
         self.stdout.write(f"sync_matches_sfi: processing {len(dates)} date(s): {dates[0]} → {dates[-1]}")
 
-        service = SFIService(api_key=settings.SFI_API_KEY, api_host=settings.SFI_API_HOST)
+        self._preload_teams()
 
-        for target_date in dates:
-            self._process_date(service, target_date, competitions_by_sfi_id, today)
+        response_cache = ResponseCache()
+        if options["replay_payloads"]:
+            service = ReplayedSFIService(PayloadArchive(options["replay_payloads"]))
+        else:
+            rate_limiter = TokenBucket(
+                rate=1 / settings.SFI_API_REQUESTS_INTERVAL,
+                capacity=settings.SFI_API_REQUESTS_BURST,
+            )
+            service = AsyncSFIService(
+                api_key=settings.SFI_API_KEY,
+                api_host=settings.SFI_API_HOST,
+                rate_limiter=rate_limiter,
+                max_concurrency=settings.SFI_API_MAX_WORKERS,
+                response_cache=response_cache,
+            )
+            if options["record_payloads"]:
+                service = RecordingSFIService(service, PayloadArchive(options["record_payloads"]))
+
+        # Pages are fetched concurrently by the async client and processed here,
+        # outside the event loop, as soon as each one arrives.
+        stats_by_date = {target_date: Counter() for target_date in dates}
+        for target_date, matches in self._fetch_pages(service, dates):
+            self._process_matches(matches, competitions_by_sfi_id, stats_by_date[target_date])
+
+        for target_date, stats in stats_by_date.items():
+            self.stdout.write(
+                f"  {target_date}: {stats[ProcessMatchResult.created]} created, "
+                f"{stats[ProcessMatchResult.updated]} updated, {stats[ProcessMatchResult.unchanged]} unchanged, "
+                f"{stats[ProcessMatchResult.skipped]} skipped, "
+                f"{stats['teams_created']} teams registered."
+            )
 
-        self.stdout.write("sync_matches_sfi finished.")
+        if options["replay_payloads"]:
+            self.stdout.write(f"sync_matches_sfi finished (replayed from {options['replay_payloads']}).")
+        else:
+            self.stdout.write(f"sync_matches_sfi finished ({response_cache.get_summary()}).")
+
+    def _preload_teams(self) -> None:
+        """Load the known teams and competition links once, so matches are
+        resolved in memory and only missing ones are written."""
+        self._teams_by_sfi_id: dict[str, Team] = Team.objects.filter(sfi_id__isnull=False).in_bulk(field_name="sfi_id")
+        self._competition_team_links: set[tuple[int, int]] = set(
+            Competition.teams.through.objects.values_list("competition_id", "team_id")
+        )
 
     def _build_date_list(self, options: dict, today: date) -> list[date]:
         """Return the ordered list of dates to process based on CLI options.
@@ -99,195 +171,296 @@ class Command(BaseCommand):
 
         return [start + timedelta(days=i) for i in range((end - start).days + 1)]
 
-    def _process_date(
+    def _fetch_pages(
         self,
-        service: SFIService,
-        target_date: date,
-        competitions_by_sfi_id: dict[str, Competition],
-        today: date,
-    ) -> None:
-        """Fetch and process all SFI matches for a single calendar day."""
-        self.stdout.write(f"  Fetching matches for {target_date}...")
+        service: AsyncSFIService | RecordingSFIService | ReplayedSFIService,
+        dates: list[date],
+    ) -> Iterator[tuple[date, list[SFIMatch]]]:
+        """Fetch the SFI matches of all *dates* concurrently, yielding ``(date, matches)`` per page as it arrives.
+
+        Pages are fetched by the async client on an event loop that runs only
+        while waiting for the next page, so the caller processes each page
+        synchronously (the ORM must not run inside the loop) while the requests
+        already in flight keep going.
+        """
+        with asyncio.Runner() as runner:
+            pages = self._fetch_pages_async(service, dates)
+
+            async def next_page() -> tuple[date, list[SFIMatch]]:
+                return await anext(pages)
+
+            try:
+                while True:
+                    try:
+                        page = runner.run(next_page())
+                    except StopAsyncIteration:
+                        return
+                    yield page
+            finally:
+                # Don't keep fetching when processing fails
+                runner.run(pages.aclose())
+
+    async def _fetch_pages_async(
+        self,
+        service: AsyncSFIService | RecordingSFIService | ReplayedSFIService,
+        dates: list[date],
+    ) -> AsyncIterator[tuple[date, list[SFIMatch]]]:
+        """Request the first page of all *dates* at once, yielding ``(date, matches)`` per page as it arrives.
 
-        try:
-            matches = self._fetch_all_matches_for_date(service, target_date, today)
-        except Exception:
-            logger.exception("Failed to fetch SFI matches for %s.", target_date)
-            self.stderr.write(f"  ERROR: could not fetch matches for {target_date}, skipping.")
-            return
+        For past dates the API responds with all results on a single page
+        (``pagination`` is an empty list).  For present and future dates the
+        response is paginated at 25 items per page, so the remaining pages of a
+        date are requested as soon as its first page tells how many there are.
+        Pagination is read from the responses rather than from the dates, so
+        replayed pages of dates that are now past are still all requested.
+
+        The service bounds the concurrent requests and its rate limiter keeps
+        them within the API quota.  A failed page is logged and skipped without
+        affecting the other pages.
+        """
+        pending: dict[asyncio.Task, tuple[date, int]] = {}
 
-        created, updated, skipped, teams_created = 0, 0, 0, 0
+        try:
+            for target_date in dates:
+                self._request_page(service, pending, target_date, 1)
 
-        for match in matches:
-            outcome, created_teams_for_match = self._process_match(match, competitions_by_sfi_id)
-            teams_created += created_teams_for_match
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
 
-            if outcome == ProcessMatchResult.created:
-                created += 1
-            elif outcome == ProcessMatchResult.updated:
-                updated += 1
-            else:
-                skipped += 1
+                for task in done:
+                    target_date, page = pending.pop(task)
+                    matches = self._get_page_matches(service, pending, task, target_date, page)
+                    if matches is not None:
+                        yield target_date, matches
 
-        self.stdout.write(
-            f"  {target_date}: {created} created, {updated} updated, {skipped} skipped, "
-            f"{teams_created} teams registered."
-        )
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
 
-    def _fetch_all_matches_for_date(self, service: SFIService, target_date: date, today: date) -> list[SFIMatch]:
-        """Return every SFI match for *target_date*, handling pagination transparently.
+    def _request_page(
+        self,
+        service: AsyncSFIService | RecordingSFIService | ReplayedSFIService,
+        pending: dict[asyncio.Task, tuple[date, int]],
+        target_date: date,
+        page: int,
+        total_pages: int | None = None,
+    ) -> None:
+        """Schedule the request of a page of *target_date*, tracking its task in *pending*."""
+        page_label = f"{page}/{total_pages}" if total_pages else page
+        self.stdout.write(f"    → GET matches {target_date} (page {page_label})")
+        pending[asyncio.create_task(service.get_matches_by_day(target_date, page))] = (target_date, page)
 
-        For past dates the API responds with all results on a single page
-        (``pagination`` is an empty list).  For present and future dates the
-        response is paginated at 25 items per page, so we iterate until all
-        pages are consumed.
+    def _get_page_matches(
+        self,
+        service: AsyncSFIService | RecordingSFIService | ReplayedSFIService,
+        pending: dict[asyncio.Task, tuple[date, int]],
+        task: asyncio.Task,
+        target_date: date,
+        page: int,
+    ) -> list[SFIMatch] | None:
+        """Return the matches of a finished page request (None when it failed).
 
-        A short sleep between paginated requests respects the API rate limit
-        defined by ``settings.SFI_API_REQUESTS_INTERVAL``.
+        The first page of a date tells how many pages it has, so the remaining
+        ones are requested right away.
         """
-        is_past = target_date < today
+        try:
+            response = task.result()
+        except Exception:
+            logger.exception("Failed to fetch SFI matches for %s (page %s).", target_date, page)
+            self.stderr.write(f"  ERROR: could not fetch matches for {target_date} (page {page}), skipping.")
+            return None
 
-        if is_past:
-            # Single-page response — pagination field will be [].
-            self.stdout.write(f"    → GET matches {target_date} (page 1, past date)")
-            response = service.get_matches_by_day(target_date, page=1)
-            return response.get("result", [])
+        if page == 1:
+            total_pages = self._count_pages(response)
+            for next_page in range(2, total_pages + 1):
+                self._request_page(service, pending, target_date, next_page, total_pages)
 
-        # Present or future: paginated response.
-        self.stdout.write(f"    → GET matches {target_date} (page 1)")
-        first_page = service.get_matches_by_day(target_date, page=1)
-        matches: list[SFIMatch] = list(first_page.get("result", []))
+        return response.get("result", [])
 
-        pagination = first_page.get("pagination", [])
+    @staticmethod
+    def _count_pages(response: SFIMatchesResponse) -> int:
+        """Return the number of pages of a paginated response (1 when it is not paginated)."""
+        pagination = response.get("pagination", [])
         if not pagination:
-            # Unexpected: treat as a single page.
-            return matches
-
-        total_items: int = pagination[0]["items"]
-        per_page: int = pagination[0]["per_page"]
-        total_pages: int = ceil(total_items / per_page)
-
-        for page in range(2, total_pages + 1):
-            sleep(settings.SFI_API_REQUESTS_INTERVAL)
-            self.stdout.write(f"    → GET matches {target_date} (page {page}/{total_pages})")
-            response = service.get_matches_by_day(target_date, page=page)
-            matches.extend(response.get("result", []))
+            return 1
 
-        return matches
+        return ceil(pagination[0]["items"] / pagination[0]["per_page"])
 
-    def _process_match(
+    def _process_matches(
         self,
-        match: SFIMatch,
+        matches: list[SFIMatch],
         competitions_by_sfi_id: dict[str, Competition],
-    ) -> tuple[ProcessMatchResult, int]:
-        """Process a single SFI match dict and apply the appropriate DB operation.
+        stats: Counter,
+    ) -> None:
+        """Upsert a batch (page) of SFI matches with a handful of bulk statements.
 
-        Returns a tuple ``(result, teams_created)`` where ``result`` is one of
-        ``"created"``, ``"updated"``, or ``"skipped"``.
+        Missing teams and competition links are created first. Then NOT_STARTED
+        matches are upserted by ``sfi_id`` and ENDED matches already in the
+        database get their results.  The side effects of ``Match.save`` (pool
+        memberships, scoring and pool flags) run once for the whole batch.
+        Outcomes are accumulated into *stats*.
         """
-        competition = competitions_by_sfi_id.get(match["championship"]["id"])
-        if competition is None:
-            # Not a tracked competition — silently ignore.
-            return ProcessMatchResult.skipped, 0
-
-        status = match["status"]
-
-        if status not in SFIService.SFI_MATCH_STATUSES:
-            logger.warning("Skipping match %s with unhandled status '%s'.", match["id"], status)
-            return ProcessMatchResult.skipped, 0
-
-        home_team, home_team_created = self._get_or_create_competition_team(
-            match_id=match["id"],
-            side="home",
-            team_sfi_id=match["teamA"]["id"],
-            team_name=match["teamA"]["name"],
-            competition=competition,
-        )
-        away_team, away_team_created = self._get_or_create_competition_team(
-            match_id=match["id"],
-            side="away",
-            team_sfi_id=match["teamB"]["id"],
-            team_name=match["teamB"]["name"],
-            competition=competition,
-        )
+        tracked_matches: dict[str, tuple[SFIMatch, Competition]] = {}
 
-        teams_created = int(home_team_created) + int(away_team_created)
+        for match in matches:
+            competition = competitions_by_sfi_id.get(match["championship"]["id"])
+            if competition is None:
+                # Not a tracked competition — silently ignore.
+                stats[ProcessMatchResult.skipped] += 1
+            elif match["status"] not in SFIService.SFI_MATCH_STATUSES:
+                logger.warning("Skipping match %s with unhandled status '%s'.", match["id"], match["status"])
+                stats[ProcessMatchResult.skipped] += 1
+            else:
+                tracked_matches[match["id"]] = (match, competition)
 
-        if status == SFIService.SFI_NOT_STARTED_STATUS:
-            return self._upsert_not_started_match(match, competition, home_team, away_team), teams_created
+        if not tracked_matches:
+            return
 
-        return self._update_ended_match(match), teams_created
+        with transaction.atomic():
+            stats["teams_created"] += self._register_teams(tracked_matches.values())
 
-    def _get_or_create_competition_team(
-        self,
-        match_id: str,
-        side: str,
-        team_sfi_id: str,
-        team_name: str,
-        competition: Competition,
-    ) -> tuple[Team, bool]:
-        """Return a team by SFI ID, creating and linking it to the competition when needed."""
-        team, created = Team.objects.get_or_create(
-            sfi_id=team_sfi_id,
-            defaults={"name": team_name},
-        )
+            existing_matches = Match.objects.in_bulk(tracked_matches.keys(), field_name="sfi_id")
+            not_started = [
+                (match, competition)
+                for match, competition in tracked_matches.values()
+                if match["status"] == SFIService.SFI_NOT_STARTED_STATUS
+            ]
+            ended = [match for match, _ in tracked_matches.values() if match["status"] == SFIService.SFI_ENDED_STATUS]
+
+            created, updated = self._upsert_not_started_matches(not_started, existing_matches)
+            updated += self._update_ended_matches(ended, existing_matches)
 
-        if not competition.teams.filter(pk=team.pk).exists():
-            competition.teams.add(team)
+            Match.run_bulk_save_side_effects(created, updated)
 
-        if created:
-            msg = (
-                f"    NEW TEAM: created {team_name} (sfi_id={team_sfi_id}) "
-                f"for competition '{competition}' while processing match {match_id} ({side})."
+        unchanged_count = len(existing_matches) - sum(match.sfi_id in existing_matches for match in updated)
+        stats[ProcessMatchResult.created] += len(created)
+        stats[ProcessMatchResult.updated] += len(updated)
+        stats[ProcessMatchResult.unchanged] += unchanged_count
+        stats[ProcessMatchResult.skipped] += len(tracked_matches) - len(created) - len(updated) - unchanged_count
+
+    def _register_teams(self, tracked_matches: Iterable[tuple[SFIMatch, Competition]]) -> int:
+        """Create the teams and competition links of the matches missing from the preloaded maps.
+
+        Returns the number of teams created.
+        """
+        new_teams: dict[str, tuple[Team, str, str, Competition]] = {}
+        for match, competition in tracked_matches:
+            for side, team_ref in (("home", match["teamA"]), ("away", match["teamB"])):
+                if team_ref["id"] not in self._teams_by_sfi_id and team_ref["id"] not in new_teams:
+                    team = Team(sfi_id=team_ref["id"], name=team_ref["name"])
+                    new_teams[team_ref["id"]] = (team, match["id"], side, competition)
+
+        if new_teams:
+            # ignore_conflicts doesn't set primary keys, so created teams are read back
+            Team.objects.bulk_create([team for team, *_ in new_teams.values()], ignore_conflicts=True)
+            self._teams_by_sfi_id.update(Team.objects.in_bulk(new_teams.keys(), field_name="sfi_id"))
+
+            for team_sfi_id, (team, match_id, side, competition) in new_teams.items():
+                msg = (
+                    f"    NEW TEAM: created {team.name} (sfi_id={team_sfi_id}) "
+                    f"for competition '{competition}' while processing match {match_id} ({side})."
+                )
+                self.stdout.write(msg)
+                logger.info(msg)
+
+        links = {
+            (competition.id, self._teams_by_sfi_id[team_ref["id"]].id)
+            for match, competition in tracked_matches
+            for team_ref in (match["teamA"], match["teamB"])
+        }
+        new_links = links - self._competition_team_links
+        if new_links:
+            CompetitionTeam = Competition.teams.through
+            CompetitionTeam.objects.bulk_create(
+                [
+                    CompetitionTeam(competition_id=competition_id, team_id=team_id)
+                    for competition_id, team_id in new_links
+                ],
+                ignore_conflicts=True,
             )
-            self.stdout.write(msg)
-            logger.info(msg)
+            self._competition_team_links |= new_links
 
-        return team, created
+        return len(new_teams)
 
-    def _upsert_not_started_match(
+    def _upsert_not_started_matches(
         self,
-        match: SFIMatch,
-        competition: Competition,
-        home_team: Team,
-        away_team: Team,
-    ) -> ProcessMatchResult:
-        """Create or update a NOT_STARTED match without touching goal fields."""
-        date_time = self._parse_match_datetime(match["date"])
-
-        _, created = Match.objects.update_or_create(
-            sfi_id=match["id"],
-            defaults={
-                "competition": competition,
-                "home_team": home_team,
-                "away_team": away_team,
-                "date_time": date_time,
+        not_started: list[tuple[SFIMatch, Competition]],
+        existing_matches: dict[str, Match],
+    ) -> tuple[list[Match], list[Match]]:
+        """Create or update NOT_STARTED matches without touching goal fields.
+
+        Existing matches are compared with the payload and only written when
+        their competition, teams, kickoff or status changed.  Returns the
+        created and the updated matches, the ones inserted meanwhile by someone
+        else being updated ones.
+        """
+        new_matches, updated, changed_fields = [], [], set()
+
+        for match, competition in not_started:
+            values = {
+                "competition_id": competition.id,
+                "home_team_id": self._teams_by_sfi_id[match["teamA"]["id"]].id,
+                "away_team_id": self._teams_by_sfi_id[match["teamB"]["id"]].id,
+                "date_time": self._parse_match_datetime(match["date"]),
                 "status": Match.NOT_STARTED,
-            },
+            }
+
+            existing_match = existing_matches.get(match["id"])
+            if existing_match is None:
+                new_matches.append(Match(sfi_id=match["id"], **values))
+            elif changed := existing_match.update_fields_from(values):
+                updated.append(existing_match)
+                changed_fields.update(changed)
+
+        # Matches stored since the preload (e.g. by a concurrent sync) hit the
+        # conflict and are only updated, so they mustn't count as created
+        stored_sfi_ids = set(
+            Match.objects.filter(sfi_id__in=[match.sfi_id for match in new_matches]).values_list("sfi_id", flat=True)
+        )
+        upserted = Match.objects.bulk_create(
+            new_matches,
+            update_conflicts=True,
+            unique_fields=["sfi_id"],
+            update_fields=["competition", "home_team", "away_team", "date_time", "status"],
         )
+        created = [match for match in upserted if match.sfi_id not in stored_sfi_ids]
+        if updated:
+            Match.objects.bulk_update(updated, sorted(changed_fields))
 
-        return ProcessMatchResult.created if created else ProcessMatchResult.updated
+        return created, updated + [match for match in upserted if match.sfi_id in stored_sfi_ids]
 
-    def _update_ended_match(self, match: SFIMatch) -> ProcessMatchResult:
-        """Update the goals of a ENDED match that already exists in the database.
+    def _update_ended_matches(self, ended: list[SFIMatch], existing_matches: dict[str, Match]) -> list[Match]:
+        """Update the goals of ENDED matches that already exist in the database.
 
-        If the match is not yet registered (e.g. it happened before this command
-        was set up), it is skipped rather than created with incomplete data.
+        Matches not yet registered (e.g. played before this command was set up)
+        are skipped rather than created with incomplete data, and matches whose
+        result is already stored are left untouched.  Returns the updated matches.
         """
-        updated_count = Match.objects.filter(sfi_id=match["id"]).update(
-            status=Match.FINSHED,  # "FT"
-            home_goals=match["teamA"]["score"]["2h"],
-            away_goals=match["teamB"]["score"]["2h"],
-        )
-
-        if updated_count == 0:
-            logger.warning(
-                "ENDED match %s not found in DB — skipping creation.",
-                match["id"],
+        updated = []
+        for match in ended:
+            existing_match = existing_matches.get(match["id"])
+            if existing_match is None:
+                logger.warning(
+                    "ENDED match %s not found in DB — skipping creation.",
+                    match["id"],
+                )
+                continue
+
+            changed = existing_match.update_fields_from(
+                {
+                    "status": Match.FINSHED,  # "FT"
+                    "home_goals": match["teamA"]["score"]["2h"],
+                    "away_goals": match["teamB"]["score"]["2h"],
+                }
             )
-            return ProcessMatchResult.skipped
+            if changed:
+                updated.append(existing_match)
+
+        if updated:
+            Match.objects.bulk_update(updated, ["status", "home_goals", "away_goals"])
 
-        return ProcessMatchResult.updated
+        return updated
 
     @staticmethod
     def _parse_match_datetime(date_str: str) -> datetime:
@@ -1,81 +1,90 @@
-import pytz
-from django.conf import settings
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from datetime import date
 
-from core.models import Guess, RankingEntry
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
 
+from core.models import GuessPool, RankingEntry
 
-class Command(BaseCommand):
-    help = "Deletes all existing ranking entries and recalculates them from scratch based on consolidated guesses."
 
-    @transaction.atomic
-    def handle(self, *args, **options):
-        self.stdout.write("Starting full recalculation of RankingEntry table...")
+class Command(BaseCommand):
+    help = (
+        "Recalculates ranking entries based on consolidated guesses, writing only the entries whose score "
+        "changed. By default every pool, guesser and period is rebuilt; use the options to limit the scope."
+    )
 
-        self.stdout.write("Deleting existing ranking entries...")
-        deleted_count, _ = RankingEntry.objects.all().delete()
-        self.stdout.write(
-            self.style.SUCCESS(f"Successfully deleted {deleted_count} old entries.")
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--pool",
+            type=int,
+            action="append",
+            dest="pool_ids",
+            help="Id of a pool to rebuild. Can be repeated. Defaults to all pools.",
         )
-
-        self.stdout.write("Aggregating scores from consolidated guesses...")
-        ranking_data = {}
-        guesses = Guess.objects.filter(consolidated=True).prefetch_related(
-            "pools", "guesser", "match"
+        parser.add_argument(
+            "--guesser",
+            type=int,
+            action="append",
+            dest="guesser_ids",
+            help="Id of a guesser to rebuild. Can be repeated. Defaults to all guessers.",
+        )
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            help="Rebuild only the periods touched by matches from this date on (YYYY-MM-DD).",
+            default=None,
+        )
+        parser.add_argument(
+            "--until",
+            type=date.fromisoformat,
+            help="Rebuild only the periods touched by matches up to this date (YYYY-MM-DD). Defaults to today.",
+            default=None,
         )
-        total_guesses = guesses.count()
-        processed_guesses = 0
 
-        for guess in guesses:
-            if not guess.guesser:
-                continue  # Pula palpites órfãos, se houver
+    def handle(self, *args, **options):
+        pool_ids = options["pool_ids"]
+        guesser_ids = options["guesser_ids"]
+        since, until = self._get_date_range(options)
 
-            match_date = guess.match.date_time.astimezone(
-                pytz.timezone(settings.TIME_ZONE)
-            )
-            year = match_date.year
-            month = match_date.month
-            week = match_date.isocalendar().week
+        pools = GuessPool.objects.order_by("id")
+        if pool_ids:
+            pools = pools.filter(id__in=pool_ids)
 
-            periods = [
-                (0, 0, 0),  # General
-                (year, 0, 0),  # Annual
-                (year, month, 0),  # Monthly
-                (year, 0, week),  # Weekly
-            ]
+        self.stdout.write(
+            f"Starting recalculation of RankingEntry table (pools: {pool_ids or 'all'}, "
+            f"guessers: {guesser_ids or 'all'}, period: {f'{since} to {until}' if since else 'all'})..."
+        )
 
-            for pool in guess.pools.all():
-                for period in periods:
-                    key = (pool.id, guess.guesser.id, period[0], period[1], period[2])
-                    ranking_data.setdefault(key, 0)
-                    ranking_data[key] += guess.score
+        # Each pool is rebuilt by a single statement, so the ranking page keeps
+        # serving the previous entries of a pool until the new ones are
+        # committed, and memory usage doesn't grow with the number of guesses.
+        pool_ids = list(pools.values_list("id", flat=True))
+        total_pools = len(pool_ids)
+        written_entries, deleted_entries = 0, 0
 
-            processed_guesses += 1
-            if processed_guesses % 1000 == 0:
-                self.stdout.write(
-                    f"{processed_guesses}/{total_guesses} guesses processed..."
-                )
+        for rebuilt_pools, pool_id in enumerate(pool_ids, start=1):
+            written, deleted = RankingEntry.rebuild_for_pool(pool_id, guesser_ids, since, until)
+            written_entries += written
+            deleted_entries += deleted
+            self.stdout.write(f"{rebuilt_pools}/{total_pools} pools rebuilt...")
 
         self.stdout.write(
-            f"Aggregation complete. {len(ranking_data)} ranking entries to be created."
+            self.style.SUCCESS(
+                f"RankingEntry table has been successfully rebuilt: {written_entries} entries written "
+                f"and {deleted_entries} deleted."
+            )
         )
 
-        self.stdout.write("Creating new ranking entries in bulk...")
-        entries_to_create = [
-            RankingEntry(
-                pool_id=pool_id,
-                guesser_id=guesser_id,
-                year=year,
-                month=month,
-                week=week,
-                score=score,
-            )
-            for (pool_id, guesser_id, year, month, week), score in ranking_data.items()
-        ]
+    def _get_date_range(self, options: dict) -> tuple[date | None, date | None]:
+        since = options["since"]
+        until = options["until"]
 
-        RankingEntry.objects.bulk_create(entries_to_create, batch_size=1000)
+        if since is None:
+            if until is not None:
+                raise CommandError("--until requires --since.")
+            return None, None
 
-        self.stdout.write(
-            self.style.SUCCESS("RankingEntry table has been successfully rebuilt.")
-        )
+        until = until or timezone.localdate()
+        if since > until:
+            raise CommandError("--since must not be after --until.")
+
+        return since, until
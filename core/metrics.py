@@ -0,0 +1,160 @@
+"""Prometheus metrics of the SQL queries, cache lookups and duration of the
+requests to core views and of the management commands."""
+
+import os
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views import View
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LABELS = ["kind", "name"]
+
+QUERIES = Histogram(
+    "palpiteiros_db_queries",
+    "SQL queries made by a request or a command",
+    LABELS,
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000),
+)
+DB_SECONDS = Histogram(
+    "palpiteiros_db_seconds",
+    "Time spent running SQL queries in a request or a command",
+    LABELS,
+)
+DURATION_SECONDS = Histogram(
+    "palpiteiros_duration_seconds",
+    "Wall time of a request or a command",
+    LABELS,
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+CACHE_LOOKUPS = Counter(
+    "palpiteiros_cache_lookups",
+    "Cache lookups made by a request or a command",
+    [*LABELS, "result"],
+)
+
+
+@dataclass
+class Measurement:
+    """Resources used while it is the current measurement"""
+
+    queries: int = 0
+    db_seconds: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    wall_seconds: float = 0.0
+
+    def time_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - start
+
+
+_current_measurement: ContextVar[Measurement | None] = ContextVar("current_measurement", default=None)
+
+
+@contextmanager
+def measure() -> Iterator[Measurement]:
+    """Measures the queries to the default database, the cache lookups
+    reported with record_cache_lookup and the wall time of the block"""
+
+    measurement = Measurement()
+    token = _current_measurement.set(measurement)
+    start = time.perf_counter()
+    try:
+        with connection.execute_wrapper(measurement.time_query):
+            yield measurement
+    finally:
+        measurement.wall_seconds = time.perf_counter() - start
+        _current_measurement.reset(token)
+
+
+def record_cache_lookup(hit: bool) -> None:
+    """Counts a cache hit or miss into the current measurement, if any"""
+
+    measurement = _current_measurement.get()
+    if measurement is None:
+        return
+
+    if hit:
+        measurement.cache_hits += 1
+    else:
+        measurement.cache_misses += 1
+
+
+def export(kind: str, name: str, measurement: Measurement) -> None:
+    QUERIES.labels(kind, name).observe(measurement.queries)
+    DB_SECONDS.labels(kind, name).observe(measurement.db_seconds)
+    DURATION_SECONDS.labels(kind, name).observe(measurement.wall_seconds)
+    if measurement.cache_hits:
+        CACHE_LOOKUPS.labels(kind, name, "hit").inc(measurement.cache_hits)
+    if measurement.cache_misses:
+        CACHE_LOOKUPS.labels(kind, name, "miss").inc(measurement.cache_misses)
+
+
+@contextmanager
+def instrument_command(name: str) -> Iterator[Measurement]:
+    """Measures the block as a run of the command name and exports it"""
+
+    measurement = Measurement()
+    try:
+        with measure() as measurement:
+            yield measurement
+    finally:
+        export("command", name, measurement)
+
+
+class QueryMetricsMiddleware:
+    """Measures every request and exports it tagged by the name of the view
+    that handled it (e.g. core:guesses)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with measure() as measurement:
+            response = self.get_response(request)
+
+        resolver_match = request.resolver_match
+        export("view", resolver_match.view_name if resolver_match else "unresolved", measurement)
+        return response
+
+
+class MetricsView(View):
+    """Exposes the metrics to Prometheus, for staff users or requests with
+    the METRICS_TOKEN as bearer token. With several processes (gunicorn
+    workers, celery), the metrics of all of them are collected from the
+    PROMETHEUS_MULTIPROC_DIR directory"""
+
+    def get(self, request, *args, **kwargs):
+        authorization = request.headers.get("Authorization", "")
+        has_token = bool(settings.METRICS_TOKEN) and secrets.compare_digest(
+            authorization, f"Bearer {settings.METRICS_TOKEN}"
+        )
+        if not has_token and not request.user.is_staff:
+            return HttpResponseForbidden()
+
+        registry = REGISTRY
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+
+        return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
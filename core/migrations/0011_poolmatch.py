@@ -0,0 +1,62 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+POPULATE_POOL_MATCHES = """
+    INSERT INTO core_poolmatch (pool_id, match_id)
+    SELECT pool.id, match.id
+    FROM core_guesspool AS pool
+    INNER JOIN core_match AS match ON match.date_time > pool.created
+    WHERE EXISTS (
+        SELECT 1 FROM core_guesspool_competitions AS pool_competition
+        WHERE pool_competition.guesspool_id = pool.id AND pool_competition.competition_id = match.competition_id
+    ) OR EXISTS (
+        SELECT 1 FROM core_guesspool_teams AS pool_team
+        WHERE pool_team.guesspool_id = pool.id AND pool_team.team_id IN (match.home_team_id, match.away_team_id)
+    )
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_competition_sfi_id_match_sfi_id_team_sfi_id_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PoolMatch",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "match",
+                    models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to="core.match"),
+                ),
+                (
+                    "pool",
+                    models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to="core.guesspool"),
+                ),
+            ],
+            options={
+                "verbose_name": "partida do bolão",
+                "verbose_name_plural": "partidas dos bolões",
+            },
+        ),
+        migrations.AddField(
+            model_name="guesspool",
+            name="matches",
+            field=models.ManyToManyField(
+                blank=True, related_name="pools", through="core.PoolMatch", to="core.match", verbose_name="Partidas"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="poolmatch",
+            index=models.Index(fields=["match", "pool"], name="core_poolmatch_match_pool_idx"),
+        ),
+        migrations.AlterUniqueTogether(
+            name="poolmatch",
+            unique_together={("pool", "match")},
+        ),
+        migrations.RunSQL(POPULATE_POOL_MATCHES, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_poolmatch"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="guess",
+            index=models.Index(fields=["match", "guesser"], name="core_guess_match_guesser_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="guesspool",
+            index=models.Index(condition=models.Q(("new_matches", True)), fields=["id"], name="core_guesspool_new_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="guesspool",
+            index=models.Index(
+                condition=models.Q(("updated_matches", True)), fields=["id"], name="core_guesspool_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(fields=["date_time"], name="core_match_date_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(fields=["competition", "date_time"], name="core_match_comp_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(fields=["away_team", "date_time"], name="core_match_away_team_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                condition=models.Q(("status__in", ["1H", "HT", "2H", "FT", "AET", "PEN"])),
+                fields=["date_time"],
+                name="core_match_played_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="rankingentry",
+            index=models.Index(fields=["pool", "year", "month", "week", "-score"], name="core_rankingentry_period_idx"),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_add_hot_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmailDelivery",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created", models.DateTimeField(auto_now_add=True, verbose_name="Criado em")),
+                ("modified", models.DateTimeField(auto_now=True, verbose_name="Modificado em")),
+                ("to", models.EmailField(max_length=254, verbose_name="Destinatário")),
+                ("subject", models.CharField(max_length=255, verbose_name="Assunto")),
+                ("text_content", models.TextField(verbose_name="Conteúdo em texto")),
+                ("html_content", models.TextField(blank=True, verbose_name="Conteúdo em HTML")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Pendente"), ("sent", "Enviado"), ("failed", "Falhou")],
+                        default="pending",
+                        max_length=7,
+                        verbose_name="Situação",
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")),
+                ("error", models.TextField(blank=True, verbose_name="Erro")),
+                ("sent_at", models.DateTimeField(blank=True, null=True, verbose_name="Enviado em")),
+                (
+                    "guesser",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="email_deliveries",
+                        to="core.guesser",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "envio de email",
+                "verbose_name_plural": "envios de email",
+                "indexes": [models.Index(fields=["status", "created"], name="core_emaildelivery_status_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Pools flagged and not notified yet get an event without match, so the next run still notifies them
+CONVERT_POOL_FLAGS = """
+    INSERT INTO core_notificationevent (type, pool_id, created)
+    SELECT 'new_match', id, NOW() FROM core_guesspool WHERE new_matches
+    UNION ALL
+    SELECT 'updated_match', id, NOW() FROM core_guesspool WHERE updated_matches
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_emaildelivery"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationCursor",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=50, unique=True, verbose_name="Nome")),
+                ("last_event_id", models.BigIntegerField(default=0, verbose_name="Último evento consumido")),
+                ("modified", models.DateTimeField(auto_now=True, verbose_name="Modificado em")),
+            ],
+            options={
+                "verbose_name": "cursor de notificações",
+                "verbose_name_plural": "cursores de notificações",
+            },
+        ),
+        migrations.CreateModel(
+            name="NotificationEvent",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[("new_match", "Nova partida"), ("updated_match", "Partida atualizada")],
+                        max_length=13,
+                        verbose_name="Tipo",
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True, verbose_name="Criado em")),
+            ],
+            options={
+                "verbose_name": "evento de notificação",
+                "verbose_name_plural": "eventos de notificação",
+            },
+        ),
+        migrations.AddField(
+            model_name="notificationevent",
+            name="match",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="notification_events",
+                to="core.match",
+            ),
+        ),
+        migrations.AddField(
+            model_name="notificationevent",
+            name="pool",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name="notification_events", to="core.guesspool"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notificationevent",
+            index=models.Index(fields=["type", "id"], name="core_notifevent_type_id_idx"),
+        ),
+        migrations.RunSQL(CONVERT_POOL_FLAGS, migrations.RunSQL.noop),
+        migrations.RemoveIndex(
+            model_name="guesspool",
+            name="core_guesspool_new_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="guesspool",
+            name="core_guesspool_updated_idx",
+        ),
+        migrations.RemoveField(
+            model_name="guesspool",
+            name="new_matches",
+        ),
+        migrations.RemoveField(
+            model_name="guesspool",
+            name="updated_matches",
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_notification_ledger"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="emaildelivery",
+            name="bcc",
+            field=models.JSONField(blank=True, default=list, verbose_name="Cópias ocultas"),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_emaildelivery_bcc"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PushDelivery",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created", models.DateTimeField(auto_now_add=True, verbose_name="Criado em")),
+                ("modified", models.DateTimeField(auto_now=True, verbose_name="Modificado em")),
+                ("external_ids", models.JSONField(default=list, verbose_name="Destinatários")),
+                ("heading", models.CharField(max_length=255, verbose_name="Título")),
+                ("content", models.TextField(verbose_name="Conteúdo")),
+                ("url", models.URLField(blank=True, verbose_name="URL")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Pendente"), ("sent", "Enviado"), ("failed", "Falhou")],
+                        default="pending",
+                        max_length=7,
+                        verbose_name="Situação",
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")),
+                ("error", models.TextField(blank=True, verbose_name="Erro")),
+                ("sent_at", models.DateTimeField(blank=True, null=True, verbose_name="Enviado em")),
+            ],
+            options={
+                "verbose_name": "envio de notificação push",
+                "verbose_name_plural": "envios de notificação push",
+                "indexes": [models.Index(fields=["status", "created"], name="core_pushdelivery_status_idx")],
+            },
+        ),
+    ]
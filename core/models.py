@@ -1,22 +1,50 @@
 import logging
-from datetime import date
-from typing import Iterable, Literal
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from itertools import batched
+from typing import Iterable, NamedTuple
 from uuid import uuid4
 
 import pytz
 from django.conf import settings
 from django.contrib import admin
-from django.db import models, transaction
-from django.db.models import Q, Sum
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, models, transaction
+from django.db.models import (
+    BooleanField,
+    DateTimeField,
+    Exists,
+    ExpressionWrapper,
+    OuterRef,
+    Q,
+    Sum,
+    Value,
+)
 from django.db.models.functions import Coalesce
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.utils.text import slugify
 
 from core.helpers import get_current_year
+from core.metrics import record_cache_lookup
+from core.services.push import PushService
 
 logger = logging.getLogger(__name__)
 
+# (pool_id, guesser_id, year, month, week) -> score delta
+RankingDeltas = Counter[tuple[int, int, int, int, int]]
+
+
+class RankingRow(NamedTuple):
+    """Compact ranking line stored in the ranking snapshot cache"""
+
+    guesser_id: int
+    name: str
+    score: int
+    position: int
+
 
 class TimeStampedModel(models.Model):
     created = models.DateTimeField("Criado em", auto_now_add=True)
@@ -101,6 +129,10 @@ class Competition(TimeStampedModel):
         return None
 
 
+# Match.IN_PROGRESS_AND_FINISHED_STATUS, which can't be used from inside Match.Meta
+PLAYED_MATCH_STATUS = ("1H", "HT", "2H", "FT", "AET", "PEN")
+
+
 class Match(models.Model):
     NOT_STARTED = "NS"
     FIRST_HALF = "1H"
@@ -130,6 +162,21 @@ class Match(models.Model):
 
     HOURS_BEFORE_OPEN_TO_GUESSES = 48
 
+    # Matches are polled for live scores from kickoff until they finish or
+    # this long after kickoff. The polling interval (in minutes) changes as
+    # the minutes since kickoff reach each threshold: results near full time
+    # are picked up quickly, and matches still unfinished long after it (extra
+    # time, delayed kickoffs, API outages) keep being polled, only slower
+    LIVE_POLLING_WINDOW_MINUTES = 24 * 60
+    LIVE_POLLING_INTERVALS = ((0, 15), (95, 3), (150, 30))
+
+    # Fields that define the pools a match belongs to (see PoolMatch)
+    POOL_MEMBERSHIP_FIELDS = frozenset(
+        ["competition", "competition_id", "home_team", "home_team_id", "away_team", "away_team_id", "date_time"]
+    )
+    # Fields that define the score of the guesses of a match
+    SCORING_FIELDS = frozenset(["status", "home_goals", "away_goals", "double_score"])
+
     data_source_id = models.PositiveIntegerField(blank=True, null=True)
     sfi_id = models.CharField("Soccer Football Info ID", max_length=50, blank=True, null=True, unique=True)
     competition = models.ForeignKey(
@@ -159,6 +206,16 @@ class Match(models.Model):
         verbose_name_plural = "partidas"
         ordering = ("-date_time",)
         unique_together = ["home_team", "away_team", "date_time"]
+        indexes = [
+            models.Index(fields=["date_time"], name="core_match_date_time_idx"),
+            models.Index(fields=["competition", "date_time"], name="core_match_comp_date_idx"),
+            models.Index(fields=["away_team", "date_time"], name="core_match_away_team_date_idx"),
+            models.Index(
+                fields=["date_time"],
+                name="core_match_played_date_idx",
+                condition=Q(status__in=PLAYED_MATCH_STATUS),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.home_team.name} x {self.away_team.name}"
@@ -166,11 +223,31 @@ class Match(models.Model):
     def save(self, *args, **kwargs):
         is_update = self.id is not None
         super().save(*args, **kwargs)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or not self.POOL_MEMBERSHIP_FIELDS.isdisjoint(update_fields):
+            PoolMatch.refresh(match_ids=[self.id])
+
         if is_update:
-            self.evaluate_and_consolidate_guesses()
-            self.set_updated_matches_flag_for_involved_pools()
+            if update_fields is None or not self.SCORING_FIELDS.isdisjoint(update_fields):
+                self.evaluate_and_consolidate_guesses()
+            NotificationEvent.append_for_matches(NotificationEvent.UPDATED_MATCH, [self.id])
         else:
-            self.set_new_macthes_flag_for_involved_pools()
+            NotificationEvent.append_for_matches(NotificationEvent.NEW_MATCH, [self.id])
+
+    def update_fields_from(self, values: dict) -> list[str]:
+        """Sets the given field values on this instance and returns the names
+        of the fields whose value actually changed, so callers can skip writes
+        (and the side effects of save) when nothing changed. Foreign keys should
+        be given by their attname (e.g. competition_id) to compare ids"""
+
+        changed_fields = []
+        for field, value in values.items():
+            if getattr(self, field) != value:
+                setattr(self, field, value)
+                changed_fields.append(field)
+
+        return changed_fields
 
     def update_status(
         self,
@@ -191,16 +268,77 @@ class Match(models.Model):
     def is_finished(self) -> bool:
         return self.status in self.FINISHED_STATUS
 
-    def evaluate_and_consolidate_guesses(self):
+    def evaluate_and_consolidate_guesses(self, ranking_deltas: RankingDeltas | None = None) -> dict[int, int]:
+        """Scores all guesses of this match in a single pass and persists the
+        changed ones with one bulk update. Returns the score delta of every
+        guess whose score changed, keyed by guess id.
+
+        Ranking deltas are collected into ranking_deltas when it is given, so
+        the caller can flush the deltas of many matches at once with
+        RankingEntry.apply_score_deltas. Otherwise they are flushed here"""
+
+        if self.result_str is None:
+            return {}
+
+        changed_guesses, score_deltas = self._score_guesses()
+
+        flush_rankings = ranking_deltas is None
+        if flush_rankings:
+            ranking_deltas = RankingDeltas()
+
+        for guess in changed_guesses:
+            if guess.id in score_deltas:
+                guess.collect_ranking_deltas(score_deltas[guess.id], ranking_deltas)
+
         with transaction.atomic():
-            for guess in self.guesses.all():
-                guess.evaluate_and_consolidate()
+            Guess.objects.bulk_update(changed_guesses, ["score", "consolidated"], batch_size=1000)
+            if flush_rankings:
+                RankingEntry.apply_score_deltas(ranking_deltas)
+
+        return score_deltas
+
+    def _score_guesses(self) -> tuple[list["Guess"], dict[int, int]]:
+        """Scores all guesses of this match in memory. Returns the guesses whose
+        score or consolidation changed and the score delta of every guess whose
+        score changed, keyed by guess id"""
+
+        # Guesses fetched through the reverse manager already reference this
+        # instance as their match, so scoring them doesn't hit the database.
+        # Pools are prefetched because they are needed to update the rankings.
+        guesses = self.guesses.prefetch_related("pools")
+        is_finished = self.is_finished()
+
+        changed_guesses = []
+        score_deltas = {}
+        for guess in guesses:
+            previous_score, previous_consolidated = guess.score, guess.consolidated
+            guess.score = guess._evaluate()
+            guess.consolidated = previous_consolidated or is_finished
+
+            if guess.score != previous_score:
+                score_deltas[guess.id] = guess.score - previous_score
+            if guess.score != previous_score or guess.consolidated != previous_consolidated:
+                changed_guesses.append(guess)
+
+        return changed_guesses, score_deltas
+
+    @classmethod
+    def run_bulk_save_side_effects(cls, created_matches: list["Match"], updated_matches: list["Match"]) -> None:
+        """Runs the side effects of save for matches written in bulk, which
+        bypasses save, once for the whole batch: refreshes their pool
+        memberships, scores the guesses of the updated matches (flushing all
+        ranking deltas at once) and records the notification events of the
+        involved pools"""
 
-    def set_updated_matches_flag_for_involved_pools(self):
-        GuessPool.toggle_flag_value("updated_matches", self.get_pools(), True)
+        PoolMatch.refresh(match_ids=[match.id for match in [*created_matches, *updated_matches]])
 
-    def set_new_macthes_flag_for_involved_pools(self):
-        GuessPool.toggle_flag_value("new_matches", self.get_pools(), True)
+        ranking_deltas = RankingDeltas()
+        for match in updated_matches:
+            match.evaluate_and_consolidate_guesses(ranking_deltas)
+        RankingEntry.apply_score_deltas(ranking_deltas)
+
+        NotificationEvent.append_for_matches(NotificationEvent.NEW_MATCH, [match.id for match in created_matches])
+        NotificationEvent.append_for_matches(NotificationEvent.UPDATED_MATCH, [match.id for match in updated_matches])
 
     @property
     def result_str(self):
@@ -222,18 +360,36 @@ class Match(models.Model):
     def get_pools(self):
         """Return all pools with this instance of Match is involved"""
 
-        pools_with_competition_as_pool_member = self.competition.pools.all()
-        pools_with_home_team_as_pool_member = self.home_team.pools.all()
-        pools_with_away_team_as_pool_member = self.away_team.pools.all()
-
-        return pools_with_competition_as_pool_member.union(
-            pools_with_home_team_as_pool_member,
-            pools_with_away_team_as_pool_member,
-        )
+        return self.pools.all()
 
     def pending_guess(self, guesser: "Guesser"):
         return not self.guesses.filter(guesser=guesser).exists()
 
+    @classmethod
+    def get_live(cls, now: datetime | None = None):
+        """Returns matches that may be in play: kicked off within the live
+        polling window and not finished yet"""
+
+        now = now or timezone.now()
+        return cls.objects.filter(
+            date_time__lte=now,
+            date_time__gt=now - timezone.timedelta(minutes=cls.LIVE_POLLING_WINDOW_MINUTES),
+        ).exclude(status__in=cls.FINISHED_STATUS)
+
+    def get_live_polling_interval(self, now: datetime | None = None) -> timezone.timedelta:
+        """Returns how often this match should be polled for live scores"""
+
+        minutes_since_kickoff = ((now or timezone.now()) - self.date_time) / timezone.timedelta(minutes=1)
+        interval = next(
+            (
+                interval
+                for threshold, interval in reversed(self.LIVE_POLLING_INTERVALS)
+                if minutes_since_kickoff >= threshold
+            ),
+            self.LIVE_POLLING_INTERVALS[0][1],
+        )
+        return timezone.timedelta(minutes=interval)
+
     @classmethod
     def get_happen_on_period(cls, from_: date, to: date):
         return cls.objects.filter(date_time__date__gte=from_, date_time__date__lte=to)
@@ -275,23 +431,87 @@ class Guesser(models.Model):
 
         return cls.objects.exclude(user__email="").exclude(pools__isnull=True).exclude(receive_notifications=False)
 
-    def get_involved_pools_with_new_matches(self):
-        """Returns pools with new matches that this guesser is involved
-        with"""
+    @classmethod
+    def get_who_should_be_notified_by_push(cls):
+        """Returns guessers that should be notified by push notifications"""
 
-        return self.pools.filter(new_matches=True)
+        return cls.objects.exclude(pools__isnull=True).exclude(receive_notifications=False)
 
-    def get_involved_pools_with_updated_matches(self):
-        """Returns pools with updated matches that this guesser is involved
-        with"""
+    @property
+    def push_external_id(self) -> str:
+        """Id of this guesser in the push notifications service. Registering it
+        for the user's devices (OneSignal.login in the web app) is not done by
+        this project, so only users registered there are reached"""
 
-        return self.pools.filter(updated_matches=True)
+        return str(self.user_id)
 
     def get_involved_pools_with_pending_matches(self):
         """Returns pools with pending matches that this guesser is involved
         with"""
 
-        return [pool for pool in self.pools.all() if pool.has_pending_match(self)]
+        return list(self.pools.filter(GuessPool.has_pending_match_expression(self)))
+
+    @classmethod
+    def get_involved_pools_with_events_by_guesser(cls, guessers, events) -> dict["Guesser", list["GuessPool"]]:
+        """Returns the pools of the events (a NotificationEvent queryset) that
+        each of guessers is involved with, for all of them at once"""
+
+        memberships = GuessPool.guessers.through.objects.filter(
+            guesser__in=guessers, guesspool__in=events.values("pool_id")
+        )
+        return cls._get_pools_by_guesser(memberships)
+
+    @classmethod
+    def get_involved_pools_with_pending_matches_by_guesser(cls, guessers) -> dict["Guesser", list["GuessPool"]]:
+        """Same as get_involved_pools_with_pending_matches, for all guessers at
+        once: the pending matches of every membership are checked by the
+        database in a single query"""
+
+        # The guesser is referenced from the guesses subquery, nested in the open matches one
+        memberships = GuessPool.guessers.through.objects.filter(
+            GuessPool.has_pending_match_expression(OuterRef(OuterRef("guesser_id")), pool_path="guesspool"),
+            guesser__in=guessers,
+        )
+        return cls._get_pools_by_guesser(memberships)
+
+    @classmethod
+    def _get_pools_by_guesser(cls, memberships) -> dict["Guesser", list["GuessPool"]]:
+        """Returns the pools of the memberships (GuessPool.guessers.through rows)
+        by guesser, ordered by name, with the users of the guessers loaded. Takes
+        three queries however many guessers and pools there are"""
+
+        pool_ids_by_guesser_id = defaultdict(list)
+        for guesser_id, pool_id in memberships.values_list("guesser_id", "guesspool_id"):
+            pool_ids_by_guesser_id[guesser_id].append(pool_id)
+
+        if not pool_ids_by_guesser_id:
+            return {}
+
+        pools_by_id = GuessPool.objects.in_bulk({id_ for ids in pool_ids_by_guesser_id.values() for id_ in ids})
+        guessers = cls.objects.select_related("user").filter(id__in=pool_ids_by_guesser_id.keys()).order_by("id")
+
+        return {
+            guesser: sorted((pools_by_id[pool_id] for pool_id in pool_ids_by_guesser_id[guesser.id]), key=str)
+            for guesser in guessers
+        }
+
+    def get_involved_pools_with_pending_flag(self):
+        """Returns the same pools as get_involved_pools, in a single query,
+        annotated with is_pending: whether this guesser is a member of the
+        pool and has matches open to guesses left to guess on it"""
+
+        is_member = GuessPool.guessers.through.objects.filter(guesspool_id=OuterRef("pk"), guesser_id=self.id)
+
+        return (
+            GuessPool.objects.filter(Q(owner=self) | Q(Exists(is_member)))
+            .annotate(
+                is_pending=ExpressionWrapper(
+                    Q(Exists(is_member)) & Q(GuessPool.has_pending_match_expression(self)),
+                    output_field=BooleanField(),
+                )
+            )
+            .order_by("name")
+        )
 
 
 class Guess(models.Model):
@@ -313,6 +533,7 @@ class Guess(models.Model):
     class Meta:
         verbose_name = "palpite"
         verbose_name_plural = "palpites"
+        indexes = [models.Index(fields=["match", "guesser"], name="core_guess_match_guesser_idx")]
 
     def __str__(self) -> str:
         return (
@@ -339,29 +560,19 @@ class Guess(models.Model):
                 self.update_related_rankings(score_difference)
 
     def update_related_rankings(self, score: int):
-        match_date = self.match.date_time.astimezone(pytz.timezone(settings.TIME_ZONE))
-        year = match_date.year
-        month = match_date.month
-        week = match_date.isocalendar().week
+        ranking_deltas = RankingDeltas()
+        self.collect_ranking_deltas(score, ranking_deltas)
+        RankingEntry.apply_score_deltas(ranking_deltas)
 
-        periods_to_update = [
-            {"year": 0, "month": 0, "week": 0},  # General ranking
-            {"year": year, "month": 0, "week": 0},  # Annual ranking
-            {"year": year, "month": month, "week": 0},  # Monthly ranking
-            {"year": year, "month": 0, "week": week},  # Weekly ranking
-        ]
+    def collect_ranking_deltas(self, score: int, ranking_deltas: RankingDeltas):
+        """Adds score to the ranking periods of every pool this guess belongs
+        to, without touching the database beyond reading its pools"""
+
+        periods = RankingEntry.get_periods_of(self.match.date_time)
 
         for pool in self.pools.all():
-            for period in periods_to_update:
-                entry, created = RankingEntry.objects.get_or_create(
-                    pool=pool,
-                    guesser=self.guesser,
-                    **period,
-                    defaults={"score": score},
-                )
-                if not created:
-                    entry.score = models.F("score") + score
-                    entry.save(update_fields=["score"])
+            for year, month, week in periods:
+                ranking_deltas[(pool.id, self.guesser_id, year, month, week)] += score
 
     @property
     def result_str(self) -> str:
@@ -370,15 +581,30 @@ class Guess(models.Model):
     def _evaluate(self):
         """Compares match result with your guess and returns the score"""
 
-        ACERTO_DE_GOLS_MANDANTE = self.home_goals == self.match.home_goals
-        ACERTO_DE_GOLS_VISITANTE = self.away_goals == self.match.away_goals
-        ACERTO_MANDANTE_VENCEDOR = (self.home_goals > self.away_goals) and (
-            self.match.home_goals > self.match.away_goals
+        return self.calculate_score(
+            self.home_goals,
+            self.away_goals,
+            self.match.home_goals,
+            self.match.away_goals,
+            self.match.double_score,
         )
-        ACERTO_VISITANTE_VENCEDOR = (self.home_goals < self.away_goals) and (
-            self.match.home_goals < self.match.away_goals
-        )
-        ACERTO_EMPATE = (self.home_goals == self.away_goals) and (self.match.home_goals == self.match.away_goals)
+
+    @staticmethod
+    def calculate_score(
+        home_goals: int,
+        away_goals: int,
+        match_home_goals: int,
+        match_away_goals: int,
+        double_score: bool = False,
+    ) -> int:
+        """Returns the score of a guess given the match result. Kept free of
+        model instances so it can be used by bulk scoring paths"""
+
+        ACERTO_DE_GOLS_MANDANTE = home_goals == match_home_goals
+        ACERTO_DE_GOLS_VISITANTE = away_goals == match_away_goals
+        ACERTO_MANDANTE_VENCEDOR = (home_goals > away_goals) and (match_home_goals > match_away_goals)
+        ACERTO_VISITANTE_VENCEDOR = (home_goals < away_goals) and (match_home_goals < match_away_goals)
+        ACERTO_EMPATE = (home_goals == away_goals) and (match_home_goals == match_away_goals)
         ACERTO_PARCIAL = ACERTO_MANDANTE_VENCEDOR or ACERTO_VISITANTE_VENCEDOR
         ACERTO_PARCIAL_COM_GOLS = ACERTO_PARCIAL and (ACERTO_DE_GOLS_MANDANTE or ACERTO_DE_GOLS_VISITANTE)
         ACERTO_SOMENTE_GOLS = (ACERTO_DE_GOLS_MANDANTE or ACERTO_DE_GOLS_VISITANTE) and not ACERTO_PARCIAL
@@ -403,7 +629,7 @@ class Guess(models.Model):
         else:
             score = 0
 
-        if self.match.double_score:
+        if double_score:
             score *= 2
 
         return score
@@ -451,13 +677,12 @@ class GuessPool(TimeStampedModel):
         verbose_name="Palpites",
         blank=True,
     )
-    new_matches = models.BooleanField(
-        "novas partidas",
-        default=False,
-    )
-    updated_matches = models.BooleanField(
-        "partidas atualizadas",
-        default=False,
+    matches = models.ManyToManyField(
+        Match,
+        through="PoolMatch",
+        related_name="pools",
+        verbose_name="Partidas",
+        blank=True,
     )
     minutes_before_start_match = models.PositiveSmallIntegerField(
         "Até quantos minutos antes do início da partida os palpites serão permitidos?",
@@ -479,6 +704,7 @@ class GuessPool(TimeStampedModel):
         super().save(*args, **kwargs)
         if not self.guessers.contains(self.owner):
             self.guessers.add(self.owner)
+            self.bump_ranking_cache_version([self.id])
 
     def get_absolute_url(self):
         return reverse_lazy("core:pool_home", kwargs={"pool_slug": self.slug})
@@ -488,6 +714,7 @@ class GuessPool(TimeStampedModel):
 
     def signin_new_guesser(self, guesser: Guesser):
         self.guessers.add(guesser)
+        self.bump_ranking_cache_version([self.id])
 
     @admin.display(description="Equipes")
     def number_of_teams(self):
@@ -503,10 +730,37 @@ class GuessPool(TimeStampedModel):
     def has_pending_match(self, guesser: Guesser) -> bool:
         """Returns True if pool has pending matches open to guesses"""
 
-        for match in self.get_open_matches():
-            if match.pending_guess(guesser):
-                return True
-        return False
+        return GuessPool.objects.filter(self.has_pending_match_expression(guesser), pk=self.pk).exists()
+
+    @classmethod
+    def has_pending_match_expression(cls, guesser: Guesser | int | OuterRef, pool_path: str = "") -> Exists:
+        """Returns a boolean expression for GuessPool querysets telling whether
+        the pool has matches open to guesses that guesser (an instance, an id or
+        an OuterRef) hasn't guessed yet. Mirrors get_matches and
+        get_open_matches, but evaluated for every pool by the database, using
+        each pool's own guessing window. For querysets of other models,
+        pool_path is the lookup of their pool (e.g. "guesspool" for
+        memberships)"""
+
+        def pool_field(name: str) -> str:
+            return f"{pool_path}__{name}" if pool_path else name
+
+        now = timezone.now()
+        open_matches = Match.objects.filter(
+            pools=OuterRef(pool_path or "pk"),
+            date_time__gt=cls._shift_now(now, pool_field("minutes_before_start_match"), timezone.timedelta(minutes=1)),
+            date_time__lte=cls._shift_now(now, pool_field("hours_before_open_to_guesses"), timezone.timedelta(hours=1)),
+        )
+        guesses = Guess.objects.filter(match=OuterRef("pk"), guesser=guesser)
+
+        return Exists(open_matches.filter(~Exists(guesses)))
+
+    @staticmethod
+    def _shift_now(now, pool_field: str, unit: timezone.timedelta) -> ExpressionWrapper:
+        """Returns now shifted forward by the value of a pool field (taken from
+        the outer GuessPool query) times unit"""
+
+        return ExpressionWrapper(Value(now) + OuterRef(pool_field) * unit, output_field=DateTimeField())
 
     def get_open_matches(self):
         """Returns matches open to guesses"""
@@ -532,53 +786,91 @@ class GuessPool(TimeStampedModel):
             .order_by("-date_time")
         )
 
-    @classmethod
-    def toggle_flag_value(
-        cls,
-        flag: Literal["new_matches", "updated_matches"],
-        objs: Iterable | None = None,
-        desired_value: bool = False,
-    ):
-        if flag not in ["new_matches", "updated_matches"]:
-            raise ValueError("flag value must be 'new_matches' or 'updated_matches'")
-
-        pools = objs or (
-            cls.objects.filter(new_matches=not desired_value)
-            if flag == "new_matches"
-            else cls.objects.filter(updated_matches=not desired_value)
-        )
-
-        for p in pools:
-            setattr(p, flag, desired_value)
-        cls.objects.bulk_update(pools, [flag])
-
-    def add_guess_to_pools(self, guess: Guess, for_all_pools: bool):
-        match = guess.match
-        guesser = guess.guesser
+    def save_guesses(self, guesses: list[Guess], for_all_pools: bool) -> list[Guess]:
+        """Creates the given unsaved guesses of a guesser and puts them in place
+        of the guesser's previous guesses for the same matches in this pool or,
+        when for_all_pools is set, in every pool of the guesser involving the
+        match. Returns the created guesses.
 
-        if for_all_pools:
-            pools_with_the_match = match.get_pools()
-            pools_with_the_guesser = guesser.pools.all()
-            pools_with_match_and_guesser = pools_with_the_match.intersection(pools_with_the_guesser)
+        The same guess instance may be shared by several pools, so guesses are
+        never updated: new ones are created and the through table rows of all
+        affected pools are swapped in a single statement. Only the previous
+        guesses left without pools by the swap are deleted"""
 
-            for pool in pools_with_match_and_guesser:
-                self._replace_guess_in_pool(guess, pool)
-
-        else:
-            self._replace_guess_in_pool(guess)
-
-    def _replace_guess_in_pool(self, guess, pool=None):
-        target_pool = pool or self
+        if not guesses:
+            return []
 
         with transaction.atomic():
-            old_guesses = target_pool.guesses.filter(
-                match=guess.match,
-                guesser=guess.guesser,
+            guesses = Guess.objects.bulk_create(guesses)
+
+            pool_ids_by_match = self._get_target_pool_ids_by_match(guesses, for_all_pools)
+            rows = [(pool_id, guess.id) for guess in guesses for pool_id in pool_ids_by_match[guess.match_id]]
+            replaced_guess_ids = self._swap_guesses_in_pools(rows)
+
+            Guess.objects.filter(id__in=replaced_guess_ids, pools__isnull=True).delete()
+
+        return guesses
+
+    def _get_target_pool_ids_by_match(self, guesses: list[Guess], for_all_pools: bool) -> dict[int, set[int]]:
+        """Returns, for each guessed match, the ids of the pools where the guess
+        must be placed: this pool and, when for_all_pools is set, the pools of
+        the guesser involving the match"""
+
+        pool_ids_by_match = {guess.match_id: {self.id} for guess in guesses}
+        if not for_all_pools:
+            return pool_ids_by_match
+
+        memberships = PoolMatch.objects.filter(
+            match__in=pool_ids_by_match.keys(),
+            pool__guessers=guesses[0].guesser_id,
+        ).values_list("match_id", "pool_id")
+        for match_id, pool_id in memberships:
+            pool_ids_by_match[match_id].add(pool_id)
+
+        return pool_ids_by_match
+
+    @staticmethod
+    def _swap_guesses_in_pools(rows: list[tuple[int, int]]) -> list[int]:
+        """Adds the (pool id, guess id) rows to the pools guesses and, in the
+        same statement, removes from those pools the other guesses of the same
+        guesser and match. Returns the ids of the removed guesses"""
+
+        through_table = connection.ops.quote_name(GuessPool.guesses.through._meta.db_table)
+        guess_table = connection.ops.quote_name(Guess._meta.db_table)
+
+        sql = f"""
+            WITH new_link AS (
+                SELECT * FROM UNNEST(%s::bigint[], %s::bigint[]) AS new_link (guesspool_id, guess_id)
+            ),
+            removed AS (
+                DELETE FROM {through_table} AS link
+                USING new_link, {guess_table} AS new_guess, {guess_table} AS old_guess
+                WHERE link.guesspool_id = new_link.guesspool_id
+                    AND new_guess.id = new_link.guess_id
+                    AND old_guess.id = link.guess_id
+                    AND old_guess.match_id = new_guess.match_id
+                    AND old_guess.guesser_id = new_guess.guesser_id
+                RETURNING link.guess_id
+            ),
+            added AS (
+                INSERT INTO {through_table} (guesspool_id, guess_id)
+                SELECT guesspool_id, guess_id FROM new_link
+                RETURNING 1
             )
-            for old_guess in old_guesses:
-                target_pool.guesses.remove(old_guess)
+            SELECT DISTINCT guess_id FROM removed
+        """
 
-            target_pool.guesses.add(guess)
+        pool_ids, guess_ids = zip(*rows)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [list(pool_ids), list(guess_ids)])
+            return [guess_id for (guess_id,) in cursor.fetchall()]
+
+    def get_guesses_by_match(self, guesser: Guesser, matches: Iterable[Match]) -> dict[int, Guess]:
+        """Returns the guesses of guesser in this pool for the given matches,
+        keyed by match id, using a single query"""
+
+        guesses = self.guesses.filter(guesser=guesser, match__in=matches)
+        return {guess.match_id: guess for guess in guesses}
 
     @classmethod
     def delete_orphans_guesses(cls):
@@ -590,25 +882,12 @@ class GuessPool(TimeStampedModel):
         """Returns all matches created after this pool that belongs to
         any registered competition or involving registered teams"""
 
-        matches_post_pool_creation = Match.objects.select_related(
+        return self.matches.select_related(
             "competition",
             "home_team",
             "away_team",
-        ).filter(
-            date_time__gt=self.created,
-        )
-
-        registered_competitions = self.competitions.all()
-        registered_teams = self.teams.all()
-
-        competition_or_team_membership = (
-            Q(competition__in=registered_competitions)
-            | Q(home_team__in=registered_teams)
-            | Q(away_team__in=registered_teams)
         )
 
-        return matches_post_pool_creation.filter(competition_or_team_membership)
-
     def get_guessers_with_score_and_guesses(
         self,
         month: int,
@@ -692,17 +971,54 @@ class GuessPool(TimeStampedModel):
         self.guesses.remove(*self.guesses.filter(guesser=guesser))
         self.delete_orphans_guesses()
         self.guessers.remove(guesser)
+        self.bump_ranking_cache_version([self.id])
 
     @admin.display(description="Partidas")
     def number_of_matches(self):
         return self.get_matches().count()
 
-    def get_ranking_for_period(self, year: int, month: int, week: int):
+    def get_ranking_for_period(self, year: int, month: int, week: int) -> list[RankingRow]:
+        """Returns the ranking of the pool for a period, read through the
+        ranking snapshot cache. Snapshots are keyed by the pool ranking
+        version, so they are never served after the pool ranking changes"""
+
+        year, month, week = int(year), int(month), int(week)
+        try:
+            version = self.get_ranking_cache_version(self.id)
+            cache_key = f"{settings.RANKING_CACHE_PREFIX}:{self.id}:v{version}:{year}:{month}:{week}"
+            ranking = cache.get(cache_key)
+        except Exception as exc:
+            # A cache outage only makes rankings slower
+            logger.warning("Ranking cache unavailable for pool %s: %s", self.id, exc)
+            return self._compute_ranking_for_period(year, month, week)
+
+        record_cache_lookup(hit=ranking is not None)
+        if ranking is None:
+            ranking = self._compute_ranking_for_period(year, month, week)
+            try:
+                cache.set(cache_key, ranking, settings.RANKING_CACHE_TIMEOUT)
+            except Exception as exc:
+                logger.warning("Could not cache the ranking of pool %s: %s", self.id, exc)
+
+        return ranking
+
+    def _compute_ranking_for_period(self, year: int, month: int, week: int) -> list[RankingRow]:
         """
         Retorna a classificação completa para um período, usando uma única query.
         Todos os palpiteiros do bolão são incluídos, com pontuação 0 se não tiverem
         entradas de ranking para o período.
         """
+        guessers = self.get_ranking_queryset(year, month, week)
+
+        return [
+            RankingRow(guesser.id, str(guesser), guesser.score, position)
+            for position, guesser in enumerate(guessers, start=1)
+        ]
+
+    def get_ranking_queryset(self, year: int, month: int, week: int):
+        """Returns the guessers of the pool annotated with their score in the
+        period, ordered by score"""
+
         # Filtro para o LEFT JOIN na tabela de ranking
         ranking_filter = Q(
             ranking_entries__pool=self,
@@ -712,7 +1028,7 @@ class GuessPool(TimeStampedModel):
         )
 
         # A consulta principal
-        return (
+        guessers = (
             self.guessers.all()
             .select_related("user")
             .annotate(
@@ -725,6 +1041,136 @@ class GuessPool(TimeStampedModel):
             .order_by("-score", "user__first_name")
         )
 
+        return guessers
+
+    @staticmethod
+    def _get_ranking_version_key(pool_id: int) -> str:
+        return f"{settings.RANKING_CACHE_PREFIX}:{pool_id}:version"
+
+    @classmethod
+    def get_ranking_cache_version(cls, pool_id: int) -> int:
+        """Returns the current ranking version of a pool. A missing version
+        (never set or evicted) starts from the current timestamp instead of
+        zero, so it can't collide with snapshots of previous versions"""
+
+        version_key = cls._get_ranking_version_key(pool_id)
+        version = cache.get(version_key)
+        if version is None:
+            cache.add(version_key, time.time_ns(), None)
+            version = cache.get(version_key, 0)
+        return version
+
+    @classmethod
+    def bump_ranking_cache_version(cls, pool_ids: Iterable[int]):
+        """Invalidates the cached rankings of the given pools. Snapshots of
+        previous versions are never read again and expire by themselves"""
+
+        for pool_id in set(pool_ids):
+            version_key = cls._get_ranking_version_key(pool_id)
+            try:
+                cache.incr(version_key)
+            except ValueError:
+                # version not set yet (or evicted)
+                cache.set(version_key, time.time_ns(), None)
+            except Exception as exc:
+                cls._drop_ranking_cache_version(pool_id, exc)
+
+    @classmethod
+    def _drop_ranking_cache_version(cls, pool_id: int, exc: Exception) -> None:
+        """Deletes the ranking version of a pool whose bump failed, so that the
+        next read starts a new one instead of serving stale snapshots"""
+
+        logger.warning("Could not bump the ranking cache version of pool %s: %s", pool_id, exc)
+        try:
+            cache.delete(cls._get_ranking_version_key(pool_id))
+        except Exception as delete_exc:
+            logger.error(
+                "Rankings of pool %s may be stale for up to RANKING_CACHE_TIMEOUT after the cache recovers: %s",
+                pool_id,
+                delete_exc,
+            )
+
+
+class PoolMatch(models.Model):
+    """Materialized membership of matches in pools, so that the matches of a
+    pool and the pools of a match are single indexed lookups. Kept up to date
+    by Match.save and by the changes of pools competitions and teams"""
+
+    pool = models.ForeignKey(GuessPool, on_delete=models.CASCADE, db_index=False)
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        verbose_name = "partida do bolão"
+        verbose_name_plural = "partidas dos bolões"
+        unique_together = [["pool", "match"]]
+        indexes = [models.Index(fields=["match", "pool"], name="core_poolmatch_match_pool_idx")]
+
+    def __str__(self):
+        return f"{self.match} | bolão {self.pool}"
+
+    @classmethod
+    def refresh(cls, pool_ids: Iterable[int] | None = None, match_ids: Iterable[int] | None = None) -> tuple[int, int]:
+        """Recalculates the memberships of the given pools and/or matches (of
+        all of them when none is given), writing only the rows that changed.
+        Returns the number of added and deleted rows.
+
+        A match belongs to a pool when it happens after the pool creation and
+        its competition or one of its teams is registered in the pool"""
+
+        table = connection.ops.quote_name(cls._meta.db_table)
+        pool_table = connection.ops.quote_name(GuessPool._meta.db_table)
+        match_table = connection.ops.quote_name(Match._meta.db_table)
+        pool_competition_table = connection.ops.quote_name(GuessPool.competitions.through._meta.db_table)
+        pool_team_table = connection.ops.quote_name(GuessPool.teams.through._meta.db_table)
+
+        scope_conditions, scope_params = [], []
+        if pool_ids is not None:
+            scope_conditions.append("{alias}.pool_id = ANY(%s)")
+            scope_params.append(list(pool_ids))
+        if match_ids is not None:
+            scope_conditions.append("{alias}.match_id = ANY(%s)")
+            scope_params.append(list(match_ids))
+        scope_sql = " AND ".join(scope_conditions) or "TRUE"
+
+        sql = f"""
+            WITH desired AS (
+                SELECT pool_id, match_id FROM (
+                    SELECT pool.id AS pool_id, match.id AS match_id
+                    FROM {pool_table} AS pool
+                    INNER JOIN {match_table} AS match ON match.date_time > pool.created
+                    WHERE EXISTS (
+                        SELECT 1 FROM {pool_competition_table} AS pool_competition
+                        WHERE pool_competition.guesspool_id = pool.id
+                            AND pool_competition.competition_id = match.competition_id
+                    ) OR EXISTS (
+                        SELECT 1 FROM {pool_team_table} AS pool_team
+                        WHERE pool_team.guesspool_id = pool.id
+                            AND pool_team.team_id IN (match.home_team_id, match.away_team_id)
+                    )
+                ) AS membership
+                WHERE {scope_sql.format(alias="membership")}
+            ),
+            deleted AS (
+                DELETE FROM {table} AS pool_match
+                WHERE {scope_sql.format(alias="pool_match")} AND NOT EXISTS (
+                    SELECT 1 FROM desired
+                    WHERE desired.pool_id = pool_match.pool_id AND desired.match_id = pool_match.match_id
+                )
+                RETURNING 1
+            ),
+            added AS (
+                INSERT INTO {table} (pool_id, match_id)
+                SELECT pool_id, match_id FROM desired
+                ON CONFLICT (pool_id, match_id) DO NOTHING
+                RETURNING 1
+            )
+            SELECT (SELECT COUNT(*) FROM added), (SELECT COUNT(*) FROM deleted)
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*scope_params, *scope_params])
+            return cursor.fetchone()
+
 
 class RankingEntry(TimeStampedModel):
     pool = models.ForeignKey(GuessPool, on_delete=models.CASCADE, related_name="ranking_entries")
@@ -739,6 +1185,473 @@ class RankingEntry(TimeStampedModel):
         verbose_name_plural = "Registros de Classificação"
         unique_together = [["pool", "guesser", "year", "month", "week"]]
         ordering = ["-score"]
+        indexes = [
+            models.Index(fields=["pool", "year", "month", "week", "-score"], name="core_rankingentry_period_idx")
+        ]
 
     def __str__(self):
         return f"Classificação {self.guesser} | bolão {self.pool} | ano {self.year}) | mês {self.month or '-'} | semana {self.week or '-'}"
+
+    @staticmethod
+    def get_periods_of(date_time: datetime) -> list[tuple[int, int, int]]:
+        """Returns the (year, month, week) ranking periods that a match played
+        at date_time counts towards, in the local timezone"""
+
+        match_date = date_time.astimezone(pytz.timezone(settings.TIME_ZONE))
+        year = match_date.year
+        month = match_date.month
+        week = match_date.isocalendar().week
+
+        return [
+            (0, 0, 0),  # General ranking
+            (year, 0, 0),  # Annual ranking
+            (year, month, 0),  # Monthly ranking
+            (year, 0, week),  # Weekly ranking
+        ]
+
+    @classmethod
+    def apply_score_deltas(cls, ranking_deltas: RankingDeltas, batch_size: int = 1000) -> int:
+        """Adds the accumulated score deltas to their ranking entries, creating
+        the missing ones. Each batch is a single PostgreSQL upsert statement
+        (INSERT ... ON CONFLICT DO UPDATE), so concurrent flushes can't lose
+        increments. Returns the number of entries touched"""
+
+        rows = [(*key, delta) for key, delta in ranking_deltas.items() if delta]
+        if not rows:
+            return 0
+
+        table = connection.ops.quote_name(cls._meta.db_table)
+        sql_template = (
+            f"INSERT INTO {table} (pool_id, guesser_id, year, month, week, score, created, modified) "
+            "VALUES {values} "
+            "ON CONFLICT (pool_id, guesser_id, year, month, week) "
+            f"DO UPDATE SET score = {table}.score + EXCLUDED.score, modified = EXCLUDED.modified"
+        )
+
+        now = timezone.now()
+        with transaction.atomic(), connection.cursor() as cursor:
+            for batch in batched(rows, batch_size):
+                values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(batch))
+                params = [value for row in batch for value in (*row, now, now)]
+                cursor.execute(sql_template.format(values=values), params)
+
+        # Bumped only after commit, otherwise a concurrent request could cache
+        # the previous scores under the new version
+        pool_ids = {row[0] for row in rows}
+        transaction.on_commit(lambda: GuessPool.bump_ranking_cache_version(pool_ids))
+
+        return len(rows)
+
+    @classmethod
+    def rebuild_for_pool(
+        cls,
+        pool_id: int,
+        guesser_ids: list[int] | None = None,
+        since: date | None = None,
+        until: date | None = None,
+    ) -> tuple[int, int]:
+        """Recalculates the ranking entries of a pool from its consolidated
+        guesses, optionally limited to some guessers and to the ranking periods
+        touched by the since/until date range (the general ranking is always
+        touched). Returns the number of written and deleted entries.
+
+        The aggregation runs entirely in the database and its result is
+        compared with the stored entries: only entries whose score differs are
+        written and entries left without consolidated guesses are deleted.
+        Everything happens in a single statement, so readers see either the
+        old or the new entries but never a partially rebuilt ranking"""
+
+        table = connection.ops.quote_name(cls._meta.db_table)
+        aggregation_sql, aggregation_params = cls._get_aggregation_sql(pool_id, guesser_ids)
+        desired_scope_sql, scope_params = cls._get_scope_sql("desired", guesser_ids, since, until)
+        entry_scope_sql, _ = cls._get_scope_sql("entry", guesser_ids, since, until)
+        key_columns = ("pool_id", "guesser_id", "year", "month", "week")
+
+        sql = f"""
+            WITH desired AS (
+                SELECT * FROM ({aggregation_sql}) AS desired WHERE {desired_scope_sql}
+            ),
+            deleted AS (
+                DELETE FROM {table} AS entry
+                WHERE entry.pool_id = %s AND {entry_scope_sql} AND NOT EXISTS (
+                    SELECT 1 FROM desired
+                    WHERE {" AND ".join(f"desired.{column} = entry.{column}" for column in key_columns)}
+                )
+                RETURNING 1
+            ),
+            written AS (
+                INSERT INTO {table} AS entry ({", ".join(key_columns)}, score, created, modified)
+                SELECT {", ".join(key_columns)}, score, %s, %s FROM desired
+                ON CONFLICT ({", ".join(key_columns)})
+                DO UPDATE SET score = EXCLUDED.score, modified = EXCLUDED.modified
+                WHERE entry.score <> EXCLUDED.score
+                RETURNING 1
+            )
+            SELECT (SELECT COUNT(*) FROM written), (SELECT COUNT(*) FROM deleted)
+        """
+
+        now = timezone.now()
+        params = [*aggregation_params, *scope_params, pool_id, *scope_params, now, now]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            written_count, deleted_count = cursor.fetchone()
+
+        if written_count or deleted_count:
+            transaction.on_commit(lambda: GuessPool.bump_ranking_cache_version([pool_id]))
+
+        return written_count, deleted_count
+
+    @staticmethod
+    def _get_aggregation_sql(pool_id: int, guesser_ids: list[int] | None = None) -> tuple[str, list]:
+        """Returns the SQL (and its params) that sums the consolidated guess
+        scores of a pool for every guesser and ranking period.
+
+        Match dates are converted to the local timezone before extracting the
+        year, month and ISO week. GROUPING SETS produce the general, annual,
+        monthly and weekly rows in a single scan; dimensions left out of a
+        grouping set come back as NULL and are coalesced to 0, which is the
+        "no constraint" value of the ranking period convention"""
+
+        through_table = connection.ops.quote_name(GuessPool.guesses.through._meta.db_table)
+        guess_table = connection.ops.quote_name(Guess._meta.db_table)
+        match_table = connection.ops.quote_name(Match._meta.db_table)
+
+        guesser_filter = "AND guess.guesser_id = ANY(%s)" if guesser_ids else ""
+
+        sql = f"""
+            SELECT
+                pool_id,
+                guesser_id,
+                COALESCE(year, 0) AS year,
+                COALESCE(month, 0) AS month,
+                COALESCE(week, 0) AS week,
+                SUM(score) AS score
+            FROM (
+                SELECT
+                    pool_guess.guesspool_id AS pool_id,
+                    guess.guesser_id,
+                    guess.score,
+                    EXTRACT(YEAR FROM match.date_time AT TIME ZONE %s)::integer AS year,
+                    EXTRACT(MONTH FROM match.date_time AT TIME ZONE %s)::integer AS month,
+                    EXTRACT(WEEK FROM match.date_time AT TIME ZONE %s)::integer AS week
+                FROM {through_table} AS pool_guess
+                INNER JOIN {guess_table} AS guess ON guess.id = pool_guess.guess_id
+                INNER JOIN {match_table} AS match ON match.id = guess.match_id
+                WHERE guess.consolidated AND pool_guess.guesspool_id = %s {guesser_filter}
+            ) AS scored_guesses
+            GROUP BY pool_id, guesser_id, GROUPING SETS ((), (year), (year, month), (year, week))
+        """
+        params = [settings.TIME_ZONE] * 3 + [pool_id]
+        if guesser_ids:
+            params.append(list(guesser_ids))
+
+        return sql, params
+
+    @staticmethod
+    def _get_scope_sql(
+        alias: str,
+        guesser_ids: list[int] | None = None,
+        since: date | None = None,
+        until: date | None = None,
+    ) -> tuple[str, list]:
+        """Returns the SQL condition (and its params) that restricts ranking
+        rows aliased as alias to the given guessers and to the periods touched
+        by the since/until date range. Months and weeks are encoded as
+        year * 100 + month/week so they can be matched against a single array"""
+
+        conditions, params = ["TRUE"], []
+
+        if guesser_ids:
+            conditions.append(f"{alias}.guesser_id = ANY(%s)")
+            params.append(list(guesser_ids))
+
+        if since and until:
+            days = [since + timezone.timedelta(days=offset) for offset in range((until - since).days + 1)]
+            months = sorted({day.year * 100 + day.month for day in days})
+            weeks = sorted({day.year * 100 + day.isocalendar().week for day in days})
+
+            conditions.append(
+                f"({alias}.year = 0"
+                f" OR ({alias}.month = 0 AND {alias}.week = 0 AND {alias}.year BETWEEN %s AND %s)"
+                f" OR ({alias}.week = 0 AND {alias}.year * 100 + {alias}.month = ANY(%s))"
+                f" OR ({alias}.month = 0 AND {alias}.year * 100 + {alias}.week = ANY(%s)))"
+            )
+            params.extend([since.year, until.year, months, weeks])
+
+        return " AND ".join(conditions), params
+
+
+class EmailDelivery(TimeStampedModel):
+    """An email to one recipient, sent by the workers in chunks (see
+    tasks.send_email_deliveries) and keeping its delivery status, so that only
+    the emails that failed are sent again"""
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    STATUS_CHOICES = (
+        (PENDING, "Pendente"),
+        (SENT, "Enviado"),
+        (FAILED, "Falhou"),
+    )
+
+    guesser = models.ForeignKey(
+        Guesser,
+        related_name="email_deliveries",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    to = models.EmailField("Destinatário")
+    bcc = models.JSONField("Cópias ocultas", default=list, blank=True)
+    subject = models.CharField("Assunto", max_length=255)
+    text_content = models.TextField("Conteúdo em texto")
+    html_content = models.TextField("Conteúdo em HTML", blank=True)
+    status = models.CharField("Situação", max_length=7, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField("Tentativas", default=0)
+    error = models.TextField("Erro", blank=True)
+    sent_at = models.DateTimeField("Enviado em", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "envio de email"
+        verbose_name_plural = "envios de email"
+        indexes = [models.Index(fields=["status", "created"], name="core_emaildelivery_status_idx")]
+
+    def __str__(self):
+        return f"{self.subject} | {self.to} | {self.get_status_display()}"
+
+    @classmethod
+    def from_email_message(cls, email: EmailMultiAlternatives, guesser: Guesser | None = None) -> "EmailDelivery":
+        """Returns an unsaved delivery of email, which must have a single
+        recipient besides its BCC recipients"""
+
+        html_content = next((content for content, mimetype in email.alternatives if mimetype == "text/html"), "")
+        return cls(
+            guesser=guesser,
+            to=email.to[0],
+            bcc=email.bcc,
+            subject=email.subject,
+            text_content=email.body,
+            html_content=html_content,
+        )
+
+    def get_email_message(self) -> EmailMultiAlternatives:
+        email = EmailMultiAlternatives(
+            self.subject,
+            self.text_content,
+            f"Palpiteiros <{settings.DEFAULT_FROM_EMAIL}>",
+            to=[self.to],
+            bcc=self.bcc,
+        )
+        if self.html_content:
+            email.attach_alternative(self.html_content, "text/html")
+        return email
+
+    @classmethod
+    def send_chunk(cls, delivery_ids: Iterable[int]) -> list[int]:
+        """Sends the deliveries not sent yet among delivery_ids over a single
+        connection, recording the status of each one. Returns the ids of the
+        ones that failed"""
+
+        deliveries = list(cls.objects.filter(id__in=list(delivery_ids)).exclude(status=cls.SENT).order_by("id"))
+        if not deliveries:
+            return []
+
+        tried = 0
+        try:
+            with get_connection() as connection_:
+                for delivery in deliveries:
+                    delivery._send(connection_)
+                    tried += 1
+        except Exception as exc:
+            # The connection could not be opened: the deliveries not tried yet failed along with it
+            logger.warning("Email connection failed: %s", exc)
+            for delivery in deliveries[tried:]:
+                delivery.status, delivery.error = cls.FAILED, str(exc)
+
+        for delivery in deliveries:
+            delivery.attempts += 1
+        cls.objects.bulk_update(deliveries, ["status", "attempts", "error", "sent_at"])
+
+        return [delivery.id for delivery in deliveries if delivery.status == cls.FAILED]
+
+    def _send(self, connection_) -> None:
+        try:
+            connection_.send_messages([self.get_email_message()])
+        except Exception as exc:
+            logger.warning("Email delivery %s to %s failed: %s", self.id, self.to, exc)
+            self.status, self.error = self.FAILED, str(exc)
+        else:
+            self.status, self.error, self.sent_at = self.SENT, "", timezone.now()
+
+
+class PushDelivery(TimeStampedModel):
+    """A push notification to a batch of guessers (by their external ids),
+    sent by the workers (see tasks.send_push_deliveries) and keeping its
+    delivery status, so that only the batches that failed are sent again"""
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    STATUS_CHOICES = (
+        (PENDING, "Pendente"),
+        (SENT, "Enviado"),
+        (FAILED, "Falhou"),
+    )
+
+    external_ids = models.JSONField("Destinatários", default=list)
+    heading = models.CharField("Título", max_length=255)
+    content = models.TextField("Conteúdo")
+    url = models.URLField("URL", blank=True)
+    status = models.CharField("Situação", max_length=7, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField("Tentativas", default=0)
+    error = models.TextField("Erro", blank=True)
+    sent_at = models.DateTimeField("Enviado em", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "envio de notificação push"
+        verbose_name_plural = "envios de notificação push"
+        indexes = [models.Index(fields=["status", "created"], name="core_pushdelivery_status_idx")]
+
+    def __str__(self):
+        return f"{self.heading} | {len(self.external_ids)} destinatários | {self.get_status_display()}"
+
+    @classmethod
+    def send_chunk(cls, delivery_ids: Iterable[int], service: PushService) -> list[int]:
+        """Sends the deliveries not sent yet among delivery_ids, one request
+        each, recording the status of each one. Returns the ids of the ones
+        that failed"""
+
+        deliveries = list(cls.objects.filter(id__in=list(delivery_ids)).exclude(status=cls.SENT).order_by("id"))
+        for delivery in deliveries:
+            delivery._send(service)
+            delivery.attempts += 1
+        cls.objects.bulk_update(deliveries, ["status", "attempts", "error", "sent_at"])
+
+        return [delivery.id for delivery in deliveries if delivery.status == cls.FAILED]
+
+    def _send(self, service: PushService) -> None:
+        try:
+            service.send(self.external_ids, self.heading, self.content, url=self.url)
+        except Exception as exc:
+            logger.warning("Push delivery %s to %s users failed: %s", self.id, len(self.external_ids), exc)
+            self.status, self.error = self.FAILED, str(exc)
+        else:
+            self.status, self.error, self.sent_at = self.SENT, "", timezone.now()
+
+
+class NotificationEvent(models.Model):
+    """Ledger of the changes that guessers are notified about. The match sync
+    paths append one event per involved pool and the notifiers consume them
+    in order, each one from its own NotificationCursor"""
+
+    NEW_MATCH = "new_match"
+    UPDATED_MATCH = "updated_match"
+
+    TYPE_CHOICES = (
+        (NEW_MATCH, "Nova partida"),
+        (UPDATED_MATCH, "Partida atualizada"),
+    )
+
+    type = models.CharField("Tipo", max_length=13, choices=TYPE_CHOICES)
+    pool = models.ForeignKey(GuessPool, on_delete=models.CASCADE, related_name="notification_events")
+    match = models.ForeignKey(
+        Match,
+        on_delete=models.CASCADE,
+        related_name="notification_events",
+        null=True,
+        blank=True,
+    )
+    created = models.DateTimeField("Criado em", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "evento de notificação"
+        verbose_name_plural = "eventos de notificação"
+        indexes = [models.Index(fields=["type", "id"], name="core_notifevent_type_id_idx")]
+
+    def __str__(self):
+        return f"{self.get_type_display()} | bolão {self.pool_id} | partida {self.match_id}"
+
+    @classmethod
+    def append_for_matches(cls, event_type: str, match_ids: Iterable[int]) -> int:
+        """Appends an event of event_type for every pool involving any of the
+        matches, in a single statement. Returns the number of events"""
+
+        match_ids = list(match_ids)
+        if not match_ids:
+            return 0
+
+        return len(
+            cls.objects.bulk_create(
+                cls(type=event_type, pool_id=pool_id, match_id=match_id)
+                for pool_id, match_id in PoolMatch.objects.filter(match__in=match_ids).values_list(
+                    "pool_id", "match_id"
+                )
+            )
+        )
+
+    @classmethod
+    def prune(cls, retention: timezone.timedelta) -> int:
+        """Deletes the events every cursor of their type has consumed, and the
+        ones older than retention (left by a channel that stopped consuming).
+        Returns the number of deleted events"""
+
+        consumed = Q(created__lt=timezone.now() - retention)
+        for event_type, _ in cls.TYPE_CHOICES:
+            cursors = NotificationCursor.objects.filter(name__endswith=f":{event_type}")
+            last_event_id = cursors.aggregate(last_event_id=models.Min("last_event_id"))["last_event_id"]
+            if last_event_id:
+                consumed |= Q(type=event_type, id__lte=last_event_id)
+
+        deleted, _ = cls.objects.filter(consumed).delete()
+        return deleted
+
+
+class NotificationCursor(models.Model):
+    """Position of a consumer (e.g. the email notifier of new matches) in the
+    NotificationEvent ledger: the id of the last event it has consumed"""
+
+    name = models.CharField("Nome", max_length=50, unique=True)
+    last_event_id = models.BigIntegerField("Último evento consumido", default=0)
+    modified = models.DateTimeField("Modificado em", auto_now=True)
+
+    class Meta:
+        verbose_name = "cursor de notificações"
+        verbose_name_plural = "cursores de notificações"
+
+    def __str__(self):
+        return f"{self.name} ({self.last_event_id})"
+
+    @classmethod
+    def get_locked(cls, name: str) -> "NotificationCursor":
+        """Returns the cursor name, creating it when missing, locked until the
+        end of the current transaction so that concurrent consumers of the same
+        events wait for each other"""
+
+        cls.objects.get_or_create(name=name)
+        return cls.objects.select_for_update().get(name=name)
+
+    def get_pending_events(self, event_type: str):
+        """Returns the events of event_type after this cursor, up to the last
+        one appended more than NOTIFICATION_EVENTS_VISIBILITY_DELAY seconds ago.
+
+        Ids are taken when the events are appended, not when their transaction
+        commits, so a transaction still running can commit events with ids
+        lower than the last visible one. Leaving the recent events for the next
+        run gives those transactions time to commit before the cursor moves
+        past their ids"""
+
+        events = NotificationEvent.objects.filter(type=event_type, id__gt=self.last_event_id)
+        visible_until = timezone.now() - timezone.timedelta(seconds=settings.NOTIFICATION_EVENTS_VISIBILITY_DELAY)
+        last_event_id = events.filter(created__lt=visible_until).order_by("-id").values_list("id", flat=True).first()
+        return events.filter(id__lte=last_event_id) if last_event_id else events.none()
+
+    def advance(self, events) -> None:
+        """Moves the cursor past events (from get_pending_events)"""
+
+        last_event_id = events.order_by("-id").values_list("id", flat=True).first()
+        if last_event_id:
+            self.last_event_id = last_event_id
+            self.save(update_fields=["last_event_id", "modified"])
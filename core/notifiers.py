@@ -1,13 +1,69 @@
 import abc
-from typing import Iterable
+from functools import partial
+from itertools import batched
+from typing import Iterable, Iterator
 
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
 
-from .models import Guesser, GuessPool
+from .models import (
+    EmailDelivery,
+    Guesser,
+    GuessPool,
+    NotificationCursor,
+    NotificationEvent,
+    PushDelivery,
+)
+from .services.push import PushService
+from .tasks import send_email_deliveries, send_push_deliveries
 
 
-class EmailNotifier(abc.ABC):
+class Notifier(abc.ABC):
+    """Notifies guessers about their pools through a channel (e.g. email)"""
+
+    channel: str
+
+    def __init__(self, guessers: Iterable[Guesser]) -> None:
+        self.guessers = guessers
+        self.notifiable_pools_by_guesser: dict[Guesser, list[GuessPool]] = {}
+
+    def prepare_and_send_notifications(self):
+        self.prepare_notifications()
+        if self.have_notifications_to_send():
+            self.send_notifications()
+            return True
+        return False
+
+    def prepare_notifications(self) -> str:
+        self.notifiable_pools_by_guesser = self._get_notifiable_pools_by_guesser()
+
+    def have_notifications_to_send(self) -> bool:
+        return bool(len(self.notifiable_pools_by_guesser))
+
+    @abc.abstractmethod
+    def send_notifications(self):
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def _get_notifiable_pools_by_guesser(self) -> dict[Guesser, list[GuessPool]]:
+        """Returns the pools to notify each guesser about, leaving out the
+        guessers with none. Must be computed for all guessers at once, with
+        their users loaded"""
+        raise NotImplementedError()
+
+    def _get_guessers_by_pools(self) -> dict[tuple[GuessPool, ...], list[Guesser]]:
+        """Groups the guessers to notify by the pools they are notified about"""
+
+        guessers_by_pools = {}
+        for guesser, notifiable_pools in self.notifiable_pools_by_guesser.items():
+            guessers_by_pools.setdefault(tuple(notifiable_pools), []).append(guesser)
+        return guessers_by_pools
+
+
+class EmailNotifier(Notifier):
+    channel = "email"
+
     html_structure = """
     <div style='display:flex; justify-content:center; width:100%; margin: 50px 0'>
         <img src='https://palpiteiros-v2.up.railway.app/static/core/img/palpiteiros.png' alt='Logo Palpiteiros' width='100'>
@@ -23,34 +79,53 @@ class EmailNotifier(abc.ABC):
     <p>
     """
 
-    def __init__(self, guessers: Iterable[Guesser]) -> None:
-        self.guessers = guessers
-        self.email_msgs: list[EmailMultiAlternatives] = []
+    # Stands for the guesser name while the contents shared by all guessers
+    # notified about the same pools are rendered (see _get_contents)
+    guesser_name_marker = "\x00guesser_name\x00"
 
-    def prepare_and_send_notifications(self):
-        self.prepare_notifications()
-        if self.have_notifications_to_send():
-            self.send_notifications()
-            return True
-        return False
+    # Used in place of the guesser name in emails that aren't personalized
+    generic_guesser_name = "palpiteiro"
 
-    def prepare_notifications(self) -> str:
-        for guesser in self.guessers:
-            notifiable_pools = self._get_notifiable_pools(guesser)
-            if notifiable_pools:
-                email_msg = self._assemble_email(guesser, notifiable_pools)
-                self.email_msgs.append(email_msg)
+    def __init__(
+        self,
+        guessers: Iterable[Guesser],
+        personalized: bool | None = None,
+    ) -> None:
+        super().__init__(guessers)
+        self.personalized = (
+            settings.EMAIL_NOTIFICATIONS_PERSONALIZED
+            if personalized is None
+            else personalized
+        )
+        self._contents_by_pools: dict[tuple[int, ...], tuple[list[str], list[str]]] = {}
 
-    def have_notifications_to_send(self) -> bool:
-        return bool(len(self.email_msgs))
+    def get_email_msgs(
+        self,
+    ) -> Iterator[tuple[Guesser | None, EmailMultiAlternatives]]:
+        """Yields the emails to send with the guesser each one is for. When
+        the emails aren't personalized, guessers notified about the same pools
+        get a single email, in BCC batches of EMAIL_BCC_BATCH_SIZE, without
+        guesser"""
+
+        if self.personalized:
+            for guesser, notifiable_pools in self.notifiable_pools_by_guesser.items():
+                yield guesser, self._assemble_email(guesser, notifiable_pools)
+            return
+
+        for notifiable_pools, guessers in self._get_guessers_by_pools().items():
+            for batch in batched(guessers, settings.EMAIL_BCC_BATCH_SIZE):
+                yield None, self._assemble_bcc_email(batch, list(notifiable_pools))
 
     def send_notifications(self):
-        with get_connection() as conn:
-            conn.send_messages(self.email_msgs)
+        """Stores the emails as deliveries, EMAIL_DELIVERY_CHUNK_SIZE at a
+        time, and queues each chunk to be sent by the workers"""
 
-    @abc.abstractmethod
-    def _get_notifiable_pools(self, guesser: Guesser) -> list[GuessPool]:
-        raise NotImplementedError()
+        for chunk in batched(self.get_email_msgs(), settings.EMAIL_DELIVERY_CHUNK_SIZE):
+            deliveries = EmailDelivery.objects.bulk_create(
+                EmailDelivery.from_email_message(email_msg, guesser) for guesser, email_msg in chunk
+            )
+            delivery_ids = [delivery.id for delivery in deliveries]
+            transaction.on_commit(partial(send_email_deliveries.delay, delivery_ids))
 
     def _assemble_email(
         self,
@@ -58,21 +133,61 @@ class EmailNotifier(abc.ABC):
         notifiable_pools: list[GuessPool],
     ) -> EmailMultiAlternatives:
         guesser_name = guesser.user.first_name
-        text_content, html_content = (
-            self._get_plural_content(guesser_name, notifiable_pools)
-            if len(notifiable_pools) > 1
-            else self._get_singular_content(guesser_name, notifiable_pools)
-        )
+        text_parts, html_parts = self._get_contents(notifiable_pools)
         recipients = [guesser.user.email]
         email = EmailMultiAlternatives(
             self.subject,
-            text_content,
+            guesser_name.join(text_parts),
             f"Palpiteiros <{settings.DEFAULT_FROM_EMAIL}>",
             to=recipients,
         )
-        email.attach_alternative(html_content, "text/html")
+        email.attach_alternative(guesser_name.join(html_parts), "text/html")
+        return email
+
+    def _assemble_bcc_email(
+        self,
+        guessers: Iterable[Guesser],
+        notifiable_pools: list[GuessPool],
+    ) -> EmailMultiAlternatives:
+        """Assembles a single email to all the guessers, in BCC. It is stored as
+        one delivery, so a failure retries it for all of them"""
+
+        text_parts, html_parts = self._get_contents(notifiable_pools)
+        email = EmailMultiAlternatives(
+            self.subject,
+            self.generic_guesser_name.join(text_parts),
+            f"Palpiteiros <{settings.DEFAULT_FROM_EMAIL}>",
+            to=[settings.DEFAULT_FROM_EMAIL],
+            bcc=[guesser.user.email for guesser in guessers],
+        )
+        email.attach_alternative(
+            self.generic_guesser_name.join(html_parts), "text/html"
+        )
         return email
 
+    def _get_contents(
+        self,
+        notifiable_pools: list[GuessPool],
+    ) -> tuple[list[str], list[str]]:
+        """Returns the text and HTML contents about notifiable_pools split
+        around the guesser name, rendered only once per run for the same
+        pools"""
+
+        key = tuple(pool.id for pool in notifiable_pools)
+        if key not in self._contents_by_pools:
+            text_content, html_content = (
+                self._get_plural_content(self.guesser_name_marker, notifiable_pools)
+                if len(notifiable_pools) > 1
+                else self._get_singular_content(
+                    self.guesser_name_marker, notifiable_pools
+                )
+            )
+            self._contents_by_pools[key] = (
+                text_content.split(self.guesser_name_marker),
+                html_content.split(self.guesser_name_marker),
+            )
+        return self._contents_by_pools[key]
+
     def _get_plural_content(
         self,
         guesser_name: str,
@@ -119,7 +234,27 @@ class EmailNotifier(abc.ABC):
         return text_content, html_content
 
 
-class NewMatchesEmailNotifier(EmailNotifier):
+class EventNotifierMixin:
+    """Makes a Notifier notify about the NotificationEvent of event_type
+    appended since its last run on its channel. The notifications are stored
+    (or sent) and the cursor is moved in the same transaction, so a run that
+    crashes midway is simply run again"""
+
+    event_type: str
+
+    def prepare_and_send_notifications(self):
+        with transaction.atomic():
+            cursor = NotificationCursor.get_locked(f"{self.channel}:{self.event_type}")
+            self.events = cursor.get_pending_events(self.event_type)
+            sent = super().prepare_and_send_notifications()
+            cursor.advance(self.events)
+        return sent
+
+    def _get_notifiable_pools_by_guesser(self):
+        return Guesser.get_involved_pools_with_events_by_guesser(self.guessers, self.events)
+
+
+class NewMatchesEmailNotifier(EventNotifierMixin, EmailNotifier):
     subject = "Novas Partidas Disponíveis"
 
     text_template_singular = "Olá, {}\nNovas partidas disponíveis no bolão {}. Acesse o app agora mesmo e deixe seus palpites!"
@@ -134,14 +269,17 @@ class NewMatchesEmailNotifier(EmailNotifier):
         "Novas partidas disponíveis nos bolões {}. Acesse o app agora mesmo e deixe seus palpites! 🍀⚽",
     )
 
-    def __init__(self, guessers: Iterable[Guesser]) -> None:
-        super().__init__(guessers)
+    event_type = NotificationEvent.NEW_MATCH
 
-    def _get_notifiable_pools(self, guesser: Guesser):
-        return list(guesser.get_involved_pools_with_new_matches())
+    def __init__(
+        self,
+        guessers: Iterable[Guesser],
+        personalized: bool | None = None,
+    ) -> None:
+        super().__init__(guessers, personalized)
 
 
-class UpdatedMatchesEmailNotifier(EmailNotifier):
+class UpdatedMatchesEmailNotifier(EventNotifierMixin, EmailNotifier):
     subject = "Bolões Atualizados"
 
     text_template_singular = "Olá, {}\nO bolão {} foi atualizado. Acesse o app agora mesmo e confira seus resultados!"
@@ -156,11 +294,14 @@ class UpdatedMatchesEmailNotifier(EmailNotifier):
         "Os bolões {} foram atualizados. Acesse o app agora mesmo e confira seus resultados! 📊🏆",
     )
 
-    def __init__(self, guessers: Iterable[Guesser]) -> None:
-        super().__init__(guessers)
+    event_type = NotificationEvent.UPDATED_MATCH
 
-    def _get_notifiable_pools(self, guesser: Guesser):
-        return list(guesser.get_involved_pools_with_updated_matches())
+    def __init__(
+        self,
+        guessers: Iterable[Guesser],
+        personalized: bool | None = None,
+    ) -> None:
+        super().__init__(guessers, personalized)
 
 
 class PendingMatchesEmailNotifier(EmailNotifier):
@@ -178,8 +319,81 @@ class PendingMatchesEmailNotifier(EmailNotifier):
         "Os bolões {} possuem partidas que você ainda não palpitou. Acesse o app e deixe seus palpites. 🍀🏆",
     )
 
-    def __init__(self, guessers: Iterable[Guesser]) -> None:
+    def __init__(
+        self,
+        guessers: Iterable[Guesser],
+        personalized: bool | None = None,
+    ) -> None:
+        super().__init__(guessers, personalized)
+
+    def _get_notifiable_pools_by_guesser(self):
+        return Guesser.get_involved_pools_with_pending_matches_by_guesser(self.guessers)
+
+
+class PushNotifier(Notifier):
+    """Sends a push notification per set of pools to all the guessers
+    notified about them, batched by the PushService"""
+
+    channel = "push"
+
+    url = "https://palpiteiros-v2.up.railway.app/"
+
+    def __init__(self, guessers: Iterable[Guesser], service: PushService) -> None:
         super().__init__(guessers)
+        self.service = service
+
+    def send_notifications(self):
+        """Stores a delivery per batch of guessers notified about the same
+        pools and queues them to be sent by the workers"""
+
+        deliveries = []
+        for notifiable_pools, guessers in self._get_guessers_by_pools().items():
+            content = self._get_content(notifiable_pools)
+            external_ids = [guesser.push_external_id for guesser in guessers]
+            deliveries += [
+                PushDelivery(
+                    external_ids=batch, heading=self.heading, content=content, url=self.url
+                )
+                for batch in self.service.get_batches(external_ids)
+            ]
+
+        delivery_ids = [delivery.id for delivery in PushDelivery.objects.bulk_create(deliveries)]
+        if delivery_ids:
+            transaction.on_commit(partial(send_push_deliveries.delay, delivery_ids))
+
+    def _get_content(self, notifiable_pools: Iterable[GuessPool]) -> str:
+        pool_names = [str(pool) for pool in notifiable_pools]
+        if len(pool_names) == 1:
+            return self.content_template_singular.format(pool_names[0])
+
+        return self.content_template_plural.format(
+            ", ".join(pool_names[:-1]) + f" e {pool_names[-1]}"
+        )
+
+
+class NewMatchesPushNotifier(EventNotifierMixin, PushNotifier):
+    event_type = NotificationEvent.NEW_MATCH
+
+    heading = "Novas Partidas Disponíveis"
+
+    content_template_singular = "Novas partidas disponíveis no bolão {}. Deixe seus palpites! 🍀⚽"
+    content_template_plural = "Novas partidas disponíveis nos bolões {}. Deixe seus palpites! 🍀⚽"
+
+
+class UpdatedMatchesPushNotifier(EventNotifierMixin, PushNotifier):
+    event_type = NotificationEvent.UPDATED_MATCH
+
+    heading = "Bolões Atualizados"
+
+    content_template_singular = "O bolão {} foi atualizado. Confira seus resultados! 📊🏆"
+    content_template_plural = "Os bolões {} foram atualizados. Confira seus resultados! 📊🏆"
+
+
+class PendingMatchesPushNotifier(PushNotifier):
+    heading = "Palpites Pendentes"
+
+    content_template_singular = "O bolão {} possui partidas que você ainda não palpitou. 🍀🏆"
+    content_template_plural = "Os bolões {} possuem partidas que você ainda não palpitou. 🍀🏆"
 
-    def _get_notifiable_pools(self, guesser: Guesser):
-        return list(guesser.get_involved_pools_with_pending_matches())
+    def _get_notifiable_pools_by_guesser(self):
+        return Guesser.get_involved_pools_with_pending_matches_by_guesser(self.guessers)
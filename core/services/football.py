@@ -4,7 +4,9 @@ from datetime import date
 import requests
 from django.conf import settings
 
+from .http import Timeout, get_default_timeout, get_shared_session
 from .interfaces import IFootballApi
+from .response_cache import ResponseCache, api_response_cache, is_settled_day
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +17,11 @@ class FootballApi(IFootballApi):
         "x-rapidapi-key": settings.FOOTBALL_API_KEY,
         "x-rapidapi-host": settings.FOOTBALL_API_HOST,
     }
+    # Overridable HTTP options, defaulting to the session shared by the API clients
+    # and to the EXTERNAL_API_*_TIMEOUT settings
+    session: requests.Session | None = None
+    timeout: Timeout | None = None
+    response_cache: ResponseCache = api_response_cache
 
     @classmethod
     def get_league_by_id(cls, league_id: int) -> dict | None:
@@ -22,10 +29,9 @@ class FootballApi(IFootballApi):
         params = {
             "id": league_id,
         }
-        response = cls._fetch_data(resource, params)
+        json_data = cls._fetch_json("football:leagues", resource, params)
 
-        if response is not None:
-            json_data = response.json()
+        if json_data is not None:
             try:
                 return json_data["response"][0]
             except IndexError:
@@ -40,9 +46,9 @@ class FootballApi(IFootballApi):
             "league": league_id,
             "season": season,
         }
-        response = cls._fetch_data(resource, params)
+        json_data = cls._fetch_json("football:teams", resource, params)
 
-        return response.json()["response"] or []
+        return json_data["response"] or []
 
     @classmethod
     def get_matches_of_league_by_season_and_date_period(
@@ -60,17 +66,32 @@ class FootballApi(IFootballApi):
             "from": start_date.isoformat(),
             "to": end_date.isoformat(),
         }
-        response = cls._fetch_data(resource, params)
+        endpoint = "football:fixtures:settled" if is_settled_day(end_date) else "football:fixtures"
+        json_data = cls._fetch_json(endpoint, resource, params)
 
-        return response.json()["response"] or []
+        return json_data["response"] or []
+
+    @classmethod
+    def _fetch_json(cls, endpoint: str, resource: str, params: dict[str, any]) -> dict | None:
+        """Returns the decoded response of resource, from the response cache when available.
+        Answers reporting errors are not cached"""
+
+        def fetch() -> dict | None:
+            response = cls._fetch_data(resource, params)
+            return None if response is None else response.json()
+
+        return cls.response_cache.get_or_fetch(
+            endpoint, params, fetch, should_cache=lambda data: data is not None and not data.get("errors")
+        )
 
     @classmethod
     def _fetch_data(cls, resource: str, params: dict[str, any]) -> requests.Response | None:
         try:
-            return requests.get(
+            return (cls.session or get_shared_session()).get(
                 cls._API_URL + resource,
                 headers=cls._DEFAULT_HEADERS,
                 params=params,
+                timeout=cls.timeout or get_default_timeout(),
             )
 
         except Exception:
@@ -0,0 +1,79 @@
+"""HTTP session helpers shared by the external API clients."""
+
+import random
+import threading
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+Timeout = float | tuple[float, float]
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+DEFAULT_POOL_MAXSIZE = 10
+
+
+class JitteredRetry(Retry):
+    """Retry policy with jittered exponential backoff and a bounded Retry-After.
+
+    The backoff grows as ``backoff_factor * 2 ** (retries - 1)`` and each wait
+    is randomized between half and the whole of it, so concurrent workers do
+    not retry in lockstep. Waits asked by a ``Retry-After`` header are honored
+    up to ``MAX_RETRY_AFTER`` seconds.
+    """
+
+    MAX_RETRY_AFTER = 60
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def get_retry_after(self, response) -> float | None:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, self.MAX_RETRY_AFTER)
+
+
+def build_session(
+    max_retries: int | None = None,
+    backoff_factor: float | None = None,
+    pool_maxsize: int | None = None,
+) -> requests.Session:
+    """Returns a session with keep-alive connection pools that retries GET
+    requests on connection errors and 429/5xx answers. Omitted options
+    default to the EXTERNAL_API_* settings"""
+
+    retry = JitteredRetry(
+        total=settings.EXTERNAL_API_MAX_RETRIES if max_retries is None else max_retries,
+        backoff_factor=settings.EXTERNAL_API_BACKOFF_FACTOR if backoff_factor is None else backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    if pool_maxsize is None:
+        pool_maxsize = max(DEFAULT_POOL_MAXSIZE, settings.SFI_API_MAX_WORKERS)
+
+    adapter = HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_shared_session: requests.Session | None = None
+_shared_session_lock = threading.Lock()
+
+
+def get_shared_session() -> requests.Session:
+    """Returns the session shared by the API clients of this process, built on first use"""
+
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = build_session()
+        return _shared_session
+
+
+def get_default_timeout() -> Timeout:
+    return (settings.EXTERNAL_API_CONNECT_TIMEOUT, settings.EXTERNAL_API_READ_TIMEOUT)
@@ -0,0 +1,64 @@
+"""Recording and replay of raw API payloads, to run the sync commands offline."""
+
+import json
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+from core.services.sfi import AsyncSFIService, SFIMatchesResponse
+
+
+class PayloadArchive:
+    """Directory of raw API payloads, stored as one JSON file per request.
+
+    The sync commands record the responses they get into an archive and can
+    replay them later through the same processing pipeline, without network
+    access or rate limits.
+    """
+
+    def __init__(self, directory: Path | str) -> None:
+        self.directory = Path(directory)
+
+    def save(self, name: str, data: Any) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._get_path(name).open(mode="w", encoding="utf-8") as file_obj:
+            json.dump(data, file_obj, ensure_ascii=False)
+
+    def load(self, name: str) -> Any:
+        """Returns the payload recorded as name. Raises FileNotFoundError when there is none"""
+        with self._get_path(name).open(mode="r", encoding="utf-8") as file_obj:
+            return json.load(file_obj)
+
+    def _get_path(self, name: str) -> Path:
+        return self.directory / f"{name}.json"
+
+    @staticmethod
+    def get_sfi_matches_name(target_date: date, page: int) -> str:
+        return f"sfi_matches_{target_date.isoformat()}_page_{page}"
+
+    @staticmethod
+    def get_football_fixtures_name(league_id: int, season: int, start_date: date, end_date: date) -> str:
+        return f"football_fixtures_{league_id}_{season}_{start_date.isoformat()}_{end_date.isoformat()}"
+
+
+class RecordingSFIService:
+    """Wraps an :class:`AsyncSFIService`, saving every matches page it gets into archive."""
+
+    def __init__(self, service: AsyncSFIService, archive: PayloadArchive) -> None:
+        self._service = service
+        self._archive = archive
+
+    async def get_matches_by_day(self, target_date: date, page: int = 1) -> SFIMatchesResponse:
+        response = await self._service.get_matches_by_day(target_date, page)
+        self._archive.save(PayloadArchive.get_sfi_matches_name(target_date, page), response)
+        return response
+
+
+class ReplayedSFIService:
+    """Stands in for an :class:`AsyncSFIService`, answering with the matches pages recorded in archive."""
+
+    def __init__(self, archive: PayloadArchive) -> None:
+        self._archive = archive
+
+    async def get_matches_by_day(self, target_date: date, page: int = 1) -> SFIMatchesResponse:
+        return self._archive.load(PayloadArchive.get_sfi_matches_name(target_date, page))
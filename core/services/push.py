@@ -0,0 +1,89 @@
+"""OneSignal push notifications service.
+
+Sends push notifications through the OneSignal REST API, targeting users by
+their external id (see Guesser.push_external_id).
+"""
+
+import logging
+from itertools import batched
+from typing import Iterable, Iterator
+
+import onesignal
+from django.conf import settings
+from onesignal.api import default_api
+from onesignal.model.notification import Notification
+from onesignal.model.string_map import StringMap
+
+logger = logging.getLogger(__name__)
+
+
+class PushService:
+    """Client of the OneSignal notifications endpoint.
+
+    Recipients are targeted by external id, up to ``MAX_EXTERNAL_IDS_PER_REQUEST``
+    per request (the API limit), so a notification to many users takes one
+    request per batch instead of one per user.
+
+    Typical usage::
+
+        service = PushService(app_id="...", api_key="...")
+        for batch in service.get_batches(["1", "2"]):
+            service.send(batch, "Novas Partidas Disponíveis", "Novas partidas disponíveis no bolão X.")
+    """
+
+    MAX_EXTERNAL_IDS_PER_REQUEST = 2000
+
+    def __init__(
+        self,
+        app_id: str,
+        api_key: str,
+        api_host: str | None = None,
+        batch_size: int = MAX_EXTERNAL_IDS_PER_REQUEST,
+    ) -> None:
+        self.app_id = app_id
+        self.batch_size = min(batch_size, self.MAX_EXTERNAL_IDS_PER_REQUEST)
+        self._configuration = onesignal.Configuration(host=api_host, app_key=api_key)
+
+    @classmethod
+    def from_settings(cls) -> "PushService | None":
+        """Returns a service configured from the ONESIGNAL_* settings, or None
+        when push notifications aren't configured"""
+
+        if not settings.ONESIGNAL_APP_ID or not settings.ONESIGNAL_REST_API_KEY:
+            return None
+
+        return cls(
+            settings.ONESIGNAL_APP_ID,
+            settings.ONESIGNAL_REST_API_KEY,
+            api_host=settings.ONESIGNAL_API_HOST,
+            batch_size=settings.PUSH_NOTIFICATIONS_BATCH_SIZE,
+        )
+
+    def get_batches(self, external_ids: Iterable[str]) -> Iterator[list[str]]:
+        """Splits external_ids in batches that fit in a single request"""
+
+        for batch in batched(external_ids, self.batch_size):
+            yield list(batch)
+
+    def send(self, external_ids: list[str], heading: str, content: str, url: str | None = None) -> int:
+        """Sends the notification to the users with external_ids (a batch from
+        get_batches) in a single request. Raises onesignal.ApiException when the
+        API refuses it. Returns the number of recipients reported by the API"""
+
+        notification = Notification(
+            app_id=self.app_id,
+            include_external_user_ids=external_ids,
+            channel_for_external_user_ids="push",
+            headings=StringMap(en=heading, pt=heading),
+            contents=StringMap(en=content, pt=content),
+        )
+        if url:
+            notification.url = url
+
+        with onesignal.ApiClient(self._configuration) as api_client:
+            response = default_api.DefaultApi(api_client).create_notification(notification)
+
+        if response.get("errors"):
+            logger.warning("OneSignal notification %s errors: %s", response.get("id"), response["errors"])
+
+        return response.get("recipients", 0) or 0
@@ -0,0 +1,56 @@
+"""Rate limiting helpers shared by the external API clients."""
+
+import threading
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter.
+
+    The bucket holds up to ``capacity`` tokens and is refilled at ``rate``
+    tokens per second. Every request takes one token; when the bucket is empty
+    the caller blocks until its token is refilled. Waiting callers reserve
+    their tokens in order, so concurrent workers are served fairly and the
+    long-term request rate never exceeds ``rate``.
+
+    Typical usage::
+
+        bucket = TokenBucket(rate=1 / 5, capacity=10)  # 1 request every 5s, bursts of 10
+        bucket.acquire()
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(capacity)
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds the caller must wait before using it."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self) -> float:
+        """Take a token, blocking until it is available. Returns the seconds waited."""
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
@@ -0,0 +1,97 @@
+"""Cache of the external API responses, shared by the API clients."""
+
+import hashlib
+import json
+import logging
+import threading
+import zlib
+from collections import Counter
+from datetime import date
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from core.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_ALIAS = "api_responses"
+
+
+class ResponseCache:
+    """Caches the decoded JSON responses of the external APIs.
+
+    Entries are keyed by endpoint and request params and stored as compressed
+    JSON in the ``api_responses`` cache (on disk or in Redis, see settings).
+    The expiration of each endpoint comes from ``API_RESPONSE_CACHE_TIMEOUTS``,
+    where ``None`` keeps the responses forever. Hits and misses are counted by
+    endpoint, so callers can report how many requests were saved.
+
+    Typical usage::
+
+        response_cache = ResponseCache()
+        data = response_cache.get_or_fetch("sfi:championship_view", {"i": "57449cf280464d5c"}, fetch)
+    """
+
+    def __init__(self, alias: str = RESPONSE_CACHE_ALIAS) -> None:
+        self._alias = alias
+        self.hits = Counter()
+        self.misses = Counter()
+        self._lock = threading.Lock()
+
+    def get_or_fetch(
+        self,
+        endpoint: str,
+        params: dict[str, Any],
+        fetch: Callable[[], Any],
+        should_cache: Callable[[Any], bool] = lambda data: data is not None,
+    ) -> Any:
+        """Returns the cached response of endpoint for params, or the one
+        returned by fetch, which is cached when should_cache accepts it"""
+
+        cache = caches[self._alias]
+        key = self.get_key(endpoint, params)
+
+        try:
+            compressed = cache.get(key)
+        except Exception as exc:
+            logger.warning("API response cache unavailable: %s", exc)
+            compressed = None
+        record_cache_lookup(hit=compressed is not None)
+        if compressed is not None:
+            self._count(self.hits, endpoint)
+            return json.loads(zlib.decompress(compressed))
+
+        self._count(self.misses, endpoint)
+        data = fetch()
+        if should_cache(data):
+            timeout = settings.API_RESPONSE_CACHE_TIMEOUTS[endpoint]
+            try:
+                cache.set(key, zlib.compress(json.dumps(data).encode()), timeout)
+            except Exception as exc:
+                logger.warning("Could not cache the %s response: %s", endpoint, exc)
+
+        return data
+
+    @staticmethod
+    def get_key(endpoint: str, params: dict[str, Any]) -> str:
+        params_hash = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        return f"{endpoint}:{params_hash}"
+
+    def get_summary(self) -> str:
+        return f"{self.hits.total()} cache hits, {self.misses.total()} misses"
+
+    def _count(self, counter: Counter, endpoint: str) -> None:
+        with self._lock:
+            counter[endpoint] += 1
+
+
+def is_settled_day(day: date) -> bool:
+    """Whether the matches of day are over in every timezone, so responses about it won't change"""
+    return day < timezone.localdate() - timezone.timedelta(days=1)
+
+
+# Used by the API clients when no other instance is given
+api_response_cache = ResponseCache()
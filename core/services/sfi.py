@@ -4,12 +4,21 @@ Provides typed request/response handling for the Soccer Football Info API
 hosted on RapidAPI (soccer-football-info.p.rapidapi.com).
 """
 
+import asyncio
 import logging
 from datetime import date
 from typing import Any, Generic, TypedDict, TypeVar
 
 import requests
 
+from core.services.http import Timeout, get_default_timeout, get_shared_session
+from core.services.rate_limiter import TokenBucket
+from core.services.response_cache import (
+    ResponseCache,
+    api_response_cache,
+    is_settled_day,
+)
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
@@ -162,6 +171,17 @@ class SFIService:
 
     Credentials are injected via the constructor so that tests can supply
     arbitrary values without touching Django settings or environment variables.
+    An optional ``rate_limiter`` is acquired before every request; share a
+    single instance between threads to keep them all within the API quota.
+
+    Requests go through ``session``, which defaults to the keep-alive session
+    shared by the API clients (see ``core.services.http``); pass one built with
+    ``build_session`` to change the retry policy. ``timeout`` defaults to the
+    EXTERNAL_API_*_TIMEOUT settings.
+
+    Responses are looked up in ``response_cache`` (the shared one by default)
+    before requesting them, and cache hits don't take rate limiter tokens.
+    Matches of settled days (see ``is_settled_day``) are cached forever.
 
     Typical usage::
 
@@ -177,7 +197,15 @@ class SFIService:
     SFI_ENDED_STATUS = "ENDED"
     SFI_MATCH_STATUSES = [SFI_NOT_STARTED_STATUS, SFI_ENDED_STATUS]
 
-    def __init__(self, api_key: str, api_host: str) -> None:
+    def __init__(
+        self,
+        api_key: str,
+        api_host: str,
+        rate_limiter: TokenBucket | None = None,
+        session: requests.Session | None = None,
+        timeout: Timeout | None = None,
+        response_cache: ResponseCache | None = None,
+    ) -> None:
         self._api_key = api_key
         self._api_host = api_host
         self._base_url = self._BASE_URL.format(host=api_host)
@@ -185,6 +213,39 @@ class SFIService:
             "x-rapidapi-key": api_key,
             "x-rapidapi-host": api_host,
         }
+        self._rate_limiter = rate_limiter
+        self._session = session or get_shared_session()
+        self._timeout = timeout or get_default_timeout()
+        self._response_cache = response_cache or api_response_cache
+
+    def _wait_for_rate_limit(self) -> None:
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+
+    def _get_json(self, endpoint: str, path: str, params: dict[str, Any]) -> dict:
+        """GET path with params, returning the decoded response cached for endpoint
+        when available.
+
+        Raises:
+            requests.HTTPError: If the HTTP response status is 4xx or 5xx
+                (after the retries of the session, for 429 and 5xx).
+            requests.RequestException: On network-level errors.
+        """
+
+        def fetch() -> dict:
+            logger.debug("SFI request: GET %s%s params=%s", self._base_url, path, params)
+
+            self._wait_for_rate_limit()
+            response = self._session.get(
+                self._base_url + path,
+                headers=self._headers,
+                params=params,
+                timeout=self._timeout,
+            )
+            response.raise_for_status()
+            return response.json()
+
+        return self._response_cache.get_or_fetch(endpoint, params, fetch)
 
     def get_matches_by_day(self, target_date: date, page: int = 1) -> SFIMatchesResponse:
         """Fetch matches for a specific calendar day.
@@ -202,23 +263,17 @@ class SFIService:
             The raw JSON response parsed into an ``SFIMatchesResponse`` dict.
 
         Raises:
-            requests.HTTPError: If the HTTP response status is 4xx or 5xx.
+            requests.HTTPError: If the HTTP response status is 4xx or 5xx
+                (after the retries of the session, for 429 and 5xx).
             requests.RequestException: On network-level errors.
         """
         params = {
             "d": target_date.strftime("%Y%m%d"),
             "p": page,
         }
+        endpoint = "sfi:matches_by_day:settled" if is_settled_day(target_date) else "sfi:matches_by_day"
 
-        logger.debug("SFI request: GET %s%s params=%s", self._base_url, self._MATCHES_BY_DAY_PATH, params)
-
-        response = requests.get(
-            self._base_url + self._MATCHES_BY_DAY_PATH,
-            headers=self._headers,
-            params=params,
-        )
-        response.raise_for_status()
-        return response.json()
+        return self._get_json(endpoint, self._MATCHES_BY_DAY_PATH, params)
 
     def get_teams_of_championship(self, championship_id: str, year: int) -> SFIChampionshipTeamsResponse:
         """Fetch teams from a specific championship season.
@@ -249,25 +304,14 @@ class SFIService:
             If no season matches the given year, the "teams" list will be empty.
 
         Raises:
-            requests.HTTPError: If the HTTP response status is 4xx or 5xx.
+            requests.HTTPError: If the HTTP response status is 4xx or 5xx
+                (after the retries of the session, for 429 and 5xx).
             requests.RequestException: On network-level errors.
         """
         params = {"i": championship_id}
-
-        logger.debug(
-            "SFI request: GET %s%s params=%s",
-            self._base_url,
-            self._CHAMPIONSHIPS_VIEW_PATH,
-            params,
-        )
-
-        response = requests.get(
-            self._base_url + self._CHAMPIONSHIPS_VIEW_PATH,
-            headers=self._headers,
-            params=params,
+        data: SFIChampionshipViewResponse = self._get_json(
+            "sfi:championship_view", self._CHAMPIONSHIPS_VIEW_PATH, params
         )
-        response.raise_for_status()
-        data: SFIChampionshipViewResponse = response.json()
 
         result = data.get("result", [])
         if not result:
@@ -312,3 +356,48 @@ class SFIService:
             "name": championship_name,
             "seasons": {str(year): {"teams": teams}},
         }
+
+
+class AsyncSFIService:
+    """asyncio counterpart of :class:`SFIService`, with the same methods and
+    return shapes as coroutines, so callers can fan out over dates and
+    championships concurrently::
+
+        service = AsyncSFIService(api_key=settings.SFI_API_KEY, api_host=settings.SFI_API_HOST)
+        responses = await asyncio.gather(*(service.get_matches_by_day(day) for day in days))
+
+    Requests still go through the pooled ``requests`` session and the response
+    cache, run on worker threads, at most ``max_concurrency`` at a time. The
+    ``rate_limiter`` is acquired on those threads after cache misses only; it
+    can be shared with other clients to keep them all within the API quota.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        api_host: str,
+        rate_limiter: TokenBucket | None = None,
+        max_concurrency: int = 4,
+        session: requests.Session | None = None,
+        timeout: Timeout | None = None,
+        response_cache: ResponseCache | None = None,
+    ) -> None:
+        self._service = SFIService(
+            api_key,
+            api_host,
+            rate_limiter=rate_limiter,
+            session=session,
+            timeout=timeout,
+            response_cache=response_cache,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def get_matches_by_day(self, target_date: date, page: int = 1) -> SFIMatchesResponse:
+        """See :meth:`SFIService.get_matches_by_day`."""
+        async with self._semaphore:
+            return await asyncio.to_thread(self._service.get_matches_by_day, target_date, page)
+
+    async def get_teams_of_championship(self, championship_id: str, year: int) -> SFIChampionshipTeamsResponse:
+        """See :meth:`SFIService.get_teams_of_championship`."""
+        async with self._semaphore:
+            return await asyncio.to_thread(self._service.get_teams_of_championship, championship_id, year)
@@ -0,0 +1,21 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from .models import GuessPool, PoolMatch
+
+
+@receiver(m2m_changed, sender=GuessPool.competitions.through)
+@receiver(m2m_changed, sender=GuessPool.teams.through)
+def refresh_pool_matches(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keeps PoolMatch in sync when competitions or teams of pools change"""
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        PoolMatch.refresh(pool_ids=[instance.pk])
+    elif pk_set is not None:
+        PoolMatch.refresh(pool_ids=pk_set)
+    else:
+        # Pools of a cleared competition or team are no longer known
+        PoolMatch.refresh()
@@ -1,35 +1,103 @@
 from celery import shared_task
 from celery.utils.log import get_task_logger
+from django.conf import settings
 from django.core.management import call_command
 
+from core.metrics import instrument_command
+from core.models import EmailDelivery, PushDelivery
+from core.services.push import PushService
+
 logger = get_task_logger(__name__)
 
 
+def run_command(name: str, *args):
+    """Calls the command name, exporting the metrics of its run"""
+
+    with instrument_command(name):
+        call_command(name, *args)
+
+
 @shared_task(name="get_competitions")
 def get_competitions(season: int, league_ids: list[int]):
-    call_command("get_competitions", season, league_ids)
+    run_command("get_competitions", season, league_ids)
 
 
 @shared_task(name="get_new_matches")
 def get_new_matches(days_ahead: int):
-    call_command("get_new_matches", days_ahead)
+    run_command("get_new_matches", days_ahead)
 
 
 @shared_task(name="update_matches")
 def update_matches():
-    call_command("update_matches")
+    run_command("update_matches")
+
+
+@shared_task(name="poll_live_matches", ignore_result=True)
+def poll_live_matches():
+    run_command("poll_live_matches")
 
 
 @shared_task(name="send_email_notification_of_new_matches")
 def send_email_notification_of_new_matches():
-    call_command("send_email_notification_of_new_matches")
+    run_command("send_email_notification_of_new_matches")
 
 
 @shared_task(name="send_email_notification_of_updated_matches")
 def send_email_notification_of_updated_matches():
-    call_command("send_email_notification_of_updated_matches")
+    run_command("send_email_notification_of_updated_matches")
 
 
 @shared_task(name="send_email_notification_of_pending_matches")
 def send_email_notification_of_pending_matches():
-    call_command("send_email_notification_of_pending_matches")
+    run_command("send_email_notification_of_pending_matches")
+
+
+@shared_task(name="prune_notification_events", ignore_result=True)
+def prune_notification_events():
+    run_command("prune_notification_events")
+
+
+@shared_task(
+    name="send_email_deliveries", bind=True, ignore_result=True, max_retries=settings.EMAIL_DELIVERY_MAX_RETRIES
+)
+def send_email_deliveries(self, delivery_ids: list[int]):
+    """Sends a chunk of email deliveries over a single connection, retrying
+    only the ones that failed"""
+
+    failed_ids = EmailDelivery.send_chunk(delivery_ids)
+    if failed_ids:
+        logger.warning("%s of %s emails failed, retrying them", len(failed_ids), len(delivery_ids))
+        countdown = settings.EMAIL_DELIVERY_RETRY_DELAY * 2**self.request.retries
+        raise self.retry(args=(failed_ids,), countdown=countdown)
+
+
+@shared_task(name="send_push_deliveries", bind=True, ignore_result=True, max_retries=settings.PUSH_DELIVERY_MAX_RETRIES)
+def send_push_deliveries(self, delivery_ids: list[int]):
+    """Sends push deliveries, one request per batch of recipients, retrying
+    only the ones that failed"""
+
+    service = PushService.from_settings()
+    if service is None:
+        logger.warning("Push notifications are not configured, %s deliveries not sent", len(delivery_ids))
+        return
+
+    failed_ids = PushDelivery.send_chunk(delivery_ids, service)
+    if failed_ids:
+        logger.warning("%s of %s push deliveries failed, retrying them", len(failed_ids), len(delivery_ids))
+        countdown = settings.PUSH_DELIVERY_RETRY_DELAY * 2**self.request.retries
+        raise self.retry(args=(failed_ids,), countdown=countdown)
+
+
+@shared_task(name="send_push_notification_of_new_matches")
+def send_push_notification_of_new_matches():
+    run_command("send_push_notification_of_new_matches")
+
+
+@shared_task(name="send_push_notification_of_updated_matches")
+def send_push_notification_of_updated_matches():
+    run_command("send_push_notification_of_updated_matches")
+
+
+@shared_task(name="send_push_notification_of_pending_matches")
+def send_push_notification_of_pending_matches():
+    run_command("send_push_notification_of_pending_matches")
@@ -1,7 +1,13 @@
+import json
+import threading
 from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import Mock
 
 import pytest
+from django.core.cache import cache, caches
+
+from palpiteiros.celery import app as celery_app
 
 
 @pytest.fixture
@@ -250,3 +256,126 @@ def get_sfi_matches_by_day_future_response_page_2():
             }
         ],
     }
+
+
+@pytest.fixture(autouse=True)
+def no_notification_events_visibility_delay(settings):
+    """Lets the notifiers consume the events appended by the test itself."""
+    settings.NOTIFICATION_EVENTS_VISIBILITY_DELAY = 0
+
+
+@pytest.fixture(autouse=True)
+def no_api_response_cache(settings):
+    """Keeps the external API responses out of the disk cache in tests."""
+    settings.CACHES = {**settings.CACHES, "api_responses": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+@pytest.fixture
+def locmem_api_response_cache(settings):
+    """Replaces the disabled API response cache by an empty in-memory cache."""
+    settings.CACHES = {
+        **settings.CACHES,
+        "api_responses": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "api_responses"},
+    }
+    caches["api_responses"].clear()
+    return caches["api_responses"]
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    """Replaces the Redis cache by an empty in-memory cache."""
+    settings.CACHES = {**settings.CACHES, "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    cache.clear()
+    return cache
+
+
+@pytest.fixture
+def scripted_http_server():
+    """Local HTTP server that answers GET requests with the (status, headers)
+    appended to its ``responses`` list, in order, and 200 once it is empty."""
+
+    responses = []
+    requests_received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_received.append(self.path)
+            status, headers = responses.pop(0) if responses else (HTTPStatus.OK, {})
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.responses = responses
+    server.requests_received = requests_received
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def celery_eager():
+    """Runs the Celery tasks in process, as soon as they are queued."""
+    celery_app.conf.task_always_eager = True
+    yield
+    celery_app.conf.task_always_eager = False
+
+
+@pytest.fixture
+def fake_onesignal_server(settings):
+    """Local stand-in of the OneSignal API, configured in the settings. Keeps
+    the JSON body of each notification created in ``notifications`` and
+    answers with the statuses appended to ``statuses``, in order, and 200
+    once it is empty."""
+
+    notifications = []
+    statuses = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            notification = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            status = statuses.pop(0) if statuses else HTTPStatus.OK
+            if status == HTTPStatus.OK:
+                notifications.append(notification)
+                body = {
+                    "id": f"notification-{len(notifications)}",
+                    "recipients": len(notification["include_external_user_ids"]),
+                }
+            else:
+                body = {"errors": ["Fake error"]}
+
+            content = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.notifications = notifications
+    server.statuses = statuses
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    settings.ONESIGNAL_APP_ID = "fake-app-id"
+    settings.ONESIGNAL_REST_API_KEY = "fake-api-key"
+    settings.ONESIGNAL_API_HOST = f"http://127.0.0.1:{server.server_port}"
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
@@ -1,19 +1,27 @@
 import json
-from datetime import date
+from datetime import UTC, date, datetime
+from io import StringIO
 from unittest.mock import patch
 
 import pytest
 import requests
-from django.core.management import call_command
+from django.core.management import CommandError, call_command
 from django.utils import timezone
 from model_bakery import baker
 
-from ..models import Competition, Match, Team
+from ..models import (
+    Competition,
+    GuessPool,
+    Match,
+    NotificationEvent,
+    RankingEntry,
+    Team,
+)
 
 pytestmark = pytest.mark.django_db
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_command_create_or_update_competitions_successfully(
     mock_get,
     mock_success_response,
@@ -37,7 +45,7 @@ def test_command_create_or_update_competitions_successfully(
     assert competitions.first().name == f"{league_name}"
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_command_create_or_update_competitions_league_not_found(
     mock_get, mock_success_response, football_api_empty_response
 ):
@@ -52,7 +60,7 @@ def test_command_create_or_update_competitions_league_not_found(
     assert not Competition.objects.exists()
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_command_create_or_update_teams_for_competitions_successfully(
     mock_get,
     mock_success_response,
@@ -77,13 +85,11 @@ def test_command_create_or_update_teams_for_competitions_successfully(
     assert all([team.competitions.filter(data_source_id=competition.data_source_id).exists() for team in teams])
 
 
-@patch("core.management.commands.sync_matches_sfi.sleep")
 @patch("core.management.commands.sync_matches_sfi.django_timezone")
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_sync_matches_sfi_creates_not_started_match(
     mock_get,
     mock_tz,
-    mock_sleep,
     mock_success_response,
     get_sfi_matches_by_day_future_response_page_1,
     get_sfi_matches_by_day_future_response_page_2,
@@ -123,7 +129,52 @@ def test_sync_matches_sfi_creates_not_started_match(
 
 
 @patch("core.management.commands.sync_matches_sfi.django_timezone")
-@patch("requests.get")
+@patch("requests.Session.get")
+def test_sync_matches_sfi_does_not_count_a_match_stored_meanwhile_as_created(
+    mock_get,
+    mock_tz,
+    mock_success_response,
+    get_sfi_matches_by_day_past_response,
+    sfi_competition_id,
+    sfi_home_team_id,
+    sfi_away_team_id,
+    capsys,
+):
+    """A match stored after the preload (e.g. by a concurrent sync) is updated, not notified as new."""
+    mock_tz.now.return_value.date.return_value = date(2026, 3, 3)
+    mock_tz.timedelta = timezone.timedelta
+
+    competition = baker.make("core.Competition", sfi_id=sfi_competition_id)
+    home_team = baker.make("core.Team", sfi_id=sfi_home_team_id, competitions=[competition])
+    away_team = baker.make("core.Team", sfi_id=sfi_away_team_id, competitions=[competition])
+    pool = baker.make("core.GuessPool", competitions=[competition])
+    GuessPool.objects.filter(id=pool.id).update(created=datetime(2026, 1, 1, tzinfo=UTC))
+    match = baker.make(
+        "core.Match",
+        sfi_id="match-sfi-ns-001",
+        competition=competition,
+        home_team=home_team,
+        away_team=away_team,
+        date_time=datetime(2026, 3, 3, tzinfo=UTC),
+    )
+    NotificationEvent.objects.all().delete()
+
+    response = get_sfi_matches_by_day_past_response
+    response["result"][0].update(id="match-sfi-ns-001", status="NOT_STARTED", date="2026-03-03 20:00:00")
+    mock_success_response.json.return_value = response
+    mock_get.return_value = mock_success_response
+
+    with patch.object(Match.objects, "in_bulk", return_value={}):
+        call_command("sync_matches_sfi", date=date(2026, 3, 3))
+
+    match.refresh_from_db()
+    assert match.date_time == datetime(2026, 3, 3, 20, tzinfo=UTC)
+    assert list(NotificationEvent.objects.values_list("type", flat=True)) == [NotificationEvent.UPDATED_MATCH]
+    assert "0 created, 1 updated, 0 unchanged, 0 skipped" in capsys.readouterr().out
+
+
+@patch("core.management.commands.sync_matches_sfi.django_timezone")
+@patch("requests.Session.get")
 def test_sync_matches_sfi_updates_ended_match_when_exists(
     mock_get,
     mock_tz,
@@ -166,7 +217,163 @@ def test_sync_matches_sfi_updates_ended_match_when_exists(
 
 
 @patch("core.management.commands.sync_matches_sfi.django_timezone")
-@patch("requests.get")
+@patch("requests.Session.get")
+def test_sync_matches_sfi_scores_ended_match_and_flags_its_pools(
+    mock_get,
+    mock_tz,
+    mock_success_response,
+    get_sfi_matches_by_day_past_response,
+    sfi_competition_id,
+    sfi_home_team_id,
+    sfi_away_team_id,
+):
+    """Side effects of Match.save run for the bulk written matches."""
+    mock_tz.now.return_value.date.return_value = date(2026, 3, 3)
+    mock_tz.timedelta = timezone.timedelta
+
+    competition = baker.make("core.Competition", sfi_id=sfi_competition_id)
+    home_team = baker.make("core.Team", sfi_id=sfi_home_team_id, competitions=[competition])
+    away_team = baker.make("core.Team", sfi_id=sfi_away_team_id, competitions=[competition])
+    pool = baker.make("core.GuessPool")
+    GuessPool.objects.filter(pk=pool.pk).update(created=datetime(2026, 1, 1, tzinfo=UTC))
+    pool.competitions.add(competition)
+    existing_match = baker.make(
+        "core.Match",
+        sfi_id="match-sfi-ended-001",
+        competition=competition,
+        home_team=home_team,
+        away_team=away_team,
+        date_time=datetime(2026, 2, 26, 20, tzinfo=UTC),
+        status=Match.NOT_STARTED,
+    )
+    guess = baker.make("core.Guess", match=existing_match, home_goals=2, away_goals=1)
+    pool.guesses.add(guess)
+    NotificationEvent.objects.all().delete()
+
+    mock_success_response.json.return_value = get_sfi_matches_by_day_past_response
+    mock_get.return_value = mock_success_response
+
+    call_command("sync_matches_sfi", date=date(2026, 2, 26))
+
+    guess.refresh_from_db()
+    pool.refresh_from_db()
+    assert guess.score == 10
+    assert guess.consolidated
+    assert RankingEntry.objects.get(pool=pool, guesser=guess.guesser, year=0).score == 10
+    assert list(pool.notification_events.values_list("type", flat=True)) == [NotificationEvent.UPDATED_MATCH]
+
+
+@patch("core.management.commands.sync_matches_sfi.django_timezone")
+@patch("requests.Session.get")
+def test_sync_matches_sfi_skips_writes_of_unchanged_matches(
+    mock_get,
+    mock_tz,
+    mock_success_response,
+    get_sfi_matches_by_day_past_response,
+    sfi_competition_id,
+    sfi_home_team_id,
+    sfi_away_team_id,
+    capsys,
+):
+    """An ENDED match whose result is already stored is neither written nor flagged again."""
+    mock_tz.now.return_value.date.return_value = date(2026, 3, 3)
+    mock_tz.timedelta = timezone.timedelta
+
+    competition = baker.make("core.Competition", sfi_id=sfi_competition_id)
+    home_team = baker.make("core.Team", sfi_id=sfi_home_team_id, competitions=[competition])
+    away_team = baker.make("core.Team", sfi_id=sfi_away_team_id, competitions=[competition])
+    pool = baker.make("core.GuessPool")
+    pool.teams.add(home_team)
+    baker.make(
+        "core.Match",
+        sfi_id="match-sfi-ended-001",
+        competition=competition,
+        home_team=home_team,
+        away_team=away_team,
+        status=Match.FINSHED,
+        home_goals=2,
+        away_goals=1,
+    )
+    NotificationEvent.objects.all().delete()
+
+    mock_success_response.json.return_value = get_sfi_matches_by_day_past_response
+    mock_get.return_value = mock_success_response
+
+    call_command("sync_matches_sfi", date=date(2026, 2, 26))
+
+    assert not pool.notification_events.exists()
+    assert "0 created, 0 updated, 1 unchanged, 0 skipped" in capsys.readouterr().out
+
+
+@patch("core.management.commands.create_and_update_matches.sleep")
+@patch("core.services.football.FootballApi.get_matches_of_league_by_season_and_date_period")
+def test_create_and_update_matches_only_saves_changed_matches(mock_get_matches, mock_sleep, capsys):
+    competition = baker.make(Competition, in_progress=True)
+    home_team, away_team = baker.make(Team, data_source_id=iter([1, 2]), _quantity=2)
+    pool = baker.make("core.GuessPool")
+    pool.teams.add(home_team)
+    kickoff = timezone.now() + timezone.timedelta(days=1)
+    unchanged_match, changed_match = baker.make(
+        Match,
+        data_source_id=iter([10, 20]),
+        competition=competition,
+        home_team=home_team,
+        away_team=away_team,
+        date_time=iter([kickoff, kickoff + timezone.timedelta(hours=2)]),
+        status=Match.NOT_STARTED,
+        home_goals=None,
+        away_goals=None,
+        _quantity=2,
+    )
+    NotificationEvent.objects.all().delete()
+
+    def fixture(match, date_time):
+        return {
+            "fixture": {"id": match.data_source_id, "date": date_time.isoformat(), "status": {"short": "NS"}},
+            "teams": {"home": {"id": 1}, "away": {"id": 2}},
+            "goals": {"home": None, "away": None},
+        }
+
+    mock_get_matches.return_value = [
+        fixture(unchanged_match, unchanged_match.date_time),
+        fixture(changed_match, changed_match.date_time + timezone.timedelta(hours=1)),
+    ]
+
+    call_command("create_and_update_matches")
+
+    changed_match.refresh_from_db()
+    assert changed_match.date_time == kickoff + timezone.timedelta(hours=3)
+    assert list(pool.notification_events.values_list("match", flat=True)) == [changed_match.id]
+    assert "0 matches created, 1 updated and 1 unchanged matches" in capsys.readouterr().out
+
+
+@patch("core.management.commands.create_and_update_matches.sleep")
+@patch("core.services.football.FootballApi.get_matches_of_league_by_season_and_date_period")
+def test_create_and_update_matches_replays_recorded_payloads(mock_get_matches, mock_sleep, tmp_path):
+    competition = baker.make(Competition, in_progress=True)
+    baker.make(Team, data_source_id=iter([1, 2]), _quantity=2)
+    mock_get_matches.return_value = [
+        {
+            "fixture": {"id": 10, "date": "2026-03-03T16:00:00-03:00", "status": {"short": "NS"}},
+            "teams": {"home": {"id": 1}, "away": {"id": 2}},
+            "goals": {"home": None, "away": None},
+        }
+    ]
+    period = {"start_date": date(2026, 3, 1), "end_date": date(2026, 3, 5)}
+
+    call_command("create_and_update_matches", record_payloads=str(tmp_path), **period)
+    Match.objects.all().delete()
+    mock_get_matches.reset_mock()
+    mock_sleep.reset_mock()
+    call_command("create_and_update_matches", replay_payloads=str(tmp_path), **period)
+
+    mock_get_matches.assert_not_called()
+    mock_sleep.assert_not_called()
+    assert list(Match.objects.values_list("data_source_id", "competition")) == [(10, competition.id)]
+
+
+@patch("core.management.commands.sync_matches_sfi.django_timezone")
+@patch("requests.Session.get")
 def test_sync_matches_sfi_does_not_create_ended_match_when_not_in_db(
     mock_get,
     mock_tz,
@@ -193,7 +400,7 @@ def test_sync_matches_sfi_does_not_create_ended_match_when_not_in_db(
 
 
 @patch("core.management.commands.sync_matches_sfi.django_timezone")
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_sync_matches_sfi_skips_untracked_competition(
     mock_get,
     mock_tz,
@@ -215,13 +422,11 @@ def test_sync_matches_sfi_skips_untracked_competition(
     assert not Match.objects.exists()
 
 
-@patch("core.management.commands.sync_matches_sfi.sleep")
 @patch("core.management.commands.sync_matches_sfi.django_timezone")
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_sync_matches_sfi_registers_unknown_teams_and_processes_match(
     mock_get,
     mock_tz,
-    mock_sleep,
     mock_success_response,
     get_sfi_matches_by_day_future_response_page_1,
     get_sfi_matches_by_day_future_response_page_2,
@@ -263,13 +468,11 @@ def test_sync_matches_sfi_registers_unknown_teams_and_processes_match(
     assert "2 teams registered" in output
 
 
-@patch("core.management.commands.sync_matches_sfi.sleep")
 @patch("core.management.commands.sync_matches_sfi.django_timezone")
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_sync_matches_sfi_paginated_future_date_calls_multiple_pages(
     mock_get,
     mock_tz,
-    mock_sleep,
     mock_success_response,
     get_sfi_matches_by_day_future_response_page_1,
     get_sfi_matches_by_day_future_response_page_2,
@@ -277,7 +480,7 @@ def test_sync_matches_sfi_paginated_future_date_calls_multiple_pages(
     sfi_home_team_id,
     sfi_away_team_id,
 ):
-    """For a future date, requests.get is called once per page (two pages here)."""
+    """For a future date, the session is requested once per page (two pages here)."""
     mock_tz.now.return_value.date.return_value = date(2026, 3, 3)
     mock_tz.timedelta = timezone.timedelta
 
@@ -301,7 +504,110 @@ def test_sync_matches_sfi_paginated_future_date_calls_multiple_pages(
     assert mock_get.call_count == 2
 
 
-@patch("requests.get")
+@patch("core.management.commands.sync_matches_sfi.django_timezone")
+@patch("requests.Session.get")
+def test_sync_matches_sfi_processes_other_dates_when_a_date_fails(
+    mock_get,
+    mock_tz,
+    mock_success_response,
+    get_sfi_matches_by_day_past_response,
+    sfi_competition_id,
+    sfi_home_team_id,
+    sfi_away_team_id,
+    capsys,
+):
+    """A failed request only skips its own page; the other dates are still processed."""
+    mock_tz.now.return_value.date.return_value = date(2026, 3, 3)
+    mock_tz.timedelta = timezone.timedelta
+
+    competition = baker.make("core.Competition", sfi_id=sfi_competition_id)
+    home_team = baker.make("core.Team", sfi_id=sfi_home_team_id, competitions=[competition])
+    away_team = baker.make("core.Team", sfi_id=sfi_away_team_id, competitions=[competition])
+    existing_match = baker.make(
+        "core.Match",
+        sfi_id="match-sfi-ended-001",
+        competition=competition,
+        home_team=home_team,
+        away_team=away_team,
+        status=Match.NOT_STARTED,
+    )
+
+    def get(url, headers, params, timeout):
+        if params["d"] == "20260225":
+            raise requests.ConnectionError("connection reset")
+        mock_success_response.json.return_value = get_sfi_matches_by_day_past_response
+        return mock_success_response
+
+    mock_get.side_effect = get
+
+    call_command("sync_matches_sfi", start_date=date(2026, 2, 25), end_date=date(2026, 2, 26))
+
+    existing_match.refresh_from_db()
+    assert existing_match.status == Match.FINSHED
+    assert mock_get.call_count == 2
+    assert "could not fetch matches for 2026-02-25 (page 1)" in capsys.readouterr().err
+
+
+@patch("requests.Session.get")
+def test_sync_matches_sfi_rerun_over_settled_dates_makes_no_api_calls(
+    mock_get,
+    mock_success_response,
+    get_sfi_matches_by_day_past_response,
+    sfi_competition_id,
+    locmem_api_response_cache,
+    capsys,
+):
+    baker.make("core.Competition", sfi_id=sfi_competition_id)
+    mock_success_response.json.return_value = get_sfi_matches_by_day_past_response
+    mock_get.return_value = mock_success_response
+
+    call_command("sync_matches_sfi", start_date=date(2026, 2, 25), end_date=date(2026, 2, 26))
+    call_command("sync_matches_sfi", start_date=date(2026, 2, 25), end_date=date(2026, 2, 26))
+
+    assert mock_get.call_count == 2
+    assert "sync_matches_sfi finished (2 cache hits, 0 misses)." in capsys.readouterr().out
+
+
+@patch("core.management.commands.sync_matches_sfi.django_timezone")
+@patch("requests.Session.get")
+def test_sync_matches_sfi_replays_recorded_pages_offline(
+    mock_get,
+    mock_tz,
+    mock_success_response,
+    get_sfi_matches_by_day_future_response_page_1,
+    get_sfi_matches_by_day_future_response_page_2,
+    sfi_competition_id,
+    sfi_home_team_id,
+    sfi_away_team_id,
+    tmp_path,
+):
+    """Recorded pages of a future date are all replayed, without API calls, once the date is past."""
+    mock_tz.now.return_value.date.return_value = date(2026, 3, 3)
+    competition = baker.make("core.Competition", sfi_id=sfi_competition_id)
+    baker.make("core.Team", sfi_id=sfi_home_team_id, competitions=[competition])
+    baker.make("core.Team", sfi_id=sfi_away_team_id, competitions=[competition])
+
+    page_2_response = type(mock_success_response)()
+    page_2_response.json.return_value = get_sfi_matches_by_day_future_response_page_2
+    mock_success_response.json.return_value = get_sfi_matches_by_day_future_response_page_1
+    mock_get.side_effect = [mock_success_response, page_2_response]
+
+    call_command("sync_matches_sfi", date=date(2026, 3, 3), record_payloads=str(tmp_path))
+    recorded_matches = set(Match.objects.values_list("sfi_id", flat=True))
+    Match.objects.all().delete()
+    mock_tz.now.return_value.date.return_value = date(2026, 4, 1)
+    call_command("sync_matches_sfi", date=date(2026, 3, 3), replay_payloads=str(tmp_path))
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "sfi_matches_2026-03-03_page_1.json",
+        "sfi_matches_2026-03-03_page_2.json",
+    ]
+    assert mock_get.call_count == 2
+    assert recorded_matches
+    assert set(Match.objects.values_list("sfi_id", flat=True)) == recorded_matches
+
+
+@patch("requests.Session.get")
 def test_sync_matches_sfi_with_no_competitions(mock_get):
     """When no competitions have an SFI ID, the command exits early without calling the API."""
     # Competition exists but has no sfi_id — should trigger the early-return path.
@@ -312,11 +618,9 @@ def test_sync_matches_sfi_with_no_competitions(mock_get):
     mock_get.assert_not_called()
 
 
-@patch("core.management.commands.get_teams_of_championships_sfi.sleep")
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_get_teams_of_championships_sfi_creates_output_with_custom_paths(
     mock_get,
-    mock_sleep,
     mock_success_response,
     tmp_path,
 ):
@@ -420,7 +724,9 @@ def test_get_teams_of_championships_sfi_creates_output_with_custom_paths(
         ],
     }
 
-    mock_get.side_effect = [first_response, second_response]
+    # Championships are fetched concurrently, so responses are matched by ID
+    responses = {"champ-1": first_response, "champ-2": second_response}
+    mock_get.side_effect = lambda url, headers, params, timeout: responses[params["i"]]
 
     call_command(
         "get_teams_of_championships_sfi",
@@ -440,11 +746,9 @@ def test_get_teams_of_championships_sfi_creates_output_with_custom_paths(
     assert saved_data[1]["teams"] == [{"id": "team-2", "name": "Team 2"}]
 
 
-@patch("core.management.commands.get_teams_of_championships_sfi.sleep")
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_get_teams_of_championships_sfi_overwrites_existing_entry_by_id(
     mock_get,
-    mock_sleep,
     mock_success_response,
     tmp_path,
 ):
@@ -517,11 +821,9 @@ def test_get_teams_of_championships_sfi_overwrites_existing_entry_by_id(
     assert saved_data[0]["teams"] == [{"id": "team-new", "name": "New Team"}]
 
 
-@patch("core.management.commands.get_teams_of_championships_sfi.sleep")
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_get_teams_of_championships_sfi_continues_after_request_failure(
     mock_get,
-    mock_sleep,
     mock_success_response,
     tmp_path,
 ):
@@ -580,7 +882,12 @@ def test_get_teams_of_championships_sfi_continues_after_request_failure(
         ],
     }
 
-    mock_get.side_effect = [requests.RequestException("boom"), mock_success_response]
+    def get(url, headers, params, timeout):
+        if params["i"] == "champ-fail":
+            raise requests.RequestException("boom")
+        return mock_success_response
+
+    mock_get.side_effect = get
 
     call_command(
         "get_teams_of_championships_sfi",
@@ -599,3 +906,138 @@ def test_get_teams_of_championships_sfi_continues_after_request_failure(
     assert saved_data[0]["id"] == "champ-ok"
     assert saved_data[0]["teams"] == [{"id": "team-2025", "name": "Team 2025"}]
     assert mock_get.call_count == 2
+
+
+def _ranking_snapshot():
+    return set(RankingEntry.objects.values_list("pool", "guesser", "year", "month", "week", "score"))
+
+
+def test_update_ranking_entries_rebuilds_entries_from_consolidated_guesses():
+    """Rebuilt entries match the ones maintained incrementally by match updates."""
+    pool = baker.make("core.GuessPool")
+    other_pool = baker.make("core.GuessPool")
+    matches = [
+        baker.make("core.Match", date_time=datetime(2026, 3, 1, 20, tzinfo=UTC)),
+        baker.make("core.Match", date_time=datetime(2026, 4, 30, 23, 30, tzinfo=UTC)),
+    ]
+    for match in matches:
+        for guesser in pool.guessers.all():
+            guess = baker.make("core.Guess", match=match, guesser=guesser, home_goals=2, away_goals=1)
+            pool.guesses.add(guess)
+            other_pool.guesses.add(guess)
+        match.status = Match.FINSHED
+        match.home_goals = 2
+        match.away_goals = 0
+        match.save()
+
+    # in progress guesses are not consolidated, so they don't count
+    baker.make("core.Guess", match=baker.make("core.Match"), score=10, consolidated=False, pools=[pool])
+
+    expected_entries = _ranking_snapshot()
+    assert len(expected_entries) == 2 * (1 + 1 + 2 + 2)  # pools x periods
+
+    RankingEntry.objects.filter(pool=pool).update(score=999)
+    call_command("update_ranking_entries")
+
+    assert _ranking_snapshot() == expected_entries
+
+
+def test_update_ranking_entries_scoped_rebuild_only_writes_changed_entries(capsys):
+    """A pool/period scoped rebuild fixes that slice and leaves everything else untouched."""
+    pool = baker.make("core.GuessPool")
+    other_pool = baker.make("core.GuessPool")
+    guesser = pool.owner
+    match = baker.make("core.Match", date_time=datetime(2026, 3, 10, 20, tzinfo=UTC))
+    guess = baker.make("core.Guess", match=match, guesser=guesser, home_goals=1, away_goals=0)
+    pool.guesses.add(guess)
+    other_pool.guesses.add(guess)
+    match.status = Match.FINSHED
+    match.home_goals = 1
+    match.away_goals = 0
+    match.save()
+
+    monthly_entry = RankingEntry.objects.get(pool=pool, guesser=guesser, year=2026, month=3, week=0)
+    RankingEntry.objects.filter(pk=monthly_entry.pk).update(score=1)
+    stale_entry = baker.make(RankingEntry, pool=pool, guesser=guesser, year=2026, month=0, week=12, score=5)
+    stale_out_of_range = baker.make(RankingEntry, pool=pool, guesser=guesser, year=2025, month=5, week=0, score=3)
+    RankingEntry.objects.filter(pool=other_pool, year=0).update(score=42)
+
+    call_command(
+        "update_ranking_entries",
+        "--pool",
+        str(pool.id),
+        "--since",
+        "2026-03-01",
+        "--until",
+        "2026-03-31",
+    )
+
+    assert "1 entries written and 1 deleted" in capsys.readouterr().out
+    assert RankingEntry.objects.get(pk=monthly_entry.pk).score == 10
+    assert not RankingEntry.objects.filter(pk=stale_entry.pk).exists()
+    assert RankingEntry.objects.filter(pk=stale_out_of_range.pk).exists()
+    assert RankingEntry.objects.get(pool=other_pool, year=0).score == 42
+
+
+def test_command_explain_hot_queries_finds_indexes_for_all_queries():
+    competition = baker.make(Competition)
+    pool = baker.make("core.GuessPool")
+    pool.competitions.add(competition)
+    match = baker.make(Match, competition=competition, date_time=timezone.now() + timezone.timedelta(hours=1))
+    baker.make("core.Guess", match=match, _quantity=2)
+
+    out = StringIO()
+    call_command("explain_hot_queries", "--prefer-indexes", "--fail-on-seq-scan", stdout=out)
+
+    assert "0 of 10 queries planned with sequential scans." in out.getvalue()
+
+
+@patch("core.management.commands.poll_live_matches.call_command")
+def test_poll_live_matches_polls_only_when_due(mock_call_command, locmem_cache):
+    call_command("poll_live_matches")
+    mock_call_command.assert_not_called()
+
+    match = baker.make(Match, date_time=timezone.now() - timezone.timedelta(minutes=100), status=Match.SECOND_HALF)
+
+    call_command("poll_live_matches")
+    call_command("poll_live_matches")
+
+    mock_call_command.assert_called_once()
+    assert mock_call_command.call_args.kwargs["competition_ids"] == [match.competition_id]
+    assert mock_call_command.call_args.kwargs["start_date"] == timezone.localdate(match.date_time)
+
+    call_command("poll_live_matches", "--force")
+
+    assert mock_call_command.call_count == 2
+
+
+@patch("core.management.commands.poll_live_matches.call_command")
+def test_poll_live_matches_keeps_polling_unfinished_matches_after_the_usual_duration(mock_call_command, locmem_cache):
+    match = baker.make(Match, date_time=timezone.now() - timezone.timedelta(minutes=151), status=Match.SECOND_HALF)
+
+    out = StringIO()
+    call_command("poll_live_matches", stdout=out)
+
+    mock_call_command.assert_called_once()
+    assert mock_call_command.call_args.kwargs["competition_ids"] == [match.competition_id]
+    assert "Polling 1 matches in play (interval: 0:30:00)" in out.getvalue()
+
+
+def test_benchmark_ingestion_compares_with_the_stored_baseline(locmem_cache, tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    options = {"guesses": 40, "matches": 4, "pools": 2, "baseline": baseline}
+
+    call_command("benchmark_ingestion", save_baseline=True, **options)
+    call_command("benchmark_ingestion", tolerance=10, **options)
+
+    assert "No regressions from the baseline." in capsys.readouterr().out
+    assert not Match.objects.exists()
+    assert not locmem_cache._cache
+
+    baselines = json.loads(baseline.read_text())
+    scale = "40 guesses, 4 matches, 2 pools"
+    baselines[scale]["Match.evaluate_and_consolidate_guesses"]["queries"] = 0
+    baseline.write_text(json.dumps(baselines))
+
+    with pytest.raises(CommandError, match="1 of 5 steps regressed"):
+        call_command("benchmark_ingestion", tolerance=10, **options)
@@ -1,6 +1,11 @@
+from unittest.mock import patch
+
 import pytest
+from django.utils import timezone
 from model_bakery import baker
 
+from ..models import Guess, RankingDeltas, RankingEntry
+
 pytestmark = pytest.mark.django_db
 
 
@@ -26,3 +31,201 @@ def test_get_matches():
     # Once added to Guess Pool, a match should remain in it even if teams involved have been removed from a registered competition
     competition.teams.clear()
     assert guess_pool.get_matches().count() == 2
+
+
+def test_get_ranking_for_period_is_served_from_cache(locmem_cache, django_assert_num_queries):
+    pool = baker.make("core.GuessPool")
+    guesser = baker.make("core.Guesser", user__first_name="Zeca")
+    pool.guessers.add(guesser)
+    baker.make("core.RankingEntry", pool=pool, guesser=guesser, year=2026, month=0, week=0, score=7)
+
+    ranking = pool.get_ranking_for_period(year="2026", month=0, week=0)
+
+    assert [(row.guesser_id, row.score, row.position) for row in ranking] == [
+        (guesser.id, 7, 1),
+        (pool.owner.id, 0, 2),
+    ]
+    assert ranking[0].name == str(guesser)
+    with django_assert_num_queries(0):
+        assert pool.get_ranking_for_period(year=2026, month=0, week=0) == ranking
+
+
+def test_get_ranking_for_period_is_invalidated_when_entries_change(
+    locmem_cache,
+    django_capture_on_commit_callbacks,
+):
+    pool = baker.make("core.GuessPool")
+    assert pool.get_ranking_for_period(0, 0, 0)[0].score == 0
+
+    ranking_deltas = RankingDeltas()
+    ranking_deltas[(pool.id, pool.owner.id, 0, 0, 0)] += 3
+    with django_capture_on_commit_callbacks(execute=True):
+        RankingEntry.apply_score_deltas(ranking_deltas)
+
+    assert pool.get_ranking_for_period(0, 0, 0)[0].score == 3
+
+
+def test_get_ranking_for_period_is_not_stale_after_a_failed_invalidation(
+    locmem_cache,
+    django_capture_on_commit_callbacks,
+):
+    pool = baker.make("core.GuessPool")
+    assert pool.get_ranking_for_period(0, 0, 0)[0].score == 0
+
+    ranking_deltas = RankingDeltas()
+    ranking_deltas[(pool.id, pool.owner.id, 0, 0, 0)] += 3
+    with (
+        patch.object(locmem_cache, "incr", side_effect=ConnectionError("Cache unavailable")),
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        RankingEntry.apply_score_deltas(ranking_deltas)
+
+    assert pool.get_ranking_for_period(0, 0, 0)[0].score == 3
+
+
+def test_get_ranking_for_period_computes_the_ranking_while_the_cache_is_down(locmem_cache):
+    pool = baker.make("core.GuessPool")
+    baker.make("core.RankingEntry", pool=pool, guesser=pool.owner, year=0, month=0, week=0, score=5)
+
+    with patch.object(locmem_cache, "get", side_effect=ConnectionError("Cache unavailable")):
+        assert pool.get_ranking_for_period(0, 0, 0)[0].score == 5
+
+
+def test_get_ranking_for_period_is_invalidated_when_guessers_change(locmem_cache):
+    pool = baker.make("core.GuessPool")
+    guesser = baker.make("core.Guesser")
+    assert len(pool.get_ranking_for_period(0, 0, 0)) == 1
+
+    pool.signin_new_guesser(guesser)
+    assert len(pool.get_ranking_for_period(0, 0, 0)) == 2
+
+    pool.remove_guesser(guesser)
+    assert len(pool.get_ranking_for_period(0, 0, 0)) == 1
+
+
+def test_get_involved_pools_with_pending_flag(django_assert_num_queries):
+    guesser = baker.make("core.Guesser")
+    competition = baker.make("core.Competition")
+    team = baker.make("core.Team")
+    pending_pool = baker.make("core.GuessPool", name="A", guessers=[guesser], competitions=[competition])
+    guessed_pool = baker.make("core.GuessPool", name="B", guessers=[guesser], teams=[team])
+    narrow_window_pool = baker.make(
+        "core.GuessPool",
+        name="C",
+        guessers=[guesser],
+        competitions=[competition],
+        hours_before_open_to_guesses=1,
+    )
+    own_pool = baker.make("core.GuessPool", name="D", owner=guesser, competitions=[competition])
+    own_pool.guessers.remove(guesser)
+    baker.make("core.GuessPool", name="E", competitions=[competition])  # not involved
+
+    now = timezone.now()
+    guessed_match = baker.make("core.Match", home_team=team, date_time=now + timezone.timedelta(hours=3))
+    baker.make("core.Guess", guesser=guesser, match=guessed_match)
+    baker.make("core.Match", competition=competition, date_time=now + timezone.timedelta(hours=2))
+    baker.make("core.Match", competition=competition, date_time=now + timezone.timedelta(minutes=2))  # closed
+
+    with django_assert_num_queries(1):
+        pools = {pool.name: pool.is_pending for pool in guesser.get_involved_pools_with_pending_flag()}
+
+    assert pools == {"A": True, "B": False, "C": False, "D": False}
+    assert pending_pool.has_pending_match(guesser)
+    assert not guessed_pool.has_pending_match(guesser)
+    assert not narrow_window_pool.has_pending_match(guesser)
+    assert guesser.get_involved_pools_with_pending_matches() == [pending_pool]
+
+
+def test_get_guesses_by_match(django_assert_num_queries):
+    pool = baker.make("core.GuessPool")
+    guesser = baker.make("core.Guesser")
+    matches = baker.make("core.Match", _quantity=3)
+    guess = baker.make("core.Guess", guesser=guesser, match=matches[0])
+    other_pool_guess = baker.make("core.Guess", guesser=guesser, match=matches[1])
+    other_guesser_guess = baker.make("core.Guess", match=matches[0])
+    pool.guesses.add(guess, other_guesser_guess)
+    baker.make("core.GuessPool").guesses.add(other_pool_guess)
+
+    with django_assert_num_queries(1):
+        guesses_by_match = pool.get_guesses_by_match(guesser, matches)
+
+    assert guesses_by_match == {matches[0].id: guess}
+
+
+def test_save_guesses_replaces_previous_guesses_only_in_the_pool():
+    competition = baker.make("core.Competition")
+    guesser = baker.make("core.Guesser")
+    pool, other_pool = baker.make("core.GuessPool", _quantity=2)
+    for guess_pool in (pool, other_pool):
+        guess_pool.competitions.add(competition)
+        guess_pool.guessers.add(guesser)
+    match = baker.make("core.Match", competition=competition)
+    shared_guess = baker.make("core.Guess", guesser=guesser, match=match, home_goals=0, away_goals=0)
+    pool.guesses.add(shared_guess)
+    other_pool.guesses.add(shared_guess)
+
+    (new_guess,) = pool.save_guesses([Guess(guesser=guesser, match=match, home_goals=2, away_goals=1)], False)
+
+    assert list(pool.guesses.all()) == [new_guess]
+    assert list(other_pool.guesses.all()) == [shared_guess]
+
+
+def test_save_guesses_for_all_pools_deletes_only_replaced_orphans(django_assert_max_num_queries):
+    competition = baker.make("core.Competition")
+    team = baker.make("core.Team")
+    guesser = baker.make("core.Guesser")
+    pool, team_pool, unrelated_pool = baker.make("core.GuessPool", _quantity=3)
+    pool.competitions.add(competition)
+    team_pool.teams.add(team)
+    for guess_pool in (pool, team_pool, unrelated_pool):
+        guess_pool.guessers.add(guesser)
+    matches = baker.make("core.Match", competition=competition, home_team=team, _quantity=3)
+    old_guesses = [baker.make("core.Guess", guesser=guesser, match=match) for match in matches]
+    pool.guesses.add(*old_guesses)
+    team_pool.guesses.add(old_guesses[0])
+    unrelated_orphan = baker.make("core.Guess")
+
+    with django_assert_max_num_queries(10):
+        new_guesses = pool.save_guesses(
+            [Guess(guesser=guesser, match=match, home_goals=1, away_goals=1) for match in matches], True
+        )
+
+    assert set(pool.guesses.all()) == set(new_guesses)
+    assert set(team_pool.guesses.all()) == set(new_guesses)
+    assert not unrelated_pool.guesses.exists()
+    assert not Guess.objects.filter(id__in=[guess.id for guess in old_guesses]).exists()
+    assert Guess.objects.filter(id=unrelated_orphan.id).exists()
+
+
+def test_pool_matches_follow_pool_competitions_and_teams():
+    competition = baker.make("core.Competition")
+    team = baker.make("core.Team")
+    pool = baker.make("core.GuessPool")
+    competition_match = baker.make("core.Match", competition=competition)
+    team_match = baker.make("core.Match", away_team=team)
+    baker.make("core.Match")
+
+    pool.competitions.add(competition)
+    team.pools.add(pool)
+
+    assert set(pool.get_matches()) == {competition_match, team_match}
+    assert list(team_match.get_pools()) == [pool]
+
+    pool.competitions.clear()
+
+    assert list(pool.get_matches()) == [team_match]
+
+
+def test_pool_matches_follow_match_changes():
+    competition = baker.make("core.Competition")
+    pool = baker.make("core.GuessPool")
+    pool.competitions.add(competition)
+    match = baker.make("core.Match", competition=competition)
+
+    assert list(pool.get_matches()) == [match]
+
+    match.date_time = pool.created - timezone.timedelta(days=1)
+    match.save()
+
+    assert not pool.get_matches().exists()
+    assert not match.get_pools().exists()
@@ -0,0 +1,116 @@
+import pytest
+from django.utils import timezone
+from model_bakery import baker
+
+from ..models import PLAYED_MATCH_STATUS, Guess, Match, RankingEntry
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    "guess, result, expected_score",
+    [
+        ((2, 1), (2, 1), 10),  # cravado
+        ((2, 0), (2, 1), 5),  # vencedor com gols do mandante
+        ((1, 1), (0, 0), 5),  # empate
+        ((3, 0), (2, 1), 3),  # somente vencedor
+        ((0, 1), (0, 0), 1),  # somente gols
+        ((0, 1), (2, 0), 0),  # erro
+    ],
+)
+def test_calculate_score(guess, result, expected_score):
+    assert Guess.calculate_score(*guess, *result) == expected_score
+    assert Guess.calculate_score(*guess, *result, double_score=True) == expected_score * 2
+
+
+def test_evaluate_and_consolidate_guesses_scores_all_guesses_and_returns_deltas():
+    match = baker.make("core.Match", status=Match.NOT_STARTED)
+    exact_guess = baker.make("core.Guess", match=match, home_goals=2, away_goals=1)
+    wrong_guess = baker.make("core.Guess", match=match, home_goals=0, away_goals=3)
+
+    match.status = Match.FINSHED
+    match.home_goals = 2
+    match.away_goals = 1
+    Match.objects.filter(pk=match.pk).update(status=match.status, home_goals=2, away_goals=1)
+
+    score_deltas = match.evaluate_and_consolidate_guesses()
+
+    exact_guess.refresh_from_db()
+    wrong_guess.refresh_from_db()
+    assert score_deltas == {exact_guess.id: 10}
+    assert exact_guess.score == 10
+    assert exact_guess.consolidated
+    assert wrong_guess.score == 0
+    assert wrong_guess.consolidated
+
+
+def test_evaluate_and_consolidate_guesses_updates_rankings_with_deltas():
+    match = baker.make("core.Match", status=Match.SECOND_HALF, home_goals=1, away_goals=0)
+    pool = baker.make("core.GuessPool")
+    guess = baker.make("core.Guess", match=match, home_goals=1, away_goals=0)
+    pool.guesses.add(guess)
+
+    match.evaluate_and_consolidate_guesses()
+    match.home_goals = 1
+    match.away_goals = 1
+    score_deltas = match.evaluate_and_consolidate_guesses()
+
+    assert score_deltas == {guess.id: 1 - 10}
+    general_entry = RankingEntry.objects.get(pool=pool, guesser=guess.guesser, year=0, month=0, week=0)
+    assert general_entry.score == 1
+    assert not Guess.objects.get(pk=guess.pk).consolidated
+
+
+def test_evaluate_and_consolidate_guesses_without_result_does_nothing(django_assert_num_queries):
+    match = baker.make("core.Match", home_goals=None, away_goals=None)
+    baker.make("core.Guess", match=match, _quantity=3)
+
+    with django_assert_num_queries(0):
+        assert match.evaluate_and_consolidate_guesses() == {}
+
+
+def test_evaluate_and_consolidate_guesses_query_count_does_not_grow_with_guesses(django_assert_max_num_queries):
+    match = baker.make("core.Match", status=Match.FINSHED, home_goals=2, away_goals=2)
+    baker.make("core.Guess", match=match, home_goals=0, away_goals=1, _quantity=30)
+
+    # fetch guesses + prefetch pools + bulk update (+ savepoint handling)
+    with django_assert_max_num_queries(5):
+        match.evaluate_and_consolidate_guesses()
+
+
+def test_played_match_status_matches_in_progress_and_finished_status():
+    assert sorted(PLAYED_MATCH_STATUS) == sorted(Match.IN_PROGRESS_AND_FINISHED_STATUS)
+
+
+def test_update_fields_from_returns_only_changed_fields():
+    match = baker.make("core.Match", status=Match.NOT_STARTED, home_goals=None, away_goals=None)
+
+    assert match.update_fields_from({"status": Match.NOT_STARTED, "competition_id": match.competition_id}) == []
+    assert match.update_fields_from({"status": Match.FINSHED, "home_goals": 1, "away_goals": None}) == [
+        "status",
+        "home_goals",
+    ]
+    assert match.status == Match.FINSHED
+    assert match.home_goals == 1
+
+
+@pytest.mark.parametrize(
+    "minutes_since_kickoff, expected_interval",
+    [(0, 15), (60, 15), (95, 3), (120, 3), (150, 30), (600, 30)],
+)
+def test_get_live_polling_interval(minutes_since_kickoff, expected_interval):
+    now = timezone.now()
+    match = baker.prepare("core.Match", date_time=now - timezone.timedelta(minutes=minutes_since_kickoff))
+
+    assert match.get_live_polling_interval(now) == timezone.timedelta(minutes=expected_interval)
+
+
+def test_get_live_returns_unfinished_matches_within_the_polling_window():
+    now = timezone.now()
+    live_match = baker.make("core.Match", date_time=now - timezone.timedelta(minutes=30), status=Match.FIRST_HALF)
+    baker.make("core.Match", date_time=now - timezone.timedelta(minutes=100), status=Match.FINSHED)
+    late_match = baker.make("core.Match", date_time=now - timezone.timedelta(hours=5), status=Match.SECOND_HALF)
+    baker.make("core.Match", date_time=now - timezone.timedelta(hours=25), status=Match.SECOND_HALF)
+    baker.make("core.Match", date_time=now + timezone.timedelta(minutes=10))
+
+    assert list(Match.get_live(now)) == [live_match, late_match]
@@ -0,0 +1,54 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from core.metrics import instrument_command, record_cache_lookup
+from core.models import Team
+
+pytestmark = pytest.mark.django_db
+
+
+def _sample(metric: str, **labels) -> float:
+    return REGISTRY.get_sample_value(metric, labels) or 0
+
+
+def test_middleware_exports_metrics_by_view_name(client):
+    user = get_user_model().objects.create_user(username="metrics-user", password="safe-password-123", is_staff=True)
+    client.force_login(user)
+    requests_before = _sample("palpiteiros_db_queries_count", kind="view", name="metrics")
+    queries_before = _sample("palpiteiros_db_queries_sum", kind="view", name="metrics")
+
+    client.get(reverse("metrics"))
+
+    assert _sample("palpiteiros_db_queries_count", kind="view", name="metrics") == requests_before + 1
+    assert _sample("palpiteiros_db_queries_sum", kind="view", name="metrics") > queries_before
+
+
+def test_instrument_command_measures_queries_and_cache_lookups():
+    hits_before = _sample("palpiteiros_cache_lookups_total", kind="command", name="test_command", result="hit")
+
+    with instrument_command("test_command") as measurement:
+        list(Team.objects.all())
+        Team.objects.count()
+        record_cache_lookup(hit=True)
+        record_cache_lookup(hit=False)
+
+    assert measurement.queries == 2
+    assert measurement.db_seconds > 0
+    assert (measurement.cache_hits, measurement.cache_misses) == (1, 1)
+    assert _sample("palpiteiros_cache_lookups_total", kind="command", name="test_command", result="hit") == (
+        hits_before + 1
+    )
+
+
+def test_metrics_view_requires_staff_user_or_token(client, settings):
+    settings.METRICS_TOKEN = "metrics-token"
+
+    assert client.get(reverse("metrics")).status_code == 403
+    assert client.get(reverse("metrics"), headers={"Authorization": "Bearer wrong"}).status_code == 403
+
+    response = client.get(reverse("metrics"), headers={"Authorization": "Bearer metrics-token"})
+
+    assert response.status_code == 200
+    assert b"palpiteiros_db_queries" in response.content
@@ -0,0 +1,235 @@
+from http import HTTPStatus
+from io import StringIO
+from smtplib import SMTPRecipientsRefused
+
+import pytest
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.utils import timezone
+from model_bakery import baker
+
+from ..models import (
+    EmailDelivery,
+    Guesser,
+    NotificationCursor,
+    NotificationEvent,
+    PushDelivery,
+)
+from ..notifiers import (
+    NewMatchesEmailNotifier,
+    NewMatchesPushNotifier,
+    PendingMatchesEmailNotifier,
+)
+from ..services.push import PushService
+
+pytestmark = pytest.mark.django_db
+
+
+class FlakyEmailBackend(locmem.EmailBackend):
+    """Refuses the recipients in failures as many times as mapped there"""
+
+    failures: dict[str, int] = {}
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.failures.get(message.to[0]):
+                self.failures[message.to[0]] -= 1
+                raise SMTPRecipientsRefused({message.to[0]: (550, b"Mailbox unavailable")})
+        return super().send_messages(messages)
+
+
+def test_pending_matches_notifier_plans_all_guessers_at_once(django_assert_num_queries):
+    competition = baker.make("core.Competition")
+    guessers = baker.make("core.Guesser", _quantity=3, user__email="zeca@example.com", user__first_name="Zeca")
+    pool_a = baker.make("core.GuessPool", name="A", guessers=guessers, competitions=[competition])
+    pool_b = baker.make("core.GuessPool", name="B", guessers=guessers[:2], competitions=[competition])
+    baker.make("core.GuessPool", name="C", guessers=guessers, hours_before_open_to_guesses=1)
+    match = baker.make("core.Match", competition=competition, date_time=timezone.now() + timezone.timedelta(hours=2))
+    baker.make("core.Guess", guesser=guessers[1], match=match)
+    owners = Guesser.objects.filter(own_pools__isnull=False)
+
+    notifier = PendingMatchesEmailNotifier(Guesser.objects.exclude(id__in=owners))
+    with django_assert_num_queries(3):
+        notifier.prepare_notifications()
+
+    assert [msg.body.splitlines()[1] for _, msg in notifier.get_email_msgs()] == [
+        "Os bolões A e B possuem partidas que você ainda não palpitou. Acesse o app e deixe seus palpites.",
+        "O bolão A possui partidas que você ainda não palpitou. Acesse o app e deixe seus palpites.",
+    ]
+    assert Guesser.get_involved_pools_with_pending_matches_by_guesser(guessers) == {
+        guessers[0]: [pool_a, pool_b],
+        guessers[2]: [pool_a],
+    }
+
+
+def test_new_matches_notifier_consumes_the_events_once(celery_eager, django_capture_on_commit_callbacks):
+    guesser = baker.make("core.Guesser", user__email="zeca@example.com")
+    team = baker.make("core.Team")
+    pool_a = baker.make("core.GuessPool", name="A", guessers=[guesser], teams=[team])
+    baker.make("core.GuessPool", name="B", guessers=[guesser])
+    baker.make("core.Match", home_team=team, date_time=timezone.now() + timezone.timedelta(days=1))
+    baker.make("core.NotificationEvent", type=NotificationEvent.UPDATED_MATCH, pool=pool_a)
+
+    guessers = Guesser.get_who_should_be_notified_by_email()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert NewMatchesEmailNotifier(guessers).prepare_and_send_notifications()
+
+    assert [(msg.to, msg.subject) for msg in mail.outbox] == [(["zeca@example.com"], "Novas Partidas Disponíveis")]
+    assert "Novas partidas disponíveis no bolão A." in mail.outbox[0].body
+    assert mail.outbox[0].alternatives[0][1] == "text/html"
+    assert EmailDelivery.objects.get().status == EmailDelivery.SENT
+
+    # Nothing new: the next run neither sends again nor looks at the pools
+    with django_capture_on_commit_callbacks(execute=True):
+        assert not NewMatchesEmailNotifier(guessers).prepare_and_send_notifications()
+    assert len(mail.outbox) == 1
+
+
+def test_cursor_waits_for_events_committed_out_of_order(settings):
+    settings.NOTIFICATION_EVENTS_VISIBILITY_DELAY = 60
+    pool = baker.make("core.GuessPool")
+    baker.make("core.NotificationEvent", id=100, type=NotificationEvent.NEW_MATCH, pool=pool)
+    cursor = NotificationCursor.get_locked("email:new_match")
+
+    # The recent event is left for the next run, as a transaction that took a
+    # lower id may not have committed yet
+    cursor.advance(cursor.get_pending_events(NotificationEvent.NEW_MATCH))
+    assert cursor.last_event_id == 0
+
+    baker.make("core.NotificationEvent", id=50, type=NotificationEvent.NEW_MATCH, pool=pool)
+    NotificationEvent.objects.update(created=timezone.now() - timezone.timedelta(minutes=2))
+
+    events = cursor.get_pending_events(NotificationEvent.NEW_MATCH)
+    assert sorted(events.values_list("id", flat=True)) == [50, 100]
+    cursor.advance(events)
+    assert cursor.last_event_id == 100
+
+
+def test_prune_deletes_the_events_consumed_by_every_cursor_or_too_old():
+    pool = baker.make("core.GuessPool")
+    new_events = baker.make("core.NotificationEvent", type=NotificationEvent.NEW_MATCH, pool=pool, _quantity=3)
+    old, recent = baker.make("core.NotificationEvent", type=NotificationEvent.UPDATED_MATCH, pool=pool, _quantity=2)
+    NotificationEvent.objects.filter(id=old.id).update(created=timezone.now() - timezone.timedelta(days=8))
+    baker.make("core.NotificationCursor", name="email:new_match", last_event_id=new_events[2].id)
+    baker.make("core.NotificationCursor", name="push:new_match", last_event_id=new_events[0].id)
+
+    assert NotificationEvent.prune(timezone.timedelta(days=7)) == 2
+    assert sorted(NotificationEvent.objects.values_list("id", flat=True)) == [
+        new_events[1].id,
+        new_events[2].id,
+        recent.id,
+    ]
+
+
+def test_email_deliveries_are_sent_in_chunks_retrying_failed_recipients(
+    settings, celery_eager, django_capture_on_commit_callbacks
+):
+    settings.EMAIL_BACKEND = f"{__name__}.FlakyEmailBackend"
+    settings.EMAIL_DELIVERY_CHUNK_SIZE = 2
+    FlakyEmailBackend.failures = {"flaky@example.com": 1, "gone@example.com": 99}
+    emails = ["ok@example.com", "flaky@example.com", "gone@example.com", "also-ok@example.com"]
+    pool = baker.make("core.GuessPool")
+    baker.make("core.NotificationEvent", type=NotificationEvent.NEW_MATCH, pool=pool)
+    for email in emails:
+        pool.guessers.add(baker.make("core.Guesser", user__email=email))
+    pool.owner.user.email = ""
+    pool.owner.user.save()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        NewMatchesEmailNotifier(Guesser.get_who_should_be_notified_by_email()).prepare_and_send_notifications()
+
+    deliveries = {delivery.to: (delivery.status, delivery.attempts) for delivery in EmailDelivery.objects.all()}
+    assert deliveries == {
+        "ok@example.com": (EmailDelivery.SENT, 1),
+        "flaky@example.com": (EmailDelivery.SENT, 2),
+        "gone@example.com": (EmailDelivery.FAILED, settings.EMAIL_DELIVERY_MAX_RETRIES + 1),
+        "also-ok@example.com": (EmailDelivery.SENT, 1),
+    }
+    assert sorted(msg.to[0] for msg in mail.outbox) == sorted(set(emails) - {"gone@example.com"})
+    assert "Mailbox unavailable" in EmailDelivery.objects.get(to="gone@example.com").error
+
+
+def test_notifier_renders_each_pool_set_once_and_batches_bcc_when_not_personalized(settings):
+    settings.EMAIL_BCC_BATCH_SIZE = 2
+    pool_a, pool_b = baker.make("core.GuessPool", _quantity=2)
+    names = ["Ana", "Bia", "Caio"]
+    guessers = [baker.make("core.Guesser", user__first_name=name, user__email=f"{name}@example.com") for name in names]
+    pool_a.guessers.add(*guessers)
+    pool_b.guessers.add(guessers[0])
+    for pool in (pool_a, pool_b):
+        baker.make("core.NotificationEvent", type=NotificationEvent.NEW_MATCH, pool=pool)
+    events = NotificationEvent.objects.all()
+
+    notifier = NewMatchesEmailNotifier(guessers)
+    notifier.notifiable_pools_by_guesser = Guesser.get_involved_pools_with_events_by_guesser(guessers, events)
+
+    emails = [email for _, email in notifier.get_email_msgs()]
+    assert [email.body.splitlines()[0] for email in emails] == ["Olá, Ana", "Olá, Bia", "Olá, Caio"]
+    assert "Olá, Bia 😎" in emails[1].alternatives[0][0]
+    assert len(notifier._contents_by_pools) == 2
+
+    notifier = NewMatchesEmailNotifier(guessers, personalized=False)
+    notifier.notifiable_pools_by_guesser = Guesser.get_involved_pools_with_events_by_guesser(guessers, events)
+
+    emails = [email for _, email in notifier.get_email_msgs()]
+    assert [(email.to, email.bcc) for email in emails] == [
+        ([settings.DEFAULT_FROM_EMAIL], ["Ana@example.com"]),
+        ([settings.DEFAULT_FROM_EMAIL], ["Bia@example.com", "Caio@example.com"]),
+    ]
+    assert all(email.body.startswith("Olá, palpiteiro\n") for email in emails)
+    assert EmailDelivery.from_email_message(emails[1]).get_email_message().recipients() == [
+        settings.DEFAULT_FROM_EMAIL,
+        "Bia@example.com",
+        "Caio@example.com",
+    ]
+
+
+def test_push_notifier_targets_external_ids_in_batches_retrying_failed_ones(
+    settings, fake_onesignal_server, celery_eager, django_capture_on_commit_callbacks
+):
+    settings.PUSH_NOTIFICATIONS_BATCH_SIZE = 2
+    pool_a = baker.make("core.GuessPool", name="A")
+    pool_b = baker.make("core.GuessPool", name="B")
+    guessers = baker.make("core.Guesser", _quantity=4)
+    pool_a.guessers.add(*guessers)
+    pool_b.guessers.add(guessers[0])
+    for pool in (pool_a, pool_b):
+        baker.make("core.NotificationEvent", type=NotificationEvent.NEW_MATCH, pool=pool)
+    fake_onesignal_server.statuses.extend([HTTPStatus.OK, HTTPStatus.BAD_REQUEST])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert NewMatchesPushNotifier(guessers, PushService.from_settings()).prepare_and_send_notifications()
+
+    # The refused batch is sent again after the others
+    plural = "Novas partidas disponíveis nos bolões A e B. Deixe seus palpites! 🍀⚽"
+    singular = "Novas partidas disponíveis no bolão A. Deixe seus palpites! 🍀⚽"
+    ids = [guesser.push_external_id for guesser in guessers]
+    assert [
+        (notification["include_external_user_ids"], notification["contents"]["pt"])
+        for notification in fake_onesignal_server.notifications
+    ] == [([ids[0]], plural), ([ids[3]], singular), (ids[1:3], singular)]
+    assert fake_onesignal_server.notifications[0]["app_id"] == "fake-app-id"
+    assert sorted(PushDelivery.objects.values_list("external_ids", "status", "attempts")) == [
+        ([ids[0]], PushDelivery.SENT, 1),
+        (ids[1:3], PushDelivery.SENT, 2),
+        ([ids[3]], PushDelivery.SENT, 1),
+    ]
+
+
+def test_send_push_notification_command_consumes_the_events_once(
+    fake_onesignal_server, celery_eager, django_capture_on_commit_callbacks
+):
+    pool = baker.make("core.GuessPool")
+    baker.make("core.NotificationEvent", type=NotificationEvent.UPDATED_MATCH, pool=pool)
+
+    out = StringIO()
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("send_push_notification_of_updated_matches", stdout=StringIO())
+        call_command("send_push_notification_of_updated_matches", stdout=out)
+
+    assert [notification["include_external_user_ids"] for notification in fake_onesignal_server.notifications] == [
+        [pool.owner.push_external_id]
+    ]
+    assert out.getvalue() == "No pools with updated matches to notificate.\n"
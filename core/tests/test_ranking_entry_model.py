@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+
+import pytest
+from model_bakery import baker
+
+from ..models import Match, RankingDeltas, RankingEntry
+
+pytestmark = pytest.mark.django_db
+
+
+def test_get_periods_of_uses_local_timezone():
+    # 2026-01-01 01:00 UTC is still 2025-12-31 in America/Sao_Paulo
+    periods = RankingEntry.get_periods_of(datetime(2026, 1, 1, 1, 0, tzinfo=timezone.utc))
+
+    assert periods == [(0, 0, 0), (2025, 0, 0), (2025, 12, 0), (2025, 0, 1)]
+
+
+def test_apply_score_deltas_creates_and_increments_entries(django_assert_num_queries):
+    pool = baker.make("core.GuessPool")
+    guesser = baker.make("core.Guesser")
+    baker.make(RankingEntry, pool=pool, guesser=guesser, year=0, month=0, week=0, score=7)
+
+    ranking_deltas = RankingDeltas()
+    ranking_deltas[(pool.id, guesser.id, 0, 0, 0)] += 3
+    ranking_deltas[(pool.id, guesser.id, 2026, 0, 0)] += 5
+    ranking_deltas[(pool.id, guesser.id, 2026, 3, 0)] += 0
+
+    with django_assert_num_queries(3):  # savepoint, upsert, release
+        touched = RankingEntry.apply_score_deltas(ranking_deltas)
+
+    assert touched == 2
+    assert RankingEntry.objects.get(pool=pool, guesser=guesser, year=0).score == 10
+    assert RankingEntry.objects.get(pool=pool, guesser=guesser, year=2026, month=0).score == 5
+    assert not RankingEntry.objects.filter(month=3).exists()
+
+
+def test_evaluate_and_consolidate_guesses_collects_into_given_deltas():
+    match = baker.make("core.Match", status=Match.FINSHED, home_goals=1, away_goals=0)
+    pool = baker.make("core.GuessPool")
+    guess = baker.make("core.Guess", match=match, home_goals=1, away_goals=0)
+    pool.guesses.add(guess)
+
+    ranking_deltas = RankingDeltas()
+    match.evaluate_and_consolidate_guesses(ranking_deltas)
+
+    assert not RankingEntry.objects.exists()
+    assert len(ranking_deltas) == 4
+    assert set(ranking_deltas.values()) == {10}
+
+    RankingEntry.apply_score_deltas(ranking_deltas)
+
+    assert RankingEntry.objects.filter(pool=pool, guesser=guess.guesser, score=10).count() == 4
@@ -1,15 +1,23 @@
+import asyncio
+import json
+import zlib
 from datetime import date
+from http import HTTPStatus
 from unittest.mock import Mock, patch
 
 import pytest
 from django.conf import settings
 
 from core.services.football import FootballApi
+from core.services.http import JitteredRetry, build_session
+from core.services.rate_limiter import TokenBucket
+from core.services.response_cache import ResponseCache
+from core.services.sfi import AsyncSFIService
 
 pytestmark = pytest.mark.django_db
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_fetch_data_success(mock_get: Mock, mock_success_response):
     mock_success_response.json.return_value = {"response": "data"}
     mock_get.return_value = mock_success_response
@@ -20,14 +28,17 @@ def test_fetch_data_success(mock_get: Mock, mock_success_response):
     response = FootballApi._fetch_data(resource, params)
 
     mock_get.assert_called_once_with(
-        FootballApi._API_URL + resource, headers=FootballApi._DEFAULT_HEADERS, params=params
+        FootballApi._API_URL + resource,
+        headers=FootballApi._DEFAULT_HEADERS,
+        params=params,
+        timeout=(settings.EXTERNAL_API_CONNECT_TIMEOUT, settings.EXTERNAL_API_READ_TIMEOUT),
     )
     assert response is not None
     assert response.status_code == 200
     assert response.json() == {"response": "data"}
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_fetch_data_failure(mock_get):
     mock_get.side_effect = Exception()
 
@@ -37,7 +48,10 @@ def test_fetch_data_failure(mock_get):
     response = FootballApi._fetch_data(resource, params)
 
     mock_get.assert_called_once_with(
-        FootballApi._API_URL + resource, headers=FootballApi._DEFAULT_HEADERS, params=params
+        FootballApi._API_URL + resource,
+        headers=FootballApi._DEFAULT_HEADERS,
+        params=params,
+        timeout=(settings.EXTERNAL_API_CONNECT_TIMEOUT, settings.EXTERNAL_API_READ_TIMEOUT),
     )
     assert response is None
 
@@ -180,3 +194,107 @@ def test_football_api_get_matches_of_league_by_season_and_date_period_not_found(
         },
     )
     assert response == []
+
+
+def test_token_bucket_allows_bursts_and_then_waits_for_refill():
+    now = [0.0]
+    sleeps = []
+    bucket = TokenBucket(rate=0.5, capacity=2, clock=lambda: now[0], sleep=sleeps.append)
+
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 2  # next token refills in 1 / 0.5 seconds
+    assert bucket.acquire() == 4  # and the following one right after it
+
+    now[0] = 10.0  # refilled to capacity, not beyond it
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 2
+    assert sleeps == [2, 4, 2]
+
+
+@patch("urllib3.util.retry.time.sleep")
+def test_session_retries_server_errors_with_jittered_backoff(mock_sleep: Mock, scripted_http_server):
+    scripted_http_server.responses.extend([(HTTPStatus.SERVICE_UNAVAILABLE, {}), (HTTPStatus.BAD_GATEWAY, {})])
+    session = build_session(max_retries=3, backoff_factor=2)
+
+    response = session.get(scripted_http_server.url + "/matches", timeout=5)
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(scripted_http_server.requests_received) == 3
+    # No backoff before the first retry, then between half and all of 2 * 2 ** 1 seconds
+    mock_sleep.assert_called_once()
+    assert 2 <= mock_sleep.call_args.args[0] <= 4
+
+
+@patch("urllib3.util.retry.time.sleep")
+def test_session_honors_retry_after_up_to_a_limit(mock_sleep: Mock, scripted_http_server):
+    scripted_http_server.responses.extend(
+        [(HTTPStatus.TOO_MANY_REQUESTS, {"Retry-After": "7"}), (HTTPStatus.TOO_MANY_REQUESTS, {"Retry-After": "3600"})]
+    )
+    session = build_session(max_retries=3, backoff_factor=0)
+
+    response = session.get(scripted_http_server.url + "/matches", timeout=5)
+
+    assert response.status_code == HTTPStatus.OK
+    mock_sleep.assert_any_call(7)
+    mock_sleep.assert_any_call(JitteredRetry.MAX_RETRY_AFTER)
+
+
+@patch("urllib3.util.retry.time.sleep")
+def test_session_gives_up_after_max_retries(mock_sleep: Mock, scripted_http_server):
+    scripted_http_server.responses.extend([(HTTPStatus.INTERNAL_SERVER_ERROR, {})] * 3)
+    session = build_session(max_retries=1, backoff_factor=0)
+
+    response = session.get(scripted_http_server.url + "/matches", timeout=5)
+
+    assert response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+    assert len(scripted_http_server.requests_received) == 2
+
+
+@patch("requests.Session.get")
+def test_async_sfi_service_fetches_concurrently_within_rate_limit(mock_get: Mock, mock_success_response):
+    mock_success_response.json.return_value = {"status": 200, "errors": [], "pagination": [], "result": []}
+    mock_get.return_value = mock_success_response
+    rate_limiter = Mock(wraps=TokenBucket(rate=100, capacity=2))
+    service = AsyncSFIService(api_key="key", api_host="host", rate_limiter=rate_limiter, max_concurrency=2)
+    days = [date(2026, 3, day) for day in (1, 2, 3)]
+
+    async def fetch_all():
+        return await asyncio.gather(*(service.get_matches_by_day(day) for day in days))
+
+    responses = asyncio.run(fetch_all())
+
+    assert [response["result"] for response in responses] == [[], [], []]
+    assert rate_limiter.acquire.call_count == 3
+    assert sorted(call.kwargs["params"]["d"] for call in mock_get.call_args_list) == [
+        "20260301",
+        "20260302",
+        "20260303",
+    ]
+
+
+def test_response_cache_stores_compressed_json_and_counts_hits_and_misses(locmem_api_response_cache):
+    response_cache = ResponseCache()
+    fetch = Mock(side_effect=lambda: {"result": [{"id": "champ-1"}]})
+
+    first = response_cache.get_or_fetch("sfi:championship_view", {"i": "champ-1"}, fetch)
+    second = response_cache.get_or_fetch("sfi:championship_view", {"i": "champ-1"}, fetch)
+    response_cache.get_or_fetch("sfi:championship_view", {"i": "champ-2"}, fetch)
+
+    assert first == second == {"result": [{"id": "champ-1"}]}
+    assert fetch.call_count == 2
+    assert response_cache.hits == {"sfi:championship_view": 1}
+    assert response_cache.misses == {"sfi:championship_view": 2}
+    stored = locmem_api_response_cache.get(ResponseCache.get_key("sfi:championship_view", {"i": "champ-1"}))
+    assert json.loads(zlib.decompress(stored)) == first
+
+
+def test_football_api_does_not_cache_answers_with_errors(locmem_api_response_cache, mock_success_response):
+    mock_success_response.json.return_value = {"errors": {"requests": "limit reached"}, "response": []}
+
+    with patch.object(FootballApi, "_fetch_data", return_value=mock_success_response) as mock_fetch_data:
+        FootballApi.get_teams_of_league_by_season(1, 2026)
+        FootballApi.get_teams_of_league_by_season(1, 2026)
+
+    assert mock_fetch_data.call_count == 2
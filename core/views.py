@@ -32,14 +32,7 @@ class IndexView(LoginRequiredMixin, generic.TemplateView):
         context = super().get_context_data(**kwargs)
 
         guesser = self.request.user.guesser
-        involved_pools = guesser.get_involved_pools()
-        pools_as_guesser = guesser.pools.all()
-        for pool in involved_pools:
-            pool.is_pending = (
-                pool.has_pending_match(self.request.user.guesser)
-                if pool in pools_as_guesser
-                else False
-            )
+        involved_pools = guesser.get_involved_pools_with_pending_flag()
 
         context["display_subtitle"] = any([pool.is_pending for pool in involved_pools])
         context["pools"] = involved_pools
@@ -77,6 +70,11 @@ class ProfileView(LoginRequiredMixin, generic.View):
             user_edit_form.save()
             guesser_edit_form.save()
 
+            # guesser name is part of the cached rankings
+            GuessPool.bump_ranking_cache_version(
+                self.request.user.guesser.pools.values_list("id", flat=True)
+            )
+
             messages.success(
                 self.request,
                 "Perfil atualizado ✅",
@@ -199,7 +197,10 @@ class ManagePoolView(LoginRequiredMixin, GuessPoolMembershipMixin, generic.Updat
     def form_valid(self, form):
         form.instance.owner = self.request.user.guesser
         form.instance.slug = slugify(form.instance.name)
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        # guessers may have been added or removed
+        GuessPool.bump_ranking_cache_version([self.object.id])
+        return response
 
 
 class GuessPoolSignInView(LoginRequiredMixin, generic.View):
@@ -274,10 +275,10 @@ class GuessesView(LoginRequiredMixin, GuessPoolMembershipMixin, generic.View):
             f"{timezone.now()}: user {self.request.user} accessed the /palpites route"
         )
 
-        open_matches = self.pool.get_open_matches()
-        closed_matches = self.pool.get_closed_recent_matches()
+        open_matches = list(self.pool.get_open_matches())
+        closed_matches = list(self.pool.get_closed_recent_matches())
 
-        has_matches = open_matches.exists() or closed_matches.exists()
+        has_matches = open_matches or closed_matches
         if not has_matches:
             return redirect_with_msg(
                 self.request,
@@ -287,33 +288,14 @@ class GuessesView(LoginRequiredMixin, GuessPoolMembershipMixin, generic.View):
                 self.pool,
             )
 
-        guess_forms = []
-        for match in open_matches:
-            try:
-                guess = self.pool.guesses.get(
-                    match=match,
-                    guesser=self.guesser,
-                )
-                initial_data = {
-                    f"home_goals_{match.id}": guess.home_goals,
-                    f"away_goals_{match.id}": guess.away_goals,
-                }
-            except Guess.DoesNotExist:
-                initial_data = None
-
-            guess_forms.append(GuessForm(initial_data, match=match))
-
-        closed_matches_and_guesses = []
-        for match in closed_matches:
-            try:
-                guess = self.pool.guesses.get(
-                    match=match,
-                    guesser=self.guesser,
-                )
-            except Guess.DoesNotExist:
-                guess = None
-
-            closed_matches_and_guesses.append({"match": match, "guess": guess})
+        guesses_by_match = self.pool.get_guesses_by_match(
+            self.guesser, [*open_matches, *closed_matches]
+        )
+
+        guess_forms = [
+            self._get_filled_guess_form(match, guesses_by_match.get(match.id))
+            for match in open_matches
+        ]
 
         return render(
             self.request,
@@ -321,7 +303,9 @@ class GuessesView(LoginRequiredMixin, GuessPoolMembershipMixin, generic.View):
             {
                 "pool": self.pool,
                 "guess_forms": guess_forms,
-                "closed_matches_and_guesses": closed_matches_and_guesses,
+                "closed_matches_and_guesses": self._get_closed_matches_and_guesses(
+                    closed_matches, guesses_by_match
+                ),
             },
         )
 
@@ -334,10 +318,10 @@ class GuessesView(LoginRequiredMixin, GuessPoolMembershipMixin, generic.View):
 
         for_all_pools = bool(self.request.POST.get("for_all_pools"))
 
-        open_matches = self.pool.get_open_matches()
-        closed_matches = self.pool.get_closed_recent_matches()
+        open_matches = list(self.pool.get_open_matches())
+        closed_matches = list(self.pool.get_closed_recent_matches())
 
-        if not open_matches.exists():
+        if not open_matches:
             return redirect_with_msg(
                 self.request,
                 "error",
@@ -346,62 +330,44 @@ class GuessesView(LoginRequiredMixin, GuessPoolMembershipMixin, generic.View):
                 self.pool,
             )
 
-        guess_forms = []
-        for match in open_matches:
-            guess_form = GuessForm(self.request.POST, match=match)
-
-            if guess_form.is_valid():
-                """
-                Quando o palpite é aproveitado em todos os bolões, a mesma
-                instância de palpite é adicionada no relacionamento guesses
-                de todos os bolões nos quais ele é aproveitado. Então, quando
-                essa instância for modificada, todos os bolões terão seus
-                palpites afetados. Por isso, só se deve ATUALIZAR um palpite
-                se ele for aproveitado em todos os bolões (for_all_pools). Caso
-                contrário, quando o palpite for exclusivo de um único bolão,
-                deve-se sempre criar um novo palpite e substituir o antigo pelo
-                novo na relação guesses.
-                """
-
-                guess = Guess.objects.create(
-                    match=match,
-                    guesser=self.guesser,
-                    home_goals=guess_form.cleaned_data["home_goals"],
-                    away_goals=guess_form.cleaned_data["away_goals"],
-                )
-                self.pool.add_guess_to_pools(guess, for_all_pools)
-                self.pool.delete_orphans_guesses()
-
-                guess_forms.append(guess_form)
-
-            else:
-                try:
-                    guess = self.pool.guesses.get(
-                        match=match,
-                        guesser=self.guesser,
-                    )
-                    initial_data = {
-                        f"home_goals_{match.id}": guess.home_goals,
-                        f"away_goals_{match.id}": guess.away_goals,
-                    }
-
-                except Guess.DoesNotExist:
-                    initial_data = None
-
-                guess_forms.append(GuessForm(initial_data, match=match))
-
-        closed_matches_and_guesses = []
-        for match in closed_matches:
-            try:
-                guess = self.pool.guesses.get(
-                    match=match,
-                    guesser=self.guesser,
-                )
-
-            except Guess.DoesNotExist:
-                guess = None
-
-            closed_matches_and_guesses.append({"match": match, "guess": guess})
+        # Fetched before any write: guesses of invalid forms and of closed
+        # matches aren't touched by this request
+        guesses_by_match = self.pool.get_guesses_by_match(
+            self.guesser, [*open_matches, *closed_matches]
+        )
+
+        guess_forms = [
+            GuessForm(self.request.POST, match=match) for match in open_matches
+        ]
+
+        """
+        Quando o palpite é aproveitado em todos os bolões, a mesma instância de
+        palpite é adicionada no relacionamento guesses de todos os bolões nos
+        quais ele é aproveitado. Então, quando essa instância for modificada,
+        todos os bolões terão seus palpites afetados. Por isso, nunca se deve
+        ATUALIZAR um palpite: sempre são criados novos palpites, que substituem
+        os antigos na relação guesses de todos os bolões afetados.
+        """
+        new_guesses = [
+            Guess(
+                match=guess_form.match,
+                guesser=self.guesser,
+                home_goals=guess_form.cleaned_data["home_goals"],
+                away_goals=guess_form.cleaned_data["away_goals"],
+            )
+            for guess_form in guess_forms
+            if guess_form.is_valid()
+        ]
+        self.pool.save_guesses(new_guesses, for_all_pools)
+
+        guess_forms = [
+            guess_form
+            if guess_form.is_valid()
+            else self._get_filled_guess_form(
+                guess_form.match, guesses_by_match.get(guess_form.match.id)
+            )
+            for guess_form in guess_forms
+        ]
 
         messages.success(
             self.request,
@@ -415,10 +381,31 @@ class GuessesView(LoginRequiredMixin, GuessPoolMembershipMixin, generic.View):
             {
                 "pool": self.pool,
                 "guess_forms": guess_forms,
-                "closed_matches_and_guesses": closed_matches_and_guesses,
+                "closed_matches_and_guesses": self._get_closed_matches_and_guesses(
+                    closed_matches, guesses_by_match
+                ),
             },
         )
 
+    @staticmethod
+    def _get_filled_guess_form(match, guess: Guess | None) -> GuessForm:
+        initial_data = (
+            {
+                f"home_goals_{match.id}": guess.home_goals,
+                f"away_goals_{match.id}": guess.away_goals,
+            }
+            if guess is not None
+            else None
+        )
+        return GuessForm(initial_data, match=match)
+
+    @staticmethod
+    def _get_closed_matches_and_guesses(closed_matches, guesses_by_match) -> list[dict]:
+        return [
+            {"match": match, "guess": guesses_by_match.get(match.id)}
+            for match in closed_matches
+        ]
+
 
 class RankingView(LoginRequiredMixin, GuessPoolMembershipMixin, generic.TemplateView):
     template_name = "core/ranking.html"
@@ -17,9 +17,11 @@ app.conf.beat_schedule = {
         "schedule": crontab(minute="0", hour="0", day_of_week="1,4"),
         "args": (4,),
     },
-    "update_matches": {
-        "task": "update_matches",
-        "schedule": crontab(minute="0", hour="0,1,14-23"),
+    # Cheap when idle: the API is only called while tracked matches are in
+    # play, at a frequency decided by poll_live_matches from their kickoffs
+    "poll_live_matches": {
+        "task": "poll_live_matches",
+        "schedule": crontab(minute="*"),
     },
     "send_email_notification_of_updated_matches": {
         "task": "send_email_notification_of_updated_matches",
@@ -29,6 +31,18 @@ app.conf.beat_schedule = {
         "task": "send_email_notification_of_pending_matches",
         "schedule": crontab(minute="0", hour="7"),
     },
+    "send_push_notification_of_updated_matches": {
+        "task": "send_push_notification_of_updated_matches",
+        "schedule": crontab(minute="59", hour="18,23"),
+    },
+    "send_push_notification_of_pending_matches": {
+        "task": "send_push_notification_of_pending_matches",
+        "schedule": crontab(minute="0", hour="7"),
+    },
+    "prune_notification_events": {
+        "task": "prune_notification_events",
+        "schedule": crontab(minute="30", hour="4"),
+    },
 }
 
 
@@ -58,6 +58,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.metrics.QueryMetricsMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -166,6 +167,40 @@ EMAIL_PORT = config("EMAIL_PORT", default=587, cast=int)
 EMAIL_USE_TLS = True
 DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL")
 
+# Notification emails are sent by the workers in chunks of this many recipients,
+# each chunk over its own connection. The recipients that failed are retried up to
+# EMAIL_DELIVERY_MAX_RETRIES times, with exponential backoff
+EMAIL_DELIVERY_CHUNK_SIZE = config("EMAIL_DELIVERY_CHUNK_SIZE", default=100, cast=int)
+EMAIL_DELIVERY_MAX_RETRIES = config("EMAIL_DELIVERY_MAX_RETRIES", default=3, cast=int)
+EMAIL_DELIVERY_RETRY_DELAY = config("EMAIL_DELIVERY_RETRY_DELAY", default=60, cast=int)
+
+# Without personalization, guessers notified about the same pools get a single
+# email (greeting no one by name), sent in BCC batches of EMAIL_BCC_BATCH_SIZE.
+# A batch is a single delivery, so its status is not kept per recipient: a
+# failed batch is retried as a whole, resending it to the recipients the SMTP
+# server had already accepted
+EMAIL_NOTIFICATIONS_PERSONALIZED = config("EMAIL_NOTIFICATIONS_PERSONALIZED", default=True, cast=bool)
+EMAIL_BCC_BATCH_SIZE = config("EMAIL_BCC_BATCH_SIZE", default=50, cast=int)
+
+# The notifiers only consume the events appended at least this many seconds ago, which must
+# exceed the longest transaction that appends them (the matches sync). Events every notifier
+# consumed, or older than NOTIFICATION_EVENTS_RETENTION_DAYS, are pruned daily
+NOTIFICATION_EVENTS_VISIBILITY_DELAY = config("NOTIFICATION_EVENTS_VISIBILITY_DELAY", default=300, cast=int)
+NOTIFICATION_EVENTS_RETENTION_DAYS = config("NOTIFICATION_EVENTS_RETENTION_DAYS", default=7, cast=int)
+
+
+# Push notifications
+
+# Sent through OneSignal, disabled while the app id or the REST API key is empty
+ONESIGNAL_APP_ID = config("ONESIGNAL_APP_ID", default="")
+ONESIGNAL_REST_API_KEY = config("ONESIGNAL_REST_API_KEY", default="")
+ONESIGNAL_API_HOST = config("ONESIGNAL_API_HOST", default="https://onesignal.com/api/v1")
+PUSH_NOTIFICATIONS_BATCH_SIZE = config("PUSH_NOTIFICATIONS_BATCH_SIZE", default=2000, cast=int)
+# Each batch is stored as a delivery and sent by the workers, the batches that failed being
+# retried up to PUSH_DELIVERY_MAX_RETRIES times, with exponential backoff
+PUSH_DELIVERY_MAX_RETRIES = config("PUSH_DELIVERY_MAX_RETRIES", default=3, cast=int)
+PUSH_DELIVERY_RETRY_DELAY = config("PUSH_DELIVERY_RETRY_DELAY", default=60, cast=int)
+
 
 # Security
 
@@ -224,10 +259,46 @@ FOOTBALL_API_REQUESTS_INTERVAL = 7
 SFI_API_KEY = config("SFI_API_KEY")
 SFI_API_HOST = "soccer-football-info.p.rapidapi.com"
 SFI_API_REQUESTS_INTERVAL = 5
+# Requests are rate limited by a token bucket refilled once every SFI_API_REQUESTS_INTERVAL
+# seconds, which allows bursts of up to SFI_API_REQUESTS_BURST requests
+SFI_API_REQUESTS_BURST = config("SFI_API_REQUESTS_BURST", default=10, cast=int)
+SFI_API_MAX_WORKERS = config("SFI_API_MAX_WORKERS", default=4, cast=int)
+
+
+# External APIs HTTP client
+
+# The API clients share a pool of keep-alive connections. Requests time out after the connect
+# and read timeouts (in seconds), and 429/5xx answers are retried up to EXTERNAL_API_MAX_RETRIES
+# times with a jittered exponential backoff, or after the wait asked by a Retry-After header
+EXTERNAL_API_CONNECT_TIMEOUT = config("EXTERNAL_API_CONNECT_TIMEOUT", default=5, cast=float)
+EXTERNAL_API_READ_TIMEOUT = config("EXTERNAL_API_READ_TIMEOUT", default=30, cast=float)
+EXTERNAL_API_MAX_RETRIES = config("EXTERNAL_API_MAX_RETRIES", default=3, cast=int)
+EXTERNAL_API_BACKOFF_FACTOR = config("EXTERNAL_API_BACKOFF_FACTOR", default=1, cast=float)
+
+# Seconds the responses are kept in the "api_responses" cache, by endpoint (None keeps them
+# forever). Responses about days that are over everywhere are "settled" and never change
+API_RESPONSE_CACHE_TIMEOUTS = {
+    "sfi:matches_by_day": 60,
+    "sfi:matches_by_day:settled": None,
+    "sfi:championship_view": 24 * 60 * 60,
+    "football:leagues": 24 * 60 * 60,
+    "football:teams": 24 * 60 * 60,
+    "football:fixtures": 60,
+    "football:fixtures:settled": None,
+}
+
+
+# Metrics
+
+# Prometheus scrapes /metrics/ with this bearer token (staff users can always read it). With
+# several processes, set the PROMETHEUS_MULTIPROC_DIR env var to a directory shared by all of them
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
 
 
 # Cache
 
+API_RESPONSE_CACHE_LOCATION = config("API_RESPONSE_CACHE_LOCATION", default=str(BASE_DIR / ".cache" / "api_responses"))
+
 CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
@@ -235,9 +306,23 @@ CACHES = {
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
         },
-    }
+    },
+    # External API responses, on disk by default or in Redis for a redis:// location
+    "api_responses": {
+        "BACKEND": (
+            "django_redis.cache.RedisCache"
+            if API_RESPONSE_CACHE_LOCATION.startswith("redis://")
+            else "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": API_RESPONSE_CACHE_LOCATION,
+        "OPTIONS": {"MAX_ENTRIES": 100_000},
+    },
 }
+# Cache errors are raised (not ignored by django-redis), so that a failed ranking
+# invalidation is noticed. The ranking and API response caches handle them, a cache
+# outage only making pages and syncs slower
 RANKING_CACHE_PREFIX = "ranking"
+RANKING_CACHE_TIMEOUT = config("RANKING_CACHE_TIMEOUT", default=60 * 60 * 24, cast=int)
 
 
 # Ranking
@@ -1,9 +1,12 @@
 from django.contrib import admin
 from django.urls import include, path
 
+from core.metrics import MetricsView
+
 urlpatterns = [
     path("", include("core.urls")),
     path("accounts/", include("accounts.urls")),
     path("admin/", admin.site.urls),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     path("__debug__/", include("debug_toolbar.urls")),
 ]